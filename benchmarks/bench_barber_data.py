@@ -0,0 +1,105 @@
+"""
+Measure the latency of fetch_barber_data_from_db(), optionally behind a simulated network delay.
+
+Usage:
+    python -m benchmarks.bench_barber_data [iterations] [delay_ms]
+
+With a delay, the database connection goes through a local TCP proxy that holds every chunk
+for delay_ms / 2 in each direction, so each round trip costs about delay_ms more.
+Runs against the database configured in .env and only reads from it.
+"""
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+
+def _pipe(source, target, delay):
+    try:
+        while True:
+            chunk = source.recv(65536)
+            if not chunk:
+                break
+            if delay:
+                time.sleep(delay)
+            target.sendall(chunk)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, target):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def start_delay_proxy(host, port, delay_ms):
+    """
+    Start a TCP proxy to host:port adding delay_ms of round-trip latency.
+
+    Returns:
+    - int: The local port to connect to.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    one_way = delay_ms / 2000
+
+    def accept_forever():
+        while True:
+            client, _ = listener.accept()
+            server = socket.create_connection((host, port))
+            for sock in (client, server):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=_pipe, args=(client, server, one_way), daemon=True).start()
+            threading.Thread(target=_pipe, args=(server, client, one_way), daemon=True).start()
+
+    threading.Thread(target=accept_forever, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def _percentile(timings, percent):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * percent / 100))]
+
+
+def main(iterations=200, delay_ms=0):
+    load_dotenv()
+    if delay_ms:
+        # Must happen before database_conn reads the settings
+        port = start_delay_proxy(os.getenv("DB_HOST") or "localhost", int(os.getenv("DB_PORT") or 5432), delay_ms)
+        os.environ["DB_HOST"] = "127.0.0.1"
+        os.environ["DB_PORT"] = str(port)
+
+    from database.get_barber_data.fetch_barber_data_from_db import fetch_barber_data_from_db
+    from srvices.cache.catalog import get_catalog
+
+    catalog = get_catalog()
+    barber_ids = list(catalog.barbers_by_id) if catalog else None
+    service_ids = list(catalog.services_by_id)[:2] if catalog else None
+
+    fetch_barber_data_from_db(service_ids=service_ids, barber_ids=barber_ids)  # Warm up the pool
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fetch_barber_data_from_db(service_ids=service_ids, barber_ids=barber_ids)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    print(
+        f"fetch_barber_data_from_db, {iterations} calls, {delay_ms} ms injected round-trip delay: "
+        f"p50 {_percentile(timings, 50):.2f} ms, p99 {_percentile(timings, 99):.2f} ms, "
+        f"mean {statistics.fmean(timings):.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        iterations=int(args[0]) if len(args) > 0 else 200,
+        delay_ms=float(args[1]) if len(args) > 1 else 0,
+    )
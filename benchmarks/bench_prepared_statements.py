@@ -0,0 +1,101 @@
+"""
+Compare the hot queries executed as prepared statements with plain cursor.execute().
+
+Usage:
+    python -m benchmarks.bench_prepared_statements [iterations] [barber_id] [YYYY-MM-DD]
+
+Runs against the database configured in .env and only reads from it.
+"""
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+from database.barber_schedule.get_barber_schedule import BARBER_SCHEDULE
+from database.database_conn import get_connection, release_connection
+from database.get_available_free_slots.get_available_free_slots import BOOKINGS_WITH_DURATIONS_ON_DATE
+from database.get_bookings_for_barber.get_bookings_for_barber import BOOKINGS_ON_DATE
+from database.get_existing_breaks_for_barber.get_existing_breaks_for_barber import BREAKS_ON_DATE
+from database.insert_booking.insert_booking import BOOKING_CONFLICTS
+from database.prepared_statements import execute_prepared
+
+
+def _plain_query(statement):
+    # The same SQL with psycopg2 placeholders, as the functions ran it before
+    query = statement.query.replace("%", "%%")
+    for position in range(len(statement.arg_types), 0, -1):
+        query = query.replace(f"${position}", f"%(p{position})s")
+    return query
+
+
+def _timings(run, iterations):
+    run()  # Warm up: connection caches, and the PREPARE itself
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _summary(timings):
+    timings = sorted(timings)
+    return {
+        "mean": statistics.fmean(timings),
+        "p50": timings[len(timings) // 2],
+        "p95": timings[int(len(timings) * 0.95) - 1],
+    }
+
+
+def main(iterations=2000, barber_id=1, day=None):
+    day = day or date.today()
+    cases = [
+        (BARBER_SCHEDULE, (barber_id,)),
+        (BREAKS_ON_DATE, (barber_id, day)),
+        (BOOKINGS_ON_DATE, (barber_id, day)),
+        (BOOKINGS_WITH_DURATIONS_ON_DATE, (barber_id, day)),
+        (BOOKING_CONFLICTS, (barber_id, datetime.combine(day, datetime.min.time()).replace(hour=10), 1, [])),
+    ]
+
+    conn = get_connection()
+    if not conn:
+        print("Failed to connect to the database")
+        return
+
+    try:
+        cursor = conn.cursor()
+        print(f"{iterations} iterations per query, milliseconds per call")
+        print(f"{'statement':<34}{'plain mean':>12}{'prep mean':>12}{'plain p95':>12}{'prep p95':>12}{'speedup':>10}")
+        for statement, params in cases:
+            plain_query = _plain_query(statement)
+
+            plain_params = {f"p{position}": value for position, value in enumerate(params, 1)}
+
+            def plain():
+                cursor.execute(plain_query, plain_params)
+                cursor.fetchall()
+
+            def prepared():
+                execute_prepared(cursor, statement, params)
+                cursor.fetchall()
+
+            plain_stats = _summary(_timings(plain, iterations))
+            prepared_stats = _summary(_timings(prepared, iterations))
+            print(
+                f"{statement.name:<34}{plain_stats['mean']:>12.4f}{prepared_stats['mean']:>12.4f}"
+                f"{plain_stats['p95']:>12.4f}{prepared_stats['p95']:>12.4f}"
+                f"{plain_stats['mean'] / prepared_stats['mean']:>9.2f}x"
+            )
+        conn.rollback()
+        cursor.close()
+    finally:
+        release_connection(conn)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        iterations=int(args[0]) if len(args) > 0 else 2000,
+        barber_id=int(args[1]) if len(args) > 1 else 1,
+        day=date.fromisoformat(args[2]) if len(args) > 2 else None,
+    )
@@ -0,0 +1,330 @@
+"""
+Microbenchmarks of the slot engines, the free-slot overlap loop and the booking row formatters.
+
+Usage:
+    python -m benchmarks.bench_slot_engine [output.json] [baseline.json]
+
+Every case runs on a synthetic shop from benchmarks.synthetic_shop, for 3 to 200 barbers over
+1 to 90 days. The database is stubbed out: the functions that read it get a fake connection
+returning rows shaped like the real queries', built before the timing starts. Results are
+written as JSON (bench_slot_engine.json by default), and with a baseline file from an earlier
+run every case is printed with its change.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, time as time_of_day, timedelta
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from benchmarks.synthetic_shop import SERVICES_BY_ID, generate_shop
+from database.barber_schedule.weekly_schedule import WEEKLY_TEMPLATE
+from database.get_appointments_and_breaks import get_appointments_and_breaks as appointments_module
+from database.get_available_free_slots import get_available_free_slots as free_slots_module
+from database.get_available_free_slots.get_available_free_slots import BOOKINGS_WITH_DURATIONS_ON_DATE
+from database.get_bookings_from_today_onwards import get_bookings_from_today_onwards as bookings_module
+from database.get_existing_breaks_for_barber.get_existing_breaks_for_barber import BREAKS_ON_DATE
+from srvices.bookings.barbers_slots_main import generate_barber_specific_slots_with_bookings
+from srvices.bookings.batch_slots import generate_barber_slots_batch
+from srvices.bookings.day_occupancy import minute_label
+
+SHOP_SIZES = (3, 20, 50, 200)
+HORIZONS = (1, 7, 30, 90)
+SEED = 0
+
+# A fixed Monday, so every run books the same weekdays
+START_DATE = date(2030, 1, 7)
+
+# get_appointments_and_breaks() is the calendar of one barber, timed for this many barbers of each shop
+ADMIN_VIEW_BARBERS = 3
+
+# Each case runs at least MIN_RUNS times and until MIN_SECONDS have passed, at most MAX_RUNS times
+MIN_RUNS = 3
+MAX_RUNS = 50
+MIN_SECONDS = 0.5
+
+SERVICE_MINUTES = 30
+
+
+class FakeCursor:
+    """A cursor answering every query with the rows `respond(query, params)` returns."""
+
+    def __init__(self, connection, respond):
+        self.connection = connection
+        self._respond = respond
+        self._rows = []
+
+    def execute(self, query, params=None):
+        # execute_prepared() sends a PREPARE once per connection, it returns no rows
+        self._rows = [] if query.startswith("PREPARE") else self._respond(query, params)
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, respond):
+        self._respond = respond
+
+    def cursor(self):
+        return FakeCursor(self, self._respond)
+
+
+@contextmanager
+def stubbed_database(module, respond):
+    """Make the get_connection() of a database module hand out a FakeConnection."""
+    connection = FakeConnection(respond)
+    saved = module.get_connection, module.release_connection
+    module.get_connection = lambda: connection
+    module.release_connection = lambda conn: None
+    try:
+        yield
+    finally:
+        module.get_connection, module.release_connection = saved
+
+
+def _as_time(minutes):
+    return time_of_day(0, 0) if minutes >= 1440 else time_of_day(minutes // 60, minutes % 60)
+
+
+def _duration(service_ids):
+    total = sum(SERVICES_BY_ID[service_id][1] for service_id in service_ids)
+    return timedelta(minutes=total) if service_ids else None
+
+
+def _weekly_template_rows(shop, barber_id):
+    start, end = shop.default_hours[barber_id]
+    rows = [('default', None, int(start[:2]) * 60 + int(start[3:]), int(end[:2]) * 60 + int(end[3:]), False)]
+    for weekday, hours in shop.weekly_hours.get(barber_id, {}).items():
+        rows.append(('weekday', weekday, *(hours or (None, None)), hours is None))
+    for weekday, intervals in shop.recurring_breaks.get(barber_id, {}).items():
+        rows.extend(('break', weekday, start, end, False) for start, end in intervals)
+    return rows
+
+
+def free_slot_responses(shop):
+    """
+    Build the rows of the three queries of _compute_free_slot_starts() for every barber and day.
+
+    Returns:
+    - function: A FakeCursor responder.
+    """
+    bookings_by_day = {}
+    for booking in shop.bookings:
+        bookings_by_day.setdefault((booking["barber_id"], booking["appointment_time"].date()), []).append(
+            (booking["appointment_time"], _duration([booking["service_id"]]), _duration(booking["extra"]))
+        )
+    templates = {barber_id: _weekly_template_rows(shop, barber_id) for barber_id in shop.barber_ids}
+    breaks = {
+        (barber_id, day): [(start, end) for start, end, _ in intervals]
+        for barber_id, dated in shop.breaks.items() for day, intervals in dated.items()
+    }
+
+    def respond(query, params):
+        if query.startswith(WEEKLY_TEMPLATE.execute_sql()):
+            return templates.get(params[0], [])
+        if query.startswith(BREAKS_ON_DATE.execute_sql()):
+            return breaks.get(params, [])
+        if query.startswith(BOOKINGS_WITH_DURATIONS_ON_DATE.execute_sql()):
+            return bookings_by_day.get(params, [])
+        raise AssertionError(f"unexpected query: {query[:60]}")
+
+    return respond
+
+
+def bookings_from_today_responses(shop):
+    """Build the rows of the get_bookings_from_today_onwards() query for every barber."""
+    rows = {barber_id: [] for barber_id in shop.barber_ids}
+    for booking in shop.bookings:
+        name, minutes, _ = SERVICES_BY_ID[booking["service_id"]]
+        rows[booking["barber_id"]].append((
+            booking["booking_id"], booking["barber_id"], booking["service_id"], name,
+            booking["customer_name"], booking["appointment_time"], booking["email"], booking["phone"],
+            booking["price"], timedelta(minutes=minutes),
+            # json_build_object() renders the interval as text
+            [
+                {"service_name": SERVICES_BY_ID[extra_id][0], "duration": f"{minute_label(SERVICES_BY_ID[extra_id][1])}:00"}
+                for extra_id in booking["extra"]
+            ],
+        ))
+    return lambda query, params: rows[params[0]]
+
+
+def appointments_and_breaks_responses(shop):
+    """
+    Build the rows of the get_appointments_and_breaks() query for every barber and day.
+
+    The query joins the bookings of the day to every break of the barber, so a day holds
+    (bookings x breaks) rows, as it does against the database.
+    """
+    bookings_by_day = {}
+    for booking in shop.bookings:
+        bookings_by_day.setdefault((booking["barber_id"], booking["appointment_time"].date()), []).append(booking)
+
+    rows = {}
+    for (barber_id, day), bookings in bookings_by_day.items():
+        start, end = shop.default_hours[barber_id]
+        schedule = (time_of_day(int(start[:2]), int(start[3:])), time_of_day(int(end[:2]), int(end[3:])))
+        exception = shop.exceptions.get(barber_id, {}).get(day, False)
+        if exception is False:
+            exception_columns = (None, None, None, None)
+        elif exception is None:
+            exception_columns = (day, None, None, True)
+        else:
+            exception_columns = (day, _as_time(exception[0]), _as_time(exception[1]), False)
+        breaks = [
+            (break_day, _as_time(break_start), f"{minute_label(break_end)}:00", break_type)
+            for break_day, intervals in sorted(shop.breaks.get(barber_id, {}).items())
+            for break_start, break_end, break_type in intervals
+        ] or [(None, None, None, None)]
+        rows[(barber_id, day)] = [
+            (booking["appointment_time"], booking["service_id"], booking["extra"], *break_columns,
+             *schedule, *exception_columns,
+             timedelta(minutes=SERVICES_BY_ID[booking["service_id"]][1]), _duration(booking["extra"]))
+            for booking in bookings for break_columns in breaks
+        ]
+    return lambda query, params: rows.get(params, [])
+
+
+def _measure(run):
+    run()  # Warm up
+    gc.collect()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < MAX_RUNS and (len(timings) < MIN_RUNS or time.perf_counter() - started < MIN_SECONDS):
+        run_started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - run_started) * 1000)
+    return timings
+
+
+def bench_cases(shop):
+    """
+    Return the benchmarks of one shop, as (name, units, run) tuples.
+
+    `units` is the number of barber-days (or barbers) one run covers, to report a cost per unit.
+    The calendar view of get_appointments_and_breaks() is timed for the first ADMIN_VIEW_BARBERS barbers only,
+    its rows grow with the bookings of a day times all the breaks of the barber.
+    """
+    arguments = shop.slot_engine_arguments()
+    days = shop.days()
+    barber_days = [(barber_id, day) for barber_id in shop.barber_ids for day in days]
+    admin_view_days = [(barber_id, day) for barber_id in shop.barber_ids[:ADMIN_VIEW_BARBERS] for day in days]
+
+    def sequential_engine():
+        generate_barber_specific_slots_with_bookings(
+            **arguments, service_duration_minutes=SERVICE_MINUTES, include_past=True
+        )
+
+    def batch_engine():
+        generate_barber_slots_batch(**arguments, service_duration_minutes=SERVICE_MINUTES, include_past=True)
+
+    free_slots = free_slot_responses(shop)
+
+    def free_slot_overlap():
+        with stubbed_database(free_slots_module, free_slots):
+            for barber_id, day in barber_days:
+                free_slots_module._compute_free_slot_starts(barber_id, day)
+
+    bookings_rows = bookings_from_today_responses(shop)
+
+    def bookings_from_today():
+        with stubbed_database(bookings_module, bookings_rows):
+            for barber_id in shop.barber_ids:
+                bookings_module.get_bookings_from_today_onwards(barber_id)
+
+    appointments_rows = appointments_and_breaks_responses(shop)
+
+    def appointments_and_breaks():
+        with stubbed_database(appointments_module, appointments_rows):
+            for barber_id, day in admin_view_days:
+                appointments_module.get_appointments_and_breaks(barber_id, day)
+
+    return [
+        ("slot_engine_sequential", len(barber_days), sequential_engine),
+        ("slot_engine_batch", len(barber_days), batch_engine),
+        ("free_slot_overlap", len(barber_days), free_slot_overlap),
+        ("bookings_from_today_formatting", len(shop.barber_ids), bookings_from_today),
+        ("appointments_and_breaks_formatting", len(admin_view_days), appointments_and_breaks),
+    ]
+
+
+def run(shop_sizes=SHOP_SIZES, horizons=HORIZONS, seed=SEED):
+    """
+    Run every benchmark for every shop size and horizon.
+
+    Returns:
+    - dict: "meta" describing the run, and "results" keyed "<benchmark>/<barbers>x<days>".
+    """
+    results = {}
+    for barber_count in shop_sizes:
+        for days in horizons:
+            shop = generate_shop(barber_count, days, seed=seed, start_date=START_DATE)
+            for name, units, bench in bench_cases(shop):
+                timings = _measure(bench)
+                median = statistics.median(timings)
+                results[f"{name}/{barber_count}x{days}"] = {
+                    "benchmark": name,
+                    "barbers": barber_count,
+                    "days": days,
+                    "bookings": len(shop.bookings),
+                    "runs": len(timings),
+                    "median_ms": round(median, 4),
+                    "min_ms": round(min(timings), 4),
+                    "mean_ms": round(statistics.mean(timings), 4),
+                    "per_unit_us": round(median * 1000 / units, 3) if units else None,
+                }
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Print every case of `report` next to the same case in `baseline`."""
+    print(f"{'case':<48}{'baseline ms':>13}{'now ms':>11}{'change':>9}")
+    for key, result in report["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            print(f"{key:<48}{'-':>13}{result['median_ms']:>11.3f}{'new':>9}")
+            continue
+        change = (result["median_ms"] / before["median_ms"] - 1) * 100 if before["median_ms"] else 0.0
+        print(f"{key:<48}{before['median_ms']:>13.3f}{result['median_ms']:>11.3f}{change:>+8.0f}%")
+
+
+def main(output="bench_slot_engine.json", baseline=None):
+    report = run()
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            compare(report, json.load(f))
+    else:
+        print(f"{'case':<48}{'runs':>6}{'median ms':>12}{'us/unit':>10}")
+        for key, result in report["results"].items():
+            print(f"{key:<48}{result['runs']:>6}{result['median_ms']:>12.3f}{result['per_unit_us']:>10.2f}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        output=args[0] if len(args) > 0 else "bench_slot_engine.json",
+        baseline=args[1] if len(args) > 1 else None,
+    )
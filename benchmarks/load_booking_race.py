@@ -0,0 +1,125 @@
+"""
+Fire many concurrent POST /bookings for the same barber and slot, and check that exactly one wins.
+
+Usage:
+    python -m benchmarks.load_booking_race [requests] [concurrency] [barber_id] [service_id] [YYYY-MM-DDTHH:MM]
+
+Starts the app on a local port, in this process, against the database configured in .env.
+The bookings it creates are deleted at the end.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+os.environ.setdefault("CACHE_INVALIDATION_LISTENER", "0")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from database.database_conn import get_connection, release_connection  # noqa: E402
+from main import create_app  # noqa: E402
+
+CUSTOMER_NAME = "load_booking_race"
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def _delete_test_bookings():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Bookings WHERE customer_name = %s", (CUSTOMER_NAME,))
+        conn.commit()
+        cursor.close()
+    finally:
+        release_connection(conn)
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def main(requests=300, concurrency=100, barber_id=1, service_id=1, appointment_time="2031-01-07T10:00"):
+    _delete_test_bookings()
+
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True, request_handler=_QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/bookings"
+    body = json.dumps({
+        "barber_id": barber_id,
+        "service_id": service_id,
+        "customer_name": CUSTOMER_NAME,
+        "appointment_time": appointment_time,
+        "email": "load@example.com",
+        "phone": "0",
+        "price": 0,
+        "extra": [],
+    }).encode()
+
+    try:
+        # Every request aims at the same slot, released together once all threads are ready
+        barrier = threading.Barrier(min(requests, concurrency))
+
+        def fire(_):
+            try:
+                barrier.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                pass
+            return _post(url, body)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fire, range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(latency * 1000 for _, latency in results)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Bookings WHERE customer_name = %s", (CUSTOMER_NAME,))
+    (stored,) = cursor.fetchone()
+    cursor.close()
+    release_connection(conn)
+    _delete_test_bookings()
+
+    print(f"{requests} requests, {concurrency} concurrent, {elapsed:.2f} s, {requests / elapsed:.0f} requests/s")
+    print(f"responses: {dict(sorted(statuses.items()))}")
+    print(
+        f"latency ms: p50 {latencies[len(latencies) // 2]:.1f}, "
+        f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.1f}, max {latencies[-1]:.1f}"
+    )
+    print(f"bookings stored for the slot: {stored}")
+    if stored != 1 or statuses.get(201) != 1:
+        print("FAILED: expected exactly one booking to win")
+        sys.exit(1)
+    print("OK: exactly one booking won")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        requests=int(args[0]) if len(args) > 0 else 300,
+        concurrency=int(args[1]) if len(args) > 1 else 100,
+        barber_id=int(args[2]) if len(args) > 2 else 1,
+        service_id=int(args[3]) if len(args) > 3 else 1,
+        appointment_time=args[4] if len(args) > 4 else "2031-01-07T10:00",
+    )
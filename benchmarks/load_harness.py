@@ -0,0 +1,614 @@
+"""
+End-to-end load test: seed a local database, start the app under gunicorn against it, and drive
+it with a realistic mix of requests, or replay a recorded request log.
+
+Usage:
+    python -m benchmarks.load_harness mix [--seconds 30] [--clients 16] [--barbers 20] [--days 30] [--record LOG]
+    python -m benchmarks.load_harness replay LOG [--speed 1.0] [--shift-days N]
+
+The database is created from scratch on the server configured in .env, under LOAD_DB_NAME
+(DB_NAME + "_load" by default), from database/db.sql plus a synthetic shop from
+benchmarks.synthetic_shop. The configured DB_NAME itself is never touched. --no-seed reuses the
+load database as it is, --url drives an app that is already running instead.
+
+The mix: clients mostly open the calendar (/get_barbers_and_slots) and the booking widget
+(/available-slots), barbers add breaks and exceptions now and then, and every few seconds
+a burst of customers books the same popular slot at once. Throughput, p50/p95/p99 latency and
+the error rate are reported per endpoint, and --output writes them as JSON.
+
+A replayed log is a file of JSON lines as written by the app with REQUEST_LOG_PATH set, or by
+`mix --record`. Requests are sent at their recorded pace (--speed 2 is twice as fast), with
+every date moved by whole weeks so the first recorded day falls today or later. Replay a
+production log against a restored copy of that database (--no-seed --database COPY).
+"""
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+import http.client
+import json
+import math
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from dotenv import load_dotenv
+import psycopg2
+from psycopg2 import sql
+
+from benchmarks.synthetic_shop import generate_shop, insert_shop
+from srvices.jwt.jwt_models import generate_token
+
+load_dotenv()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_SQL = os.path.join(ROOT, "database", "db.sql")
+
+DB_NAME = os.getenv("DB_NAME")
+LOAD_DB_NAME = os.getenv("LOAD_DB_NAME", f"{DB_NAME}_load")
+
+# Relative weight of every kind of request the clients send
+MIX = (
+    ("calendar", 45),
+    ("available_slots", 45),
+    ("admin_breaks", 3),
+    ("admin_exceptions", 2),
+)
+
+# Statuses that are a normal answer to each kind of request, anything else counts as an error.
+# A 409 is the expected answer to a booking that lost its slot, or an edit overlapping bookings
+EXPECTED_STATUSES = {
+    "calendar": {200},
+    "available_slots": {200},
+    "booking": {201, 409},
+    "admin_breaks": {201, 409},
+    "admin_exceptions": {200, 409},
+}
+
+# Every BURST_SECONDS, BURST_SIZE customers book the same slot of one of the first POPULAR_BARBERS
+BURST_SECONDS = 2.0
+BURST_SIZE = 20
+POPULAR_BARBERS = 3
+
+DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+
+
+def _connect(dbname):
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"), port=os.getenv("DB_PORT"),
+        user=os.getenv("DB_USER"), password=os.getenv("DB_PASSWORD"), dbname=dbname
+    )
+
+
+def seed_database(db_name, barbers, days, seed):
+    """
+    Create `db_name` from database/db.sql and add a synthetic shop bookable from today.
+
+    Returns:
+    - dict: Number of barbers, bookings, breaks and exceptions written.
+    """
+    if db_name == DB_NAME:
+        raise SystemExit(f"Refusing to recreate {db_name}, the database of .env, pick another LOAD_DB_NAME")
+
+    admin = _connect("postgres")
+    admin.autocommit = True
+    try:
+        cursor = admin.cursor()
+        cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
+        # db.sql holds non-ASCII service names
+        cursor.execute(
+            sql.SQL("CREATE DATABASE {} ENCODING 'UTF8' TEMPLATE template0").format(sql.Identifier(db_name))
+        )
+        cursor.close()
+    finally:
+        admin.close()
+
+    shop = generate_shop(barbers, days, seed=seed)
+    conn = _connect(db_name)
+    try:
+        cursor = conn.cursor()
+        with open(DB_SQL, encoding="utf-8") as f:
+            cursor.execute(f.read())
+        insert_shop(cursor, shop)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    return {
+        "barbers": len(shop.barber_ids),
+        "bookings": len(shop.bookings),
+        "breaks": sum(len(intervals) for dated in shop.breaks.values() for intervals in dated.values()),
+        "exceptions": sum(len(dated) for dated in shop.exceptions.values()),
+    }
+
+
+class Targets:
+    """What the mix can ask for: bookable barbers, their services and the catalog's service names."""
+
+    def __init__(self, db_name):
+        conn = _connect(db_name)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT barber_id, GREATEST(MIN(start_date), CURRENT_DATE), MAX(end_date)
+                FROM BarberAvailability
+                GROUP BY barber_id
+                HAVING MAX(end_date) >= CURRENT_DATE
+                ORDER BY barber_id
+            """)
+            self.barbers = cursor.fetchall()
+            cursor.execute("""
+                SELECT bs.barber_id, s.service_id, s.service_name, COALESCE(p.price, s.price, 0)
+                FROM BarberServices bs
+                JOIN Services s ON s.service_id = bs.service_id
+                LEFT JOIN BarberServicePrices p ON p.barber_id = bs.barber_id AND p.service_id = bs.service_id
+                WHERE bs.barber_id = ANY(%s)
+                ORDER BY bs.barber_id, s.service_id
+            """, ([barber_id for barber_id, _, _ in self.barbers],))
+            offered = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        if not self.barbers:
+            raise SystemExit(f"No barber of {db_name} is bookable from today, seed it first")
+
+        self.services_by_barber = {}
+        for barber_id, service_id, _, price in offered:
+            self.services_by_barber.setdefault(barber_id, []).append((service_id, float(price)))
+        self.service_names = sorted({name for _, _, name, _ in offered})
+        self.tokens = {barber_id: generate_token(barber_id) for barber_id, _, _ in self.barbers}
+
+    def day(self, rng, barber, near=True):
+        # Customers mostly look at the next few days, barbers edit anywhere in their horizon
+        _, start, end = barber
+        span = (end - start).days
+        offset = min(int(rng.expovariate(0.5)), span) if near else rng.randint(0, span)
+        return start + timedelta(days=offset)
+
+
+class Stats:
+    """Latencies and statuses of every request, per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._statuses = {}
+        self._errors = Counter()
+
+    def add(self, endpoint, status, seconds, error):
+        with self._lock:
+            self._latencies.setdefault(endpoint, []).append(seconds * 1000)
+            self._statuses.setdefault(endpoint, Counter())[str(status)] += 1
+            if error:
+                self._errors[endpoint] += 1
+
+    def report(self, elapsed):
+        """
+        Summarize every endpoint.
+
+        Returns:
+        - dict: Endpoints mapped to their requests, requests_per_second, p50/p95/p99 in ms,
+          error_rate and status counts.
+        """
+        with self._lock:
+            report = {}
+            for endpoint in sorted(self._latencies):
+                latencies = sorted(self._latencies[endpoint])
+                report[endpoint] = {
+                    "requests": len(latencies),
+                    "requests_per_second": round(len(latencies) / elapsed, 1),
+                    "p50_ms": round(_percentile(latencies, 50), 1),
+                    "p95_ms": round(_percentile(latencies, 95), 1),
+                    "p99_ms": round(_percentile(latencies, 99), 1),
+                    "error_rate": round(self._errors[endpoint] / len(latencies), 4),
+                    "statuses": dict(self._statuses[endpoint]),
+                }
+            return report
+
+
+def _percentile(ordered, percent):
+    # Nearest rank
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class RequestRecorder:
+    """Write the requests sent in the format of the app's request log, so `replay` can send them again."""
+
+    def __init__(self, path):
+        self._file = open(path, "w")
+        self._lock = threading.Lock()
+
+    def write(self, method, path, query, body, auth):
+        line = json.dumps({
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "method": method, "path": path, "query": query, "body": body, "auth": auth,
+        })
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class Client:
+    """One keep-alive connection to the app, sending requests and counting them in Stats."""
+
+    def __init__(self, url, stats, recorder=None):
+        parts = urlsplit(url)
+        self._host, self._port = parts.hostname, parts.port or 80
+        self._stats = stats
+        self._recorder = recorder
+        self._conn = None
+
+    def send(self, kind, method, path, query="", body=None, token=None, expected=None, started=None):
+        """
+        Send one request.
+
+        Parameters:
+        - kind (str): The kind of request, its EXPECTED_STATUSES tell what counts as an error.
+        - method (str), path (str), query (str): The request line, the query without "?".
+        - body (dict, optional): Sent as JSON.
+        - token (str, optional): Bearer token.
+        - expected (set, optional): Statuses that aren't errors, defaults to the kind's. Without
+          either, any answer below 500 is fine.
+        - started (float, optional): perf_counter() the latency is measured from, defaults to now.
+
+        Returns:
+        - tuple: (status, response body), status 0 if no answer came.
+        """
+        if self._recorder is not None:
+            self._recorder.write(method, path, query, body, token is not None)
+
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        started = started if started is not None else time.perf_counter()
+        try:
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=60)
+            self._conn.request(method, f"{path}?{query}" if query else path, body=payload, headers=headers)
+            response = self._conn.getresponse()
+            status, content = response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+            status, content = 0, b""
+
+        expected = expected if expected is not None else EXPECTED_STATUSES.get(kind)
+        error = status == 0 or (status not in expected if expected else status >= 500)
+        self._stats.add(f"{method} {path}", status, time.perf_counter() - started, error)
+        return status, content
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+def _calendar(rng, targets):
+    names = rng.sample(targets.service_names, 2 if rng.random() < 0.2 and len(targets.service_names) > 1 else 1)
+    return "POST", "/get_barbers_and_slots", "", {"service_name": names}, None
+
+
+def _available_slots(rng, targets):
+    barber = rng.choice(targets.barbers)
+    query = urlencode({"barber_id": barber[0], "date": targets.day(rng, barber).isoformat()})
+    return "GET", "/available-slots", query, None, None
+
+
+def _admin_breaks(rng, targets):
+    barber = rng.choice(targets.barbers)
+    start = rng.randrange(9 * 60, 17 * 60, 15)
+    body = {
+        "barber_id": barber[0],
+        "timeType": "Break",
+        "breaks": [{
+            "break_date": targets.day(rng, barber, near=False).isoformat(),
+            "break_time": f"{start // 60:02d}:{start % 60:02d}",
+            "break_end": f"{(start + 30) // 60:02d}:{(start + 30) % 60:02d}",
+        }],
+    }
+    return "POST", "/add_barber_breaks_bulk", "", body, targets.tokens[barber[0]]
+
+
+def _admin_exceptions(rng, targets):
+    barber = rng.choice(targets.barbers)
+    body = {
+        "barber_id": barber[0],
+        "start_date": targets.day(rng, barber, near=False).isoformat(),
+        "custom_start_time": "10:00:00",
+        "custom_end_time": "16:00:00",
+        "is_off": False,
+    }
+    return "POST", "/insert_barber_exceptions", "", body, targets.tokens[barber[0]]
+
+
+REQUEST_BUILDERS = {
+    "calendar": _calendar,
+    "available_slots": _available_slots,
+    "admin_breaks": _admin_breaks,
+    "admin_exceptions": _admin_exceptions,
+}
+
+
+def _burst(url, rng, targets, stats, recorder):
+    """Look up a free slot of a popular barber, then book it BURST_SIZE times at once. Returns the bookings made."""
+    barber = rng.choice(targets.barbers[:POPULAR_BARBERS])
+    day = targets.day(rng, barber)
+    lookup = Client(url, stats, recorder)
+    status, content = lookup.send(
+        "available_slots", "GET", "/available-slots", urlencode({"barber_id": barber[0], "date": day.isoformat()})
+    )
+    lookup.close()
+    slots = json.loads(content).get("available_slots") if status == 200 else None
+    services = targets.services_by_barber.get(barber[0])
+    if not slots or not services:
+        return None
+
+    service_id, price = services[0]
+    body = {
+        "barber_id": barber[0], "service_id": service_id, "customer_name": "load_harness",
+        "appointment_time": f"{day.isoformat()}T{slots[0]}", "email": "load@example.com",
+        "phone": "0", "price": price, "extra": [],
+    }
+    barrier = threading.Barrier(BURST_SIZE)
+
+    def book(_):
+        client = Client(url, stats, recorder)
+        try:
+            barrier.wait(timeout=30)
+            return client.send("booking", "POST", "/bookings", body=body)[0]
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=BURST_SIZE) as executor:
+        statuses = list(executor.map(book, range(BURST_SIZE)))
+    return statuses.count(201)
+
+
+def run_mix(url, targets, seconds, clients, seed=0, recorder=None):
+    """
+    Drive the app with MIX from `clients` keep-alive clients, and booking bursts, for `seconds`.
+
+    Returns:
+    - dict: "endpoints", the per endpoint report, and "bursts": how many ran and how many
+      ended with more than one booking of the same slot.
+    """
+    stats = Stats()
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    deadline = time.monotonic() + seconds
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        session = Client(url, stats, recorder)
+        while time.monotonic() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            method, path, query, body, token = REQUEST_BUILDERS[kind](rng, targets)
+            session.send(kind, method, path, query, body, token)
+        session.close()
+
+    bursts = []
+
+    def burster():
+        rng = random.Random(seed)
+        while time.monotonic() + BURST_SECONDS < deadline:
+            time.sleep(BURST_SECONDS)
+            bookings = _burst(url, rng, targets, stats, recorder)
+            if bookings is not None:
+                bursts.append(bookings)
+
+    started = time.monotonic()
+    burst_thread = threading.Thread(target=burster, daemon=True)
+    burst_thread.start()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    burst_thread.join()
+
+    return {
+        "endpoints": stats.report(time.monotonic() - started),
+        "bursts": {"count": len(bursts), "double_bookings": sum(1 for bookings in bursts if bookings > 1)},
+    }
+
+
+def load_request_log(path):
+    """Read a request log, oldest request first."""
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    for entry in entries:
+        entry["ts"] = datetime.fromisoformat(entry["ts"])
+    return sorted(entries, key=lambda entry: entry["ts"])
+
+
+def weeks_to_today(entries):
+    """Days, in whole weeks, that move the first recorded day to today or later, keeping the weekdays."""
+    days_behind = (date.today() - entries[0]["ts"].date()).days
+    return 7 * math.ceil(days_behind / 7) if days_behind > 0 else 0
+
+
+def _shift_dates(text, days):
+    def shift(match):
+        try:
+            return (date(*map(int, match.groups())) + timedelta(days=days)).isoformat()
+        except ValueError:
+            return match.group(0)
+    return DATE_PATTERN.sub(shift, text)
+
+
+def _replay_token(entry, tokens):
+    # Tokens are never recorded, sign one for the barber the request is about
+    barber_id = (entry.get("body") or {}).get("barber_id") if isinstance(entry.get("body"), dict) else None
+    if barber_id is None:
+        match = re.search(r"(?:^|&)barber_id=(\d+)", entry.get("query") or "")
+        barber_id = int(match.group(1)) if match else 1
+    if barber_id not in tokens:
+        tokens[barber_id] = generate_token(int(barber_id))
+    return tokens[barber_id]
+
+
+def replay(url, entries, speed=1.0, shift_days=0, clients=64):
+    """
+    Send the requests of a log at their recorded pace.
+
+    Latency is measured from the time a request was due, so requests queued behind a busy
+    app count the wait, as they would for the customers who sent them.
+
+    Returns:
+    - dict: "endpoints", the per endpoint report, and "lag_ms", how late the last request was sent.
+    """
+    stats = Stats()
+    tokens = {}
+    local = threading.local()
+    first = entries[0]["ts"]
+    lag = [0.0]
+
+    def send(entry, due):
+        if not hasattr(local, "client"):
+            local.client = Client(url, stats)
+        lag[0] = max(lag[0], time.perf_counter() - due)
+        body = entry.get("body")
+        if body is not None and shift_days:
+            body = json.loads(_shift_dates(json.dumps(body), shift_days))
+        local.client.send(
+            entry["path"], entry["method"], entry["path"], _shift_dates(entry.get("query") or "", shift_days),
+            body, _replay_token(entry, tokens) if entry.get("auth") else None, started=due
+        )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for entry in entries:
+            due = started + (entry["ts"] - first).total_seconds() / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, entry, due)
+
+    return {"endpoints": stats.report(time.perf_counter() - started), "lag_ms": round(lag[0] * 1000, 1)}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_name, workers, port):
+    """Start gunicorn with gunicorn.conf.py against `db_name` and wait until every worker is warm."""
+    env = dict(os.environ, DB_NAME=db_name, LOG_LEVEL=os.environ.get("LOG_LEVEL", "ERROR"), REQUEST_LOG_PATH="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+         "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    deadline = time.monotonic() + 120
+    ready = 0
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/ready")
+            status = conn.getresponse().status
+            conn.close()
+            # /ready is per worker, wait until a few answers in a row say ready
+            ready = ready + 1 if status == 200 else 0
+            if ready >= 2 * workers:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def stop_server(server):
+    # SIGTERM is gunicorn's graceful shutdown, workers finish their requests and close their pools
+    server.send_signal(signal.SIGTERM)
+    server.wait(timeout=60)
+
+
+def print_report(result):
+    print(f"{'endpoint':<34}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}  statuses")
+    for endpoint, row in result["endpoints"].items():
+        statuses = " ".join(f"{status}:{count}" for status, count in sorted(row["statuses"].items()))
+        print(
+            f"{endpoint:<34}{row['requests']:>9}{row['requests_per_second']:>8.1f}{row['p50_ms']:>9.1f}"
+            f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['error_rate']:>8.1%}  {statuses}"
+        )
+    if "bursts" in result:
+        print(f"booking bursts: {result['bursts']['count']}, slots booked twice: {result['bursts']['double_bookings']}")
+    if "lag_ms" in result:
+        print(f"replay fell behind by up to {result['lag_ms']:.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_harness", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    mix = commands.add_parser("mix", help="drive the app with the synthetic mix")
+    mix.add_argument("--seconds", type=float, default=30)
+    mix.add_argument("--clients", type=int, default=16)
+    mix.add_argument("--barbers", type=int, default=20)
+    mix.add_argument("--days", type=int, default=30)
+    mix.add_argument("--record", help="write the requests sent to this log, for replay")
+    replay_parser = commands.add_parser("replay", help="replay a recorded request log")
+    replay_parser.add_argument("log")
+    replay_parser.add_argument("--speed", type=float, default=1.0)
+    replay_parser.add_argument("--shift-days", type=int, help="move every date by this many days, default whole weeks to today")
+    replay_parser.add_argument("--clients", type=int, default=64, help="requests in flight at most")
+    replay_parser.add_argument("--barbers", type=int, default=20)
+    replay_parser.add_argument("--days", type=int, default=30)
+    for command in (mix, replay_parser):
+        command.add_argument("--database", default=LOAD_DB_NAME)
+        command.add_argument("--no-seed", action="store_true", help="use the database as it is")
+        command.add_argument("--url", help="drive an app that is already running, nothing is seeded or started")
+        command.add_argument("--workers", type=int, default=2)
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        if not args.no_seed:
+            print(f"Seeding {args.database}: {seed_database(args.database, args.barbers, args.days, args.seed)}")
+        port = _free_port()
+        server = start_server(args.database, args.workers, port)
+        url = f"http://127.0.0.1:{port}"
+
+    try:
+        if args.command == "mix":
+            recorder = RequestRecorder(args.record) if args.record else None
+            try:
+                result = run_mix(url, Targets(args.database), args.seconds, args.clients, args.seed, recorder)
+            finally:
+                if recorder is not None:
+                    recorder.close()
+        else:
+            entries = load_request_log(args.log)
+            if not entries:
+                raise SystemExit(f"{args.log} holds no requests")
+            shift_days = args.shift_days if args.shift_days is not None else weeks_to_today(entries)
+            print(f"Replaying {len(entries)} requests at {args.speed}x, dates moved by {shift_days} days")
+            result = replay(url, entries, args.speed, shift_days, args.clients)
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
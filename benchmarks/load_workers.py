@@ -0,0 +1,122 @@
+"""
+Measure API throughput under gunicorn with 1, 2, 4 and 8 workers.
+
+Usage:
+    python -m benchmarks.load_workers [seconds] [concurrency] [workers,...]
+
+Starts gunicorn with gunicorn.conf.py for every worker count, against the database configured in
+.env, and sends a mix of catalog and calendar requests from `concurrency` keep-alive clients.
+Only reads from the database. The client runs on the same machine, so leave it cores to spare.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (method, path, body) sent in turn by every client
+REQUESTS = [
+    ("GET", "/get_categories_and_services", None),
+    ("POST", "/get_barbers_and_slots", json.dumps({"service_name": ["Skin Fade"]})),
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers, port):
+    env = dict(os.environ, LOG_LEVEL=os.environ.get("LOG_LEVEL", "ERROR"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+         "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/get_categories_and_services")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def _client(port, seconds):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + seconds
+    index = 0
+    while time.monotonic() < deadline:
+        method, path, body = REQUESTS[index % len(REQUESTS)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    return latencies, errors
+
+
+def run(workers, seconds, concurrency):
+    port = _free_port()
+    server = _start_server(workers, port)
+    try:
+        _client(port, 1)  # Warm up the workers' availability caches
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda _: _client(port, seconds), range(concurrency)))
+    finally:
+        # SIGTERM is gunicorn's graceful shutdown, workers finish their requests and close their pools
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(latency * 1000 for client_latencies, _ in results for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+    return {
+        "workers": workers,
+        "requests_per_second": len(latencies) / seconds,
+        "p50": latencies[len(latencies) // 2] if latencies else 0.0,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main(seconds=10, concurrency=16, worker_counts=(1, 2, 4, 8)):
+    print(f"{os.cpu_count()} cores, {concurrency} clients, {seconds} s per run")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for workers in worker_counts:
+        result = run(workers, seconds, concurrency)
+        print(
+            f"{result['workers']:>8}{result['requests_per_second']:>10.0f}{result['p50']:>10.1f}"
+            f"{result['p99']:>10.1f}{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        seconds=float(args[0]) if len(args) > 0 else 10,
+        concurrency=int(args[1]) if len(args) > 1 else 16,
+        worker_counts=tuple(int(count) for count in args[2].split(",")) if len(args) > 2 else (1, 2, 4, 8),
+    )
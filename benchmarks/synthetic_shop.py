@@ -0,0 +1,302 @@
+"""
+Generate a synthetic barber shop: services, barbers, weekly schedules, recurring breaks,
+bookings with extra services, dated breaks and exceptions.
+
+The same seed always gives the same shop, so benchmark runs can be compared with each other.
+"""
+from datetime import date, datetime, timedelta
+import random
+
+from psycopg2.extras import execute_values
+
+from srvices.bookings.day_occupancy import minute_label
+from srvices.bookings.weekly_template import DAYS_PER_WEEK, compile_weekly_template
+
+# (service_id, service_name, minutes, price) of the synthetic catalog
+SERVICES = (
+    (1, "Haircut", 30, 25),
+    (2, "Skin Fade", 45, 30),
+    (3, "Beard Trim", 15, 12),
+    (4, "Hot Towel Shave", 30, 22),
+    (5, "Kids Cut", 20, 15),
+    (6, "Hair Wash", 15, 8),
+    (7, "Styling", 15, 10),
+    (8, "Colouring", 60, 45),
+)
+
+# Services that are only booked as extras of another one
+EXTRA_SERVICE_IDS = (3, 6, 7)
+
+# Chance of a free quarter-hour being taken by a booking
+BOOKING_DENSITY = 0.6
+
+# Chances, per barber and working day, of a dated break, a day off and custom hours
+BREAK_CHANCE = 0.2
+DAY_OFF_CHANCE = 0.03
+CUSTOM_HOURS_CHANCE = 0.05
+
+SERVICES_BY_ID = {service_id: (name, minutes, price) for service_id, name, minutes, price in SERVICES}
+
+
+class SyntheticShop:
+    """
+    A generated shop, with the data held the way the tables hold it.
+
+    Attributes:
+    - barber_ids (list): The barbers, numbered from 1.
+    - start_date (datetime.date), end_date (datetime.date): The horizon every barber is bookable on.
+    - default_hours (dict): Barber IDs mapped to ('HH:MM', 'HH:MM') BarberSchedules hours.
+    - weekly_hours (dict): Barber IDs mapped to weekdays mapped to (start, end) minutes, or None for a day off.
+    - recurring_breaks (dict): Barber IDs mapped to weekdays mapped to lists of (start, end) minutes.
+    - bookings (list): Dictionaries shaped like Bookings rows, appointment_time a datetime.
+    - breaks (dict): Barber IDs mapped to dates mapped to lists of (start, end, type), minutes.
+    - exceptions (dict): Barber IDs mapped to dates mapped to (start, end) minutes, or None for a day off.
+    """
+
+    def __init__(self, barber_ids, start_date, end_date):
+        self.barber_ids = barber_ids
+        self.start_date = start_date
+        self.end_date = end_date
+        self.default_hours = {}
+        self.weekly_hours = {}
+        self.recurring_breaks = {}
+        self.bookings = []
+        self.breaks = {}
+        self.exceptions = {}
+
+    def days(self):
+        """Return every date of the horizon."""
+        return [self.start_date + timedelta(days=offset) for offset in range((self.end_date - self.start_date).days + 1)]
+
+    def booking_minutes(self, booking):
+        """Return the length of a booking in minutes, its extra services included."""
+        return sum(SERVICES_BY_ID[service_id][1] for service_id in [booking["service_id"], *booking["extra"]])
+
+    def slot_engine_arguments(self):
+        """
+        Return the data of the shop in the shape fetch_barber_data_from_db() hands it to the slot engines.
+
+        Returns:
+        - dict: barber_schedules, barber_dates, existing_bookings, exceptions and breaks keyword arguments.
+        """
+        existing_bookings = {barber_id: [] for barber_id in self.barber_ids}
+        for booking in self.bookings:
+            existing_bookings[booking["barber_id"]].append(
+                (booking["appointment_time"].strftime('%Y-%m-%d %H:%M:%S'), self.booking_minutes(booking))
+            )
+
+        exceptions = {}
+        for barber_id, dated in self.exceptions.items():
+            for day, hours in dated.items():
+                exceptions.setdefault(day.strftime('%Y-%m-%d'), {})[barber_id] = (
+                    None if hours is None else (minute_label(hours[0]), minute_label(hours[1]))
+                )
+
+        return {
+            "barber_schedules": {
+                barber_id: compile_weekly_template(
+                    self.default_hours[barber_id],
+                    self.weekly_hours.get(barber_id),
+                    self.recurring_breaks.get(barber_id)
+                )
+                for barber_id in self.barber_ids
+            },
+            "barber_dates": {barber_id: (self.start_date, self.end_date) for barber_id in self.barber_ids},
+            "existing_bookings": existing_bookings,
+            "exceptions": exceptions,
+            "breaks": {
+                barber_id: {
+                    day.strftime('%Y-%m-%d'): [(start, end) for start, end, _ in intervals]
+                    for day, intervals in dated.items()
+                }
+                for barber_id, dated in self.breaks.items()
+            },
+        }
+
+
+def _working_hours(shop, barber_id, day):
+    if day in shop.exceptions.get(barber_id, {}):
+        return shop.exceptions[barber_id][day]
+    weekday = day.weekday()
+    weekly = shop.weekly_hours.get(barber_id, {})
+    if weekday in weekly:
+        return weekly[weekday]
+    if weekday == 6:
+        return None
+    start, end = shop.default_hours[barber_id]
+    return int(start[:2]) * 60 + int(start[3:]), int(end[:2]) * 60 + int(end[3:])
+
+
+def generate_shop(barber_count, days, seed=0, start_date=None):
+    """
+    Generate a shop of `barber_count` barbers bookable for `days` days.
+
+    A third of the barbers get a weekly schedule (Saturday short, Monday off) and a lunch break
+    on weekdays. Every working day is filled with bookings at BOOKING_DENSITY, a quarter of them
+    with extra services, around dated breaks and exceptions.
+
+    Parameters:
+    - barber_count (int): Number of barbers.
+    - days (int): Length of the horizon, starting at `start_date`.
+    - seed (int): Seed of the random generator.
+    - start_date (datetime.date, optional): First day of the horizon, defaults to today.
+
+    Returns:
+    - SyntheticShop: The generated shop.
+    """
+    rng = random.Random(seed)
+    start_date = start_date or date.today()
+    shop = SyntheticShop(list(range(1, barber_count + 1)), start_date, start_date + timedelta(days=days - 1))
+    main_service_ids = [service_id for service_id, *_ in SERVICES if service_id not in EXTRA_SERVICE_IDS]
+
+    for barber_id in shop.barber_ids:
+        opening = rng.choice((8, 9, 10))
+        shop.default_hours[barber_id] = (f"{opening:02d}:00", f"{opening + rng.choice((8, 9)):02d}:00")
+        if barber_id % 3 == 0:
+            shop.weekly_hours[barber_id] = {0: None, 5: (600, 960)}
+            shop.recurring_breaks[barber_id] = {weekday: [(720, 750)] for weekday in range(DAYS_PER_WEEK - 2)}
+
+    booking_id = 0
+    for barber_id in shop.barber_ids:
+        for day in shop.days():
+            roll = rng.random()
+            if roll < DAY_OFF_CHANCE:
+                shop.exceptions.setdefault(barber_id, {})[day] = None
+            elif roll < DAY_OFF_CHANCE + CUSTOM_HOURS_CHANCE:
+                shop.exceptions.setdefault(barber_id, {})[day] = (rng.choice((600, 660)), rng.choice((900, 960)))
+
+            hours = _working_hours(shop, barber_id, day)
+            if hours is None:
+                continue
+            opening, closing = hours
+
+            blocked = list(shop.recurring_breaks.get(barber_id, {}).get(day.weekday(), []))
+            if rng.random() < BREAK_CHANCE:
+                break_start = rng.randrange(opening, closing - 60, 15)
+                break_end = break_start + rng.choice((30, 45, 60))
+                shop.breaks.setdefault(barber_id, {}).setdefault(day, []).append((break_start, break_end, "Break"))
+                blocked.append((break_start, break_end))
+
+            minute = opening
+            while minute < closing:
+                if rng.random() >= BOOKING_DENSITY:
+                    minute += 15
+                    continue
+                service_id = rng.choice(main_service_ids)
+                extra = rng.sample(EXTRA_SERVICE_IDS, rng.choice((1, 2))) if rng.random() < 0.25 else []
+                end = minute + sum(SERVICES_BY_ID[extra_id][1] for extra_id in [service_id, *extra])
+                if end > closing or any(start < end and minute < stop for start, stop in blocked):
+                    minute += 15
+                    continue
+                booking_id += 1
+                shop.bookings.append({
+                    "booking_id": booking_id,
+                    "barber_id": barber_id,
+                    "service_id": service_id,
+                    "extra": extra,
+                    "customer_name": f"Customer {booking_id}",
+                    "appointment_time": datetime.combine(day, datetime.min.time()) + timedelta(minutes=minute),
+                    "email": f"customer{booking_id}@example.com",
+                    "phone": f"+358 40 {booking_id:07d}",
+                    "price": SERVICES_BY_ID[service_id][2] + sum(SERVICES_BY_ID[extra_id][2] for extra_id in extra),
+                })
+                minute = end + (-end % 15)
+
+    return shop
+
+
+def insert_shop(cursor, shop, category_name="Synthetic"):
+    """
+    Write a shop to the database, next to whatever it already holds.
+
+    Barbers and services get new IDs from their sequences. Every barber offers every service
+    of the shop, at the catalog price, and is bookable from shop.start_date to shop.end_date.
+
+    Parameters:
+    - cursor: A cursor of the connection to write with, committed by the caller.
+    - shop (SyntheticShop): The shop to write.
+    - category_name (str): The category the shop's services are added to.
+
+    Returns:
+    - tuple: (barber_ids, service_ids), dictionaries mapping the shop's IDs to the database's.
+    """
+    cursor.execute("INSERT INTO Categories (category_name) VALUES (%s) RETURNING category_id", (category_name,))
+    category_id = cursor.fetchone()[0]
+
+    service_ids = {}
+    for service_id, name, minutes, price in SERVICES:
+        cursor.execute(
+            "INSERT INTO Services (service_name, category_id, estimated_time, price) "
+            "VALUES (%s, %s, make_interval(mins => %s), %s) RETURNING service_id",
+            (name, category_id, minutes, price)
+        )
+        service_ids[service_id] = cursor.fetchone()[0]
+
+    barber_ids = {}
+    for barber_id in shop.barber_ids:
+        cursor.execute("INSERT INTO Barbers (name) VALUES (%s) RETURNING barber_id", (f"Barber {barber_id}",))
+        barber_ids[barber_id] = cursor.fetchone()[0]
+
+    offered = [
+        (barber_ids[barber_id], service_ids[service_id], price)
+        for barber_id in shop.barber_ids for service_id, _, _, price in SERVICES
+    ]
+    execute_values(cursor, "INSERT INTO BarberServices (barber_id, service_id) VALUES %s",
+                   [(barber_id, service_id) for barber_id, service_id, _ in offered], page_size=1000)
+    execute_values(cursor, "INSERT INTO BarberServicePrices (barber_id, service_id, price) VALUES %s",
+                   offered, page_size=1000)
+
+    execute_values(cursor, "INSERT INTO BarberSchedules (barber_id, start_time, end_time) VALUES %s", [
+        (barber_ids[barber_id], start, end) for barber_id, (start, end) in shop.default_hours.items()
+    ])
+    execute_values(cursor, "INSERT INTO BarberAvailability (barber_id, start_date, end_date) VALUES %s", [
+        (barber_ids[barber_id], shop.start_date, shop.end_date) for barber_id in shop.barber_ids
+    ])
+    weekly_rows = [
+        (barber_ids[barber_id], weekday,
+         None if hours is None else minute_label(hours[0]), None if hours is None else minute_label(hours[1]),
+         hours is None)
+        for barber_id, weekly in shop.weekly_hours.items() for weekday, hours in weekly.items()
+    ]
+    if weekly_rows:
+        execute_values(cursor, "INSERT INTO BarberWeeklySchedules (barber_id, weekday, start_time, end_time, is_off) VALUES %s",
+                       weekly_rows)
+    recurring_rows = [
+        (barber_ids[barber_id], weekday, minute_label(start), minute_label(end))
+        for barber_id, weekly in shop.recurring_breaks.items()
+        for weekday, intervals in weekly.items() for start, end in intervals
+    ]
+    if recurring_rows:
+        execute_values(cursor, "INSERT INTO BarberRecurringBreaks (barber_id, weekday, start_time, end_time) VALUES %s",
+                       recurring_rows)
+
+    exception_rows = [
+        (barber_ids[barber_id], day,
+         None if hours is None else minute_label(hours[0]), None if hours is None else minute_label(hours[1]),
+         hours is None)
+        for barber_id, dated in shop.exceptions.items() for day, hours in dated.items()
+    ]
+    if exception_rows:
+        execute_values(cursor, "INSERT INTO BarberExceptions (barber_id, exception_date, custom_start_time, custom_end_time, is_off) VALUES %s",
+                       exception_rows, page_size=1000)
+    break_rows = [
+        (barber_ids[barber_id], day, minute_label(start), minute_label(end), break_type)
+        for barber_id, dated in shop.breaks.items() for day, intervals in dated.items()
+        for start, end, break_type in intervals
+    ]
+    if break_rows:
+        execute_values(cursor, "INSERT INTO BarberBreaks (barber_id, break_date, break_time, break_end, type) VALUES %s",
+                       break_rows, page_size=1000)
+
+    if shop.bookings:
+        execute_values(cursor, """
+            INSERT INTO Bookings (barber_id, service_id, customer_name, appointment_time, email, phone, price, extra)
+            VALUES %s
+        """, [
+            (barber_ids[booking["barber_id"]], service_ids[booking["service_id"]], booking["customer_name"],
+             booking["appointment_time"], booking["email"], booking["phone"], booking["price"],
+             [service_ids[extra_id] for extra_id in booking["extra"]])
+            for booking in shop.bookings
+        ], template="(%s, %s, %s, %s, %s, %s, %s, %s::int[])", page_size=1000)
+
+    return barber_ids, service_ids
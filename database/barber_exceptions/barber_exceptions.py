@@ -2,7 +2,16 @@
 
 from datetime import datetime
 
+from psycopg2.extras import execute_values
+
+from database.barber_locks import lock_barber_calendar
+from database.calendar_conflicts import find_booking_conflicts, invalidation_day
 from database.database_conn import get_connection, release_connection
+from srvices.bookings.day_occupancy import MINUTES_PER_DAY, minute_of_day
+from srvices.cache.invalidation import EXCEPTIONS, apply_invalidation, notify_invalidation
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 def get_barber_exceptions(barber_id):
     """
@@ -47,7 +56,7 @@ def get_barber_exceptions(barber_id):
         return exceptions  # Return the list of formatted exceptions
 
     except Exception as e:
-        print(f"Error occurred while fetching barber exceptions: {e}")
+        logger.error("Error occurred while fetching barber exceptions: %s", e)
         return None
 
     finally:
@@ -83,19 +92,102 @@ def insert_barber_exception(barber_id, exception_date, custom_start_time=None, c
                           custom_end_time = EXCLUDED.custom_end_time,
                           is_off = EXCLUDED.is_off
         """, (barber_id, exception_date, custom_start_time, custom_end_time, is_off))
+        notify_invalidation(cur, EXCEPTIONS, barber_id, exception_date)
 
         # Commit the transaction to apply the changes
         conn.commit()
+        apply_invalidation(EXCEPTIONS, barber_id, exception_date)
 
         cur.close()
         return True  # Return True if the insert was successful
 
     except Exception as e:
-        print(f"Error occurred while inserting barber exception: {e}")
+        logger.error("Error occurred while inserting barber exception: %s", e)
         return False
 
     finally:
         release_connection(conn)
 
 
+def insert_barber_exceptions(barber_id, exception_dates, custom_start_time=None, custom_end_time=None, is_off=False, check_bookings=True):
+    """
+    Insert or update the same exception on many dates (e.g. a two-week vacation), in one statement.
+
+    With check_bookings, the bookings left outside the new hours on any of the dates are looked
+    up in one query first, and nothing is written if there are some.
+
+    Parameters:
+    - barber_id (int): The ID of the barber.
+    - exception_dates (list of date): The dates of the exception.
+    - custom_start_time (str or None): The custom start time on those dates (format: 'HH:MM:SS'). None if they are days off.
+    - custom_end_time (str or None): The custom end time on those dates (format: 'HH:MM:SS'). None if they are days off.
+    - is_off (bool): Whether the barber is off on those dates.
+    - check_bookings (bool): Refuse the exception if it leaves a booking outside working hours.
+
+    Returns:
+    - tuple: (success, conflicts). conflicts lists the affected bookings when the exception was
+      refused because of them, and is empty otherwise.
+    """
+    exception_dates = sorted(set(exception_dates))
+    if not exception_dates:
+        return True, []
+
+    # Minutes of each date the barber no longer works
+    if is_off:
+        blocked = [(0, MINUTES_PER_DAY)]
+    elif custom_start_time and custom_end_time:
+        blocked = [(0, minute_of_day(custom_start_time)), (minute_of_day(custom_end_time), MINUTES_PER_DAY)]
+    else:
+        blocked = []
+
+    conn = get_connection()
+    if not conn:
+        return False, []
+
+    try:
+        cur = conn.cursor()
+
+        # Don't interleave with a booking of the same barber that is checking for conflicts
+        lock_barber_calendar(cur, barber_id)
+
+        if check_bookings:
+            conflicts = find_booking_conflicts(cur, barber_id, [
+                (exception_date, start, end)
+                for exception_date in exception_dates
+                for start, end in blocked
+                if start < end
+            ])
+            if conflicts:
+                conn.rollback()
+                cur.close()
+                return False, conflicts
+
+        execute_values(cur, """
+            INSERT INTO BarberExceptions (barber_id, exception_date, custom_start_time, custom_end_time, is_off)
+            VALUES %s
+            ON CONFLICT (barber_id, exception_date)
+            DO UPDATE SET custom_start_time = EXCLUDED.custom_start_time,
+                          custom_end_time = EXCLUDED.custom_end_time,
+                          is_off = EXCLUDED.is_off
+        """, [
+            (barber_id, exception_date, custom_start_time, custom_end_time, is_off)
+            for exception_date in exception_dates
+        ], template="(%s, %s, %s::time, %s::time, %s)", page_size=len(exception_dates))
+
+        day = invalidation_day(exception_dates)
+        notify_invalidation(cur, EXCEPTIONS, barber_id, day)
+
+        # Commit the transaction to apply the changes
+        conn.commit()
+        apply_invalidation(EXCEPTIONS, barber_id, day)
+
+        cur.close()
+        return True, []
 
+    except Exception as e:
+        conn.rollback()
+        logger.error("Error occurred while inserting barber exceptions: %s", e)
+        return False, []
+
+    finally:
+        release_connection(conn)
@@ -0,0 +1,17 @@
+# First key of every advisory lock taken on a barber's calendar, the second one is the barber ID
+BARBER_CALENDAR_LOCK = 1
+
+
+def lock_barber_calendar(cursor, barber_id):
+    """
+    Serialize writes to one barber's calendar until the current transaction ends.
+
+    Takes a transaction-level advisory lock, released by the commit or rollback. A write that
+    checks for conflicts and then inserts holds it across both steps, so two concurrent
+    requests can't both pass the check.
+
+    Parameters:
+    - cursor: A cursor of the connection doing the write.
+    - barber_id (int): The barber whose calendar is written.
+    """
+    cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", (BARBER_CALENDAR_LOCK, int(barber_id)))
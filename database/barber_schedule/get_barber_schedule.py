@@ -1,6 +1,18 @@
 
 
 from database.database_conn import get_connection, release_connection
+from database.prepared_statements import execute_prepared, register_statement
+from srvices.cache.invalidation import SCHEDULES, apply_invalidation, notify_invalidation
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Working hours of one barber, read on every availability computation
+BARBER_SCHEDULE = register_statement(
+    "barber_schedule",
+    "SELECT start_time, end_time FROM BarberSchedules WHERE barber_id = $1",
+    ("integer",)
+)
 
 
 def get_barber_schedule(barber_id):
@@ -15,18 +27,14 @@ def get_barber_schedule(barber_id):
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return None
 
     try:
         cur = conn.cursor()
 
-        # SQL query to get the start and end times from BarberSchedules
-        cur.execute("""
-            SELECT start_time, end_time 
-            FROM BarberSchedules 
-            WHERE barber_id = %s
-        """, (barber_id,))
+        # Get the start and end times from BarberSchedules
+        execute_prepared(cur, BARBER_SCHEDULE, (barber_id,))
 
         # Fetch the result
         result = cur.fetchone()
@@ -38,7 +46,7 @@ def get_barber_schedule(barber_id):
             return None  # No schedule found for the barber
 
     except Exception as e:
-        print(f"Error occurred while fetching the barber schedule: {e}")
+        logger.error("Error occurred while fetching the barber schedule: %s", e)
         return None
 
     finally:
@@ -59,7 +67,7 @@ def update_barber_schedule(barber_id, start_time, end_time):
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return False
 
     try:
@@ -71,15 +79,19 @@ def update_barber_schedule(barber_id, start_time, end_time):
             SET start_time = %s, end_time = %s
             WHERE barber_id = %s
         """, (start_time, end_time, barber_id))
+        notify_invalidation(cur, SCHEDULES, barber_id)
 
         # Commit the transaction to apply the changes
         conn.commit()
 
+        # Working hours apply to every date of the barber
+        apply_invalidation(SCHEDULES, barber_id)
+
         cur.close()
         return True  # Return True if the update was successful
 
     except Exception as e:
-        print(f"Error occurred while updating the barber schedule: {e}")
+        logger.error("Error occurred while updating the barber schedule: %s", e)
         return False
 
     finally:
@@ -0,0 +1,231 @@
+from database.database_conn import get_connection, release_connection
+from database.prepared_statements import execute_prepared, register_statement
+from srvices.bookings.day_occupancy import minute_label
+from srvices.bookings.weekly_template import DEFAULT_DAYS_OFF, WEEKDAY_NAMES, compile_weekly_template
+from srvices.cache.invalidation import SCHEDULES, apply_invalidation, notify_invalidation
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Default hours, weekly hours and recurring breaks of one barber, times in minutes since midnight
+WEEKLY_TEMPLATE = register_statement(
+    "weekly_template",
+    """
+        SELECT 'default', NULL::smallint,
+            EXTRACT(EPOCH FROM start_time)::int / 60, EXTRACT(EPOCH FROM end_time)::int / 60, FALSE
+        FROM BarberSchedules
+        WHERE barber_id = $1
+        UNION ALL
+        SELECT 'weekday', weekday,
+            EXTRACT(EPOCH FROM start_time)::int / 60, EXTRACT(EPOCH FROM end_time)::int / 60, is_off
+        FROM BarberWeeklySchedules
+        WHERE barber_id = $1
+        UNION ALL
+        SELECT 'break', weekday,
+            EXTRACT(EPOCH FROM start_time)::int / 60, EXTRACT(EPOCH FROM end_time)::int / 60, FALSE
+        FROM BarberRecurringBreaks
+        WHERE barber_id = $1
+    """,
+    ("integer",)
+)
+
+
+def weekly_hours_from_rows(rows):
+    """
+    Turn BarberWeeklySchedules rows into the weekly_hours of compile_weekly_template().
+
+    Parameters:
+    - rows (iterable): (weekday, start, end, is_off) rows, start and end in minutes.
+
+    Returns:
+    - dict: Weekdays mapped to (start, end) hours, or None for a day off.
+    """
+    weekly_hours = {}
+    for weekday, start, end, is_off in rows:
+        weekly_hours[weekday] = None if is_off or start is None or end is None else (start, end)
+    return weekly_hours
+
+
+def recurring_breaks_from_rows(rows):
+    """
+    Turn BarberRecurringBreaks rows into the recurring_breaks of compile_weekly_template().
+
+    Parameters:
+    - rows (iterable): (weekday, start, end) rows, start and end in minutes.
+
+    Returns:
+    - dict: Weekdays mapped to lists of (start, end) breaks.
+    """
+    recurring_breaks = {}
+    for weekday, start, end in rows:
+        recurring_breaks.setdefault(weekday, []).append((start, end))
+    return recurring_breaks
+
+
+def load_weekly_template(cursor, barber_id):
+    """
+    Load and compile the weekly template of one barber.
+
+    Parameters:
+    - cursor: A database cursor.
+    - barber_id (int): The ID of the barber.
+
+    Returns:
+    - WeeklyTemplate or None: The template, None if the barber has no schedule at all.
+    """
+    execute_prepared(cursor, WEEKLY_TEMPLATE, (barber_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+
+    default_hours = next(
+        ((minute_label(start), minute_label(end)) for kind, _, start, end, _ in rows if kind == 'default'), None
+    )
+    weekly_hours = weekly_hours_from_rows(
+        (weekday, start, end, is_off) for kind, weekday, start, end, is_off in rows if kind == 'weekday'
+    )
+    recurring_breaks = recurring_breaks_from_rows(
+        (weekday, start, end) for kind, weekday, start, end, _ in rows if kind == 'break'
+    )
+    return compile_weekly_template(default_hours, weekly_hours, recurring_breaks)
+
+
+def get_weekly_schedule(barber_id):
+    """
+    Fetch the working hours of every day of the week and the recurring breaks of a barber.
+
+    Parameters:
+    - barber_id (int): The ID of the barber.
+
+    Returns:
+    - dict: "days", one entry per weekday from Monday, and "recurring_breaks", or None on error.
+    """
+    conn = get_connection()
+    if not conn:
+        logger.error("Failed to connect to the database")
+        return None
+
+    try:
+        cur = conn.cursor()
+        execute_prepared(cur, WEEKLY_TEMPLATE, (barber_id,))
+        rows = cur.fetchall()
+        cur.close()
+
+        default_hours = next(((start, end) for kind, _, start, end, _ in rows if kind == 'default'), None)
+        weekly_rows = {weekday: (start, end, is_off) for kind, weekday, start, end, is_off in rows if kind == 'weekday'}
+
+        days = []
+        for weekday, name in enumerate(WEEKDAY_NAMES):
+            if weekday in weekly_rows:
+                start, end, is_off = weekly_rows[weekday]
+                source = "weekly"
+            else:
+                start, end = default_hours or (None, None)
+                is_off = weekday in DEFAULT_DAYS_OFF or default_hours is None
+                source = "default"
+            is_off = bool(is_off or start is None or end is None)
+            days.append({
+                "weekday": weekday,
+                "name": name,
+                "start_time": None if is_off else minute_label(start),
+                "end_time": None if is_off else minute_label(end),
+                "is_off": is_off,
+                "source": source
+            })
+
+        recurring_breaks = sorted(
+            (weekday, start, end) for kind, weekday, start, end, _ in rows if kind == 'break'
+        )
+        return {
+            "days": days,
+            "recurring_breaks": [
+                {"weekday": weekday, "name": WEEKDAY_NAMES[weekday], "start_time": minute_label(start), "end_time": minute_label(end)}
+                for weekday, start, end in recurring_breaks
+            ]
+        }
+
+    except Exception as e:
+        logger.error("Error occurred while fetching the weekly schedule: %s", e)
+        return None
+
+    finally:
+        release_connection(conn)
+
+
+def update_weekly_schedule(barber_id, days=None, recurring_breaks=None):
+    """
+    Update the weekly schedule and/or replace the recurring breaks of a barber, in one transaction.
+
+    Parameters:
+    - barber_id (int): The ID of the barber.
+    - days (dict, optional): Weekdays mapped to (start, end) hours in minutes, None for a day off,
+      or "default" to go back to the BarberSchedules hours. Weekdays left out are not changed.
+    - recurring_breaks (list, optional): (weekday, start, end) breaks in minutes that replace all the
+      barber's recurring breaks. None leaves them as they are, an empty list removes them.
+
+    Returns:
+    - bool: True if the update was successful, False otherwise.
+    """
+    conn = get_connection()
+    if not conn:
+        logger.error("Failed to connect to the database")
+        return False
+
+    try:
+        cur = conn.cursor()
+
+        if days:
+            defaults = [weekday for weekday, hours in days.items() if hours == "default"]
+            rows = [
+                (barber_id, weekday,
+                 None if hours is None else minute_label(hours[0]),
+                 None if hours is None else minute_label(hours[1]),
+                 hours is None)
+                for weekday, hours in sorted(days.items()) if hours != "default"
+            ]
+            if defaults:
+                cur.execute(
+                    "DELETE FROM BarberWeeklySchedules WHERE barber_id = %s AND weekday = ANY(%s::smallint[])",
+                    (barber_id, defaults)
+                )
+            if rows:
+                cur.executemany("""
+                    INSERT INTO BarberWeeklySchedules (barber_id, weekday, start_time, end_time, is_off)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (barber_id, weekday)
+                    DO UPDATE SET start_time = EXCLUDED.start_time,
+                                  end_time = EXCLUDED.end_time,
+                                  is_off = EXCLUDED.is_off
+                """, rows)
+
+        if recurring_breaks is not None:
+            cur.execute("DELETE FROM BarberRecurringBreaks WHERE barber_id = %s", (barber_id,))
+            cur.execute("""
+                INSERT INTO BarberRecurringBreaks (barber_id, weekday, start_time, end_time)
+                SELECT %s, weekday, start_time, end_time
+                FROM UNNEST(%s::smallint[], %s::time[], %s::time[]) AS recurring(weekday, start_time, end_time)
+            """, (
+                barber_id,
+                [weekday for weekday, _, _ in recurring_breaks],
+                [minute_label(start) for _, start, _ in recurring_breaks],
+                [minute_label(end) for _, _, end in recurring_breaks]
+            ))
+
+        notify_invalidation(cur, SCHEDULES, barber_id)
+
+        # Commit the transaction to apply the changes
+        conn.commit()
+
+        # The template applies to every date of the barber
+        apply_invalidation(SCHEDULES, barber_id)
+
+        cur.close()
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        logger.error("Error occurred while updating the weekly schedule: %s", e)
+        return False
+
+    finally:
+        release_connection(conn)
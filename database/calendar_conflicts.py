@@ -0,0 +1,70 @@
+from srvices.bookings.day_occupancy import MINUTES_PER_DAY
+
+# Bookings of one barber that overlap any of the given [start, end) intervals, checked in one
+# query for every interval and day, with the full duration of each booking and its extras
+BOOKINGS_OVERLAPPING_INTERVALS = """
+    WITH blocked AS (
+        SELECT
+            day + make_interval(mins => start_minute) AS starts_at,
+            day + make_interval(mins => end_minute) AS ends_at
+        FROM UNNEST(%s::date[], %s::int[], %s::int[]) AS blocked(day, start_minute, end_minute)
+    )
+    SELECT DISTINCT b.booking_id, b.appointment_time
+    FROM blocked k
+    JOIN Bookings b
+        ON b.barber_id = %s
+        AND b.appointment_time >= k.starts_at - INTERVAL '1 day'
+        AND b.appointment_time < k.ends_at
+    JOIN Services s ON s.service_id = b.service_id
+    WHERE b.appointment_time + s.estimated_time + COALESCE((
+        SELECT SUM(es.estimated_time)
+        FROM UNNEST(b.extra) AS extra_service_id
+        JOIN Services es ON es.service_id = extra_service_id
+    ), INTERVAL '0') > k.starts_at
+    ORDER BY b.appointment_time, b.booking_id
+"""
+
+
+def find_booking_conflicts(cursor, barber_id, intervals):
+    """
+    Find the bookings of a barber that overlap any of the given intervals.
+
+    Run it after lock_barber_calendar() in the transaction doing the write, so no booking can
+    be added between the check and the commit.
+
+    Parameters:
+    - cursor: A cursor of the connection doing the write.
+    - barber_id (int): The ID of the barber.
+    - intervals (list): (date, start, end) tuples, start and end in minutes since midnight, end up to 1440.
+
+    Returns:
+    - list: Dictionaries with the booking_id and appointment_time ('YYYY-MM-DD HH:MM') of every
+      overlapping booking, in chronological order. Empty if there are none.
+    """
+    if not intervals:
+        return []
+
+    cursor.execute(BOOKINGS_OVERLAPPING_INTERVALS, (
+        [day for day, _, _ in intervals],
+        [start for _, start, _ in intervals],
+        [min(end, MINUTES_PER_DAY) for _, _, end in intervals],
+        barber_id
+    ))
+    return [
+        {"booking_id": booking_id, "appointment_time": appointment_time.strftime("%Y-%m-%d %H:%M")}
+        for booking_id, appointment_time in cursor.fetchall()
+    ]
+
+
+def invalidation_day(days):
+    """
+    Pick the date to publish with a cache invalidation for a write touching `days`.
+
+    Parameters:
+    - days (iterable of datetime.date): The dates written.
+
+    Returns:
+    - datetime.date or None: The date if there is only one, None (every date of the barber) otherwise.
+    """
+    days = set(days)
+    return next(iter(days)) if len(days) == 1 else None
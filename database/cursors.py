@@ -0,0 +1,66 @@
+import time
+
+from psycopg2 import extensions
+
+from database.query_trace import count_params, query_trace
+from srvices.observability.metrics import record_query
+
+
+class InstrumentedCursor(extensions.cursor):
+    """
+    The cursor of every pooled connection: counts its statements and their time in the metrics
+    of the request being served.
+
+    Installed as the connections' cursor_factory, so the database functions keep calling
+    conn.cursor() and execute_values() as usual.
+    """
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(time.perf_counter() - started)
+
+
+class TracedCursor(InstrumentedCursor):
+    """
+    The cursor of every pooled connection when DB_TRACE is on: besides the metrics, each
+    statement goes to the query trace with its shape, parameter count, rows, time and the
+    database function that ran it. Slow statements are logged.
+    """
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            result = extensions.cursor.execute(self, query, vars)
+            succeeded = True
+            return result
+        finally:
+            seconds = time.perf_counter() - started
+            record_query(seconds)
+            query_trace.record(self, query, vars, count_params(vars), seconds, succeeded)
+
+    def executemany(self, query, vars_list):
+        # Listed once, to count the parameters of every row
+        vars_list = list(vars_list)
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            result = extensions.cursor.executemany(self, query, vars_list)
+            succeeded = True
+            return result
+        finally:
+            seconds = time.perf_counter() - started
+            record_query(seconds)
+            params = sum(count_params(vars) for vars in vars_list)
+            # The plan of one row's statement says little about the batch, don't explain it
+            query_trace.record(self, query, None, params, seconds, succeeded, explainable=False)
@@ -1,7 +1,17 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 import psycopg2
-from psycopg2 import pool
+from psycopg2 import extensions, pool
 from dotenv import load_dotenv
 import os
+import threading
+import time
+from database.cursors import InstrumentedCursor, TracedCursor
+from database.query_trace import DB_TRACE
+from srvices.observability.logger import get_logger
+from srvices.observability.metrics import record_pool_wait, record_query
+
+logger = get_logger(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,50 +23,462 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
+# Pool size and how long a request waits for a free connection before giving up
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+# Idle connections older than this are pinged before being handed out
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))
+
+# Seconds clients are asked to wait before retrying when the pool is exhausted
+DB_POOL_RETRY_AFTER = int(os.getenv("DB_POOL_RETRY_AFTER", "2"))
+
+
+class PoolExhaustedError(pool.PoolError):
+    """Raised when no connection became free within the pool timeout."""
+
+
+class BoundedConnectionPool:
+    """
+    Thread-safe connection pool with a bounded wait for a free connection.
+
+    Up to `maxconn` connections are open at once. When all of them are in use, getconn()
+    waits up to `timeout` seconds for one to be released and then raises PoolExhaustedError.
+    Idle connections are checked before checkout, and broken ones are closed and replaced.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=DB_POOL_TIMEOUT, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._connect_kwargs = connect_kwargs
+        self._idle = []  # (connection, released_at), most recently used last
+        self._in_use = {}
+        self._pending = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.recycled = 0
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        return psycopg2.connect(**self._connect_kwargs)
+
+    def _is_healthy(self, conn, released_at):
+        if conn.closed:
+            return False
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - released_at < DB_POOL_PING_AFTER:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._condition:
+            self.recycled += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self, timeout=None):
+        """
+        Check out a healthy connection.
+
+        Parameters:
+        - timeout (float, optional): Seconds to wait for a free connection, defaults to the pool timeout.
+
+        Returns:
+        - connection: An open connection with no transaction in progress.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise pool.PoolError("connection pool is closed")
+                if self._idle or len(self._in_use) + self._pending < self.maxconn:
+                    break
+
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolExhaustedError(f"no connection became free within {timeout} seconds")
+                waited = True
+                self._condition.wait(remaining)
+
+            # Reserve the slot, the health check and connect run outside the lock
+            self._pending += 1
+            candidate = self._idle.pop() if self._idle else None
+
+        try:
+            if candidate is not None and not self._is_healthy(*candidate):
+                self._discard(candidate[0])
+                candidate = None
+            conn = candidate[0] if candidate is not None else self._connect()
+        except Exception:
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._pending -= 1
+            self._checked_out(conn, started, waited)
+        return conn
+
+    def _checked_out(self, conn, started, waited):
+        self._in_use[id(conn)] = conn
+        self.checkouts += 1
+        if waited:
+            wait_seconds = time.monotonic() - started
+            self.waits += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def putconn(self, conn, close=False):
+        """
+        Return a connection to the pool, rolling back any open transaction.
+
+        Parameters:
+        - conn: A connection obtained from getconn().
+        - close (bool): Close the connection instead of keeping it.
+        """
+        with self._condition:
+            if self._in_use.pop(id(conn), None) is None:
+                # Released twice, or not ours
+                return
+
+            if not close and not conn.closed:
+                try:
+                    if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except psycopg2.Error:
+                    close = True
+
+            if close or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def closeall(self):
+        """Close every connection and refuse further checkouts."""
+        with self._condition:
+            self._closed = True
+            for conn, _ in self._idle:
+                conn.close()
+            for conn in self._in_use.values():
+                conn.close()
+            self._idle.clear()
+            self._in_use.clear()
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Return the pool metrics.
+
+        Returns:
+        - dict: in_use, idle, wait and timeout counters, and the configured limits.
+        """
+        with self._condition:
+            return {
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "min": self.minconn,
+                "max": self.maxconn,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+            }
+
+
 # Initialize connection_pool globally
 connection_pool = None
+_pool_lock = threading.Lock()
 
-def initialize_connection_pool(minconn=1, maxconn=10):
+def initialize_connection_pool(minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX):
     """Initialize the connection pool."""
     global connection_pool
     try:
-        if connection_pool is None:
-            connection_pool = psycopg2.pool.SimpleConnectionPool(
-                minconn, maxconn,  
-                user=DB_USER,
-                password=DB_PASSWORD,
-                host=DB_HOST,
-                port=DB_PORT,
-                database=DB_NAME
-            )
-            if connection_pool:
-                print("Connection pool created successfully")
+        with _pool_lock:
+            if connection_pool is None:
+                connection_pool = BoundedConnectionPool(
+                    minconn, maxconn,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    database=DB_NAME,
+                    # Every statement is counted and timed in the request metrics, and traced
+                    # when DB_TRACE is on. Off, the cursors pay for nothing else
+                    cursor_factory=TracedCursor if DB_TRACE else InstrumentedCursor
+                )
+                logger.info("Connection pool created successfully")
     except Exception as e:
-        print(f"Error occurred during pool initialization: {e}")
+        logger.error("Error occurred during pool initialization: %s", e)
 
-def get_connection():
-    """Get a connection from the pool."""
+def _flag_pool_exhausted():
+    # Imported here so the database layer works outside of Flask too
+    from flask import g, has_request_context
+    if has_request_context():
+        g.db_pool_exhausted = True
+
+def _checkout():
+    started = time.perf_counter()
     try:
         if connection_pool is None:
             initialize_connection_pool()  # Initialize if not already done
         return connection_pool.getconn()
+    except PoolExhaustedError as e:
+        logger.warning("Connection pool exhausted: %s", e)
+        _flag_pool_exhausted()
+        return None
     except Exception as e:
-        print(f"Error occurred while getting connection: {e}")
+        logger.error("Error occurred while getting connection: %s", e)
         return None
+    finally:
+        # Waiting for a free connection, or opening one, counts as pool time in the request metrics
+        record_pool_wait(time.perf_counter() - started)
+
+
+class UnitOfWork:
+    """
+    One connection and one transaction shared by every database function of a request.
+
+    The connection is checked out on the first get_connection() and handed out wrapped in a
+    UnitConnection, so the functions' own commit(), close() and release_connection() calls
+    don't end the transaction. The unit commits once at the end, or rolls back if anything
+    failed, and then releases the connection.
+    """
+
+    def __init__(self):
+        self.conn = None
+        self.failed = False
+        self.unavailable = False
+        self._after_commit = []
+
+    def connection(self):
+        """Return the unit's connection, checking one out on first use. None if none is available."""
+        if self.conn is None and not self.unavailable:
+            self.conn = _checkout()
+            # Don't wait for the pool again in every later call of the same request
+            self.unavailable = self.conn is None
+        return UnitConnection(self) if self.conn is not None else None
+
+    def after_commit(self, callback):
+        """Run `callback` once the unit's transaction is committed (e.g. local cache invalidation)."""
+        self._after_commit.append(callback)
+
+    def commit(self):
+        """Commit the transaction, or roll it back if a function of the unit failed."""
+        if self.conn is None:
+            return
+        if self.failed:
+            self.conn.rollback()
+            return
+        # The COMMIT goes through the connection, count it with the statements of the unit
+        started = time.perf_counter()
+        self.conn.commit()
+        record_query(time.perf_counter() - started)
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error("Error occurred in an after-commit callback: %s", e)
+
+    def rollback(self):
+        """Roll back the transaction and drop the after-commit callbacks."""
+        self.failed = True
+        self._after_commit = []
+        if self.conn is not None and not self.conn.closed:
+            self.conn.rollback()
+
+    def release(self):
+        """Return the connection to the pool, rolling back anything left uncommitted."""
+        if self.conn is not None:
+            release_connection(self.conn)
+            self.conn = None
+
+
+class UnitConnection:
+    """
+    The unit's connection as seen by the database functions.
+
+    commit() is deferred to the end of the unit, rollback() marks the whole unit as failed,
+    close() does nothing. Everything else goes to the real connection.
+    """
+
+    __slots__ = ("_unit",)
+
+    def __init__(self, unit):
+        self._unit = unit
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._unit.rollback()
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._unit.conn, name)
+
+
+_current_unit = ContextVar("db_unit_of_work", default=None)
+
+
+def current_unit_of_work():
+    """Return the unit of work active in this request or block, or None."""
+    return _current_unit.get()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Run a block as one unit of work: commit when it succeeds, roll back when it raises.
+
+    Usage:
+        with unit_of_work():
+            insert_booking(...)
+            insert_barber_break_slot(...)
+    """
+    unit = UnitOfWork()
+    token = _current_unit.set(unit)
+    try:
+        yield unit
+        unit.commit()
+    except Exception:
+        unit.rollback()
+        raise
+    finally:
+        unit.release()
+        _current_unit.reset(token)
+
+
+def init_unit_of_work(app):
+    """
+    Give every request of `app` its own unit of work.
+
+    It is committed in after_request, so a failed commit still turns into a 500 response, and
+    released in teardown_request, which also runs when the view raised. A unit rolled back by a
+    failed statement (e.g. one a database function caught and logged) is never reported as a
+    success: a 2xx or 3xx response becomes a 500.
+    """
+    from flask import g, jsonify
+
+    @app.before_request
+    def begin_unit_of_work():
+        g.db_unit_of_work = UnitOfWork()
+        _current_unit.set(g.db_unit_of_work)
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        unit = g.get("db_unit_of_work")
+        if unit is None:
+            return response
+        try:
+            if response.status_code >= 500:
+                unit.rollback()
+            elif unit.failed and response.status_code < 400:
+                # A function of the request failed and rolled the transaction back, taking the earlier
+                # writes with it, and the later ones aren't committed. The handler may not know,
+                # don't answer success for changes that were dropped
+                logger.error("Request transaction was rolled back by a failed statement, answering 500")
+                unit.rollback()
+                response = jsonify({"error": "An error occurred while saving the changes."})
+                response.status_code = 500
+            else:
+                unit.commit()
+        except Exception as e:
+            logger.error("Error occurred while committing the request transaction: %s", e)
+            unit.rollback()
+            response = jsonify({"error": "An error occurred while saving the changes."})
+            response.status_code = 500
+        return response
+
+    @app.teardown_request
+    def release_unit_of_work(exc):
+        unit = g.pop("db_unit_of_work", None)
+        if unit is not None:
+            if exc is not None:
+                unit.rollback()
+            unit.release()
+        _current_unit.set(None)
+
+
+def get_connection():
+    """
+    Get a connection from the pool.
+
+    Inside a unit of work (every Flask request, or a `with unit_of_work():` block) all calls
+    share the unit's connection and transaction.
+
+    Returns None if no connection could be obtained. When the pool was exhausted the current
+    request is flagged, and the app answers 503 with Retry-After instead of the handler's error.
+    """
+    unit = _current_unit.get()
+    if unit is not None:
+        return unit.connection()
+    return _checkout()
 
 def release_connection(conn):
-    """Release a connection back to the pool."""
+    """Release a connection back to the pool. Connections of a unit of work are released with the unit."""
+    if isinstance(conn, UnitConnection):
+        # A failed statement aborts the shared transaction, roll it back so the rest of the request can still read
+        if not conn.closed and conn.info.transaction_status == extensions.TRANSACTION_STATUS_INERROR:
+            conn.rollback()
+        return
     try:
         if connection_pool and conn:
             connection_pool.putconn(conn)
     except Exception as e:
-        print(f"Error occurred while releasing connection: {e}")
+        logger.error("Error occurred while releasing connection: %s", e)
+
+def get_pool_stats():
+    """Return the connection pool metrics, or None if the pool is not initialized."""
+    if connection_pool is None:
+        return None
+    return connection_pool.stats()
+
+def reset_connection_pool():
+    """
+    Forget the pool inherited from the parent process, e.g. right after a fork.
+
+    Its connections are not closed: the sockets are shared with the parent, and closing them
+    here would end the parent's sessions too. The next get_connection() creates a new pool.
+    """
+    global connection_pool, _pool_lock
+    connection_pool = None
+    _pool_lock = threading.Lock()
 
 def close_connection_pool():
     """Close the connection pool."""
     try:
         if connection_pool:
             connection_pool.closeall()
-            print("Connection pool closed")
+            logger.info("Connection pool closed")
     except Exception as e:
-        print(f"Error occurred while closing connection pool: {e}")
+        logger.error("Error occurred while closing connection pool: %s", e)
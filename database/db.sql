@@ -1,5 +1,6 @@
 
-# SQL to create tables if they don't exist
+-- SQL to create the tables of an empty database, with sample data
+-- psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f database/db.sql
 -- Barbers table
 CREATE TABLE Barbers (
     barber_id SERIAL PRIMARY KEY,
@@ -17,9 +18,10 @@ CREATE TABLE Services (
     service_id SERIAL PRIMARY KEY,
     service_name VARCHAR(100) NOT NULL,
     category_id INT REFERENCES Categories(category_id),
+    description TEXT,
+    estimated_time INTERVAL NOT NULL DEFAULT '00:30:00',
+    price NUMERIC,
     exclusive_to INT REFERENCES Barbers(barber_id)  -- Optional, for exclusive services
-    estimated_time INT NOT NULL;
-
 );
 
 -- BarberServices table (many-to-many relationship)
@@ -29,13 +31,26 @@ CREATE TABLE BarberServices (
     PRIMARY KEY (barber_id, service_id)
 );
 
+-- BarberServicePrices table (price of each service for each barber)
+CREATE TABLE BarberServicePrices (
+    barber_id INT REFERENCES Barbers(barber_id),
+    service_id INT REFERENCES Services(service_id),
+    price NUMERIC,
+    PRIMARY KEY (barber_id, service_id)
+);
+
 -- Bookings table
 CREATE TABLE Bookings (
     booking_id SERIAL PRIMARY KEY,
     barber_id INT REFERENCES Barbers(barber_id),
     service_id INT REFERENCES Services(service_id),
     customer_name VARCHAR(100),
-    appointment_time TIMESTAMP NOT NULL
+    appointment_time TIMESTAMP NOT NULL,
+    email VARCHAR(100),
+    phone VARCHAR(50),
+    price NUMERIC,
+    extra_charge NUMERIC,
+    extra INT[]  -- service_ids of the extra services
 );
 
 
@@ -64,12 +79,39 @@ CREATE TABLE BarberExceptions (
     is_off BOOLEAN DEFAULT FALSE,
     PRIMARY KEY (barber_id, exception_date)
 );
+
+-- BarberWeeklySchedules table (working hours per day of the week, 0 is Monday, override BarberSchedules)
+CREATE TABLE BarberWeeklySchedules (
+    barber_id INT REFERENCES Barbers(barber_id),
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+    start_time TIME,
+    end_time TIME,
+    is_off BOOLEAN DEFAULT FALSE,
+    PRIMARY KEY (barber_id, weekday)
+);
+
+-- BarberRecurringBreaks table (breaks repeated every week on a day of the week, e.g. lunch)
+CREATE TABLE BarberRecurringBreaks (
+    recurring_break_id SERIAL PRIMARY KEY,
+    barber_id INT REFERENCES Barbers(barber_id),
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL
+);
+CREATE INDEX barberrecurringbreaks_barber_idx ON BarberRecurringBreaks (barber_id);
+
+-- BarberBreaks table (breaks and blocked time on a date, [break_time, break_end), break_end up to 24:00)
 CREATE TABLE BarberBreaks (
     break_id SERIAL PRIMARY KEY,
     barber_id INT REFERENCES Barbers(barber_id),
-    break_time TIMESTAMP,
-    break_date DATE
+    break_date DATE,
+    break_time TIME,
+    type VARCHAR(50),
+    booking_id INT,
+    break_end TIME,
+    CONSTRAINT barberbreaks_break_end_set CHECK (break_time IS NULL OR break_end IS NOT NULL)
 );
+CREATE INDEX barberbreaks_barber_date_idx ON BarberBreaks (barber_id, break_date);
 
 CREATE TABLE barber_login (
     login_id SERIAL PRIMARY KEY,
@@ -128,134 +170,6 @@ INSERT INTO BarberServices (barber_id, service_id) VALUES
 (1, 14), (2, 14);  -- Parran siistiminen/koneajo
 
 
-
-"""
-            """
-            cursor.execute(create_bookings_table)
-
-            # Insert barbers
-            insert_barbers = """
-            INSERT INTO Barbers (name) VALUES 
-            ('Karar'), ('Ahmed'), ('Ali'), ('Omar'), ('Zaid')
-            ON CONFLICT DO NOTHING;  -- Avoid inserting duplicates
-            """
-            cursor.execute(insert_barbers)
-
-            # Insert categories
-            insert_categories = """
-            INSERT INTO Categories (category_name) VALUES 
-            ('Leikkaukset'), ('Värjäykset'), ('Parta')
-            ON CONFLICT DO NOTHING;
-            """
-            cursor.execute(insert_categories)
-
-            # Insert services
-            insert_services = """
-            INSERT INTO Services (service_name, category_id) VALUES
-            ('Skin Fade (full haircut)', 1), 
-            ('Parturileikkaus', 1), 
-            ('Mallinmuutosleikkaus', 1), 
-            ('100€ Service 🤯🔥', 1), 
-            ('Koneajo', 1), 
-            ('Line up', 1), 
-            ('Lasten hiustenleikkaus', 1), 
-            ('Hiukset+parta', 1), 
-            ('Koko paketti', 1);
-            
-            INSERT INTO Services (service_name, category_id, exclusive_to) VALUES
-            ('Värjäykset (Hair color)', 2, 1);
-            
-            INSERT INTO Services (service_name, category_id) VALUES
-            ('Parran muotoilu', 3),
-            ('Amerikkalainen parranajo', 3),
-            ('Viiksien muotoilu', 3),
-            ('Parran siistiminen/koneajo', 3);
-            """
-            cursor.execute(insert_services)
-
-            # Insert barber services
-            insert_barber_services = """
-            INSERT INTO BarberServices (barber_id, service_id) VALUES
-            (1, 1), (2, 1), (3, 1), (4, 1), (5, 1),  
-            (1, 2), (2, 2), (3, 2), (4, 2), (5, 2),  
-            (1, 3), (2, 3), (3, 3), (4, 3), (5, 3),  
-            (1, 4), 
-            (1, 5), (2, 5), (3, 5), (4, 5), (5, 5),  
-            (1, 6), (2, 6), (3, 6), (4, 6), (5, 6),  
-            (1, 7), (2, 7), (3, 7), (4, 7), (5, 7),  
-            (1, 8), (2, 8),  
-            (1, 9), (2, 9);  
-            
-            INSERT INTO BarberServices (barber_id, service_id) VALUES
-            (1, 10);
-
-            INSERT INTO BarberServices (barber_id, service_id) VALUES
-            (1, 11), (2, 11),
-            (1, 12), (2, 12), 
-            (1, 13), (2, 13), 
-            (1, 14), (2, 14);
-            """
-            cursor.execute(insert_barber_services)
-
-            # Commit the transaction
-            conn.commit()
-
-            # Close the cursor and release the connection
-            cursor.close()
-            release_connection(conn)
-
-            print("All tables created and data inserted successfully.")
-
-        except Exception as e:
-            # Rollback in case of an error
-            conn.rollback()
-            release_connection(conn)
-            print(f"Error occurred while inserting data: {e}")
-
-    else:
-        print("Failed to connect to the database")
-
-
-
-# Example usage
-barber_schedules = {
-    1: ('09:00', '16:00'),  
-    2: ('09:00', '16:00'),  
-    3: ('11:00', '13:00'),  
-    4: ('09:00', '13:00'),  
-    5: ('10:00', '15:00'),  
-}
-
-barber_dates = {
-    1: (datetime(2024, 9, 13), datetime(2024, 9, 13)),
-    2: (datetime(2024, 9, 13), datetime(2024, 9, 13)),
-    3: (datetime(2024, 9, 15), datetime(2024, 9, 15)),
-    4: (datetime(2024, 9, 16), datetime(2024, 9, 18)),
-    5: (datetime(2024, 9, 17), datetime(2024, 9, 17)),
-}
-
-existing_bookings = {
-    1: [('2024-09-13 11:15:00', 45), ('2024-09-13 12:15:00', 60),('2024-09-13 14:15:00', 60),('2024-09-13 13:15:00', 45)],  
-    2: [('2024-09-13 1:15:00', 45),('2024-09-13 12:15:00', 60),('2024-09-13 14:15:00', 60),('2024-09-13 13:15:00', 45)],  
-    3: [('2024-09-15 11:30:00', 30)],  
-}
-
-exceptions = {
-    '2024-09-15': {
-        1: None,  
-        2: ('12:00', '16:00')  
-    },
-    '2024-09-17': {
-        2: ('13:00', '17:00')  
-    }
-}
-
-# Generate the time slots for a specific barber (or list of barbers)
-service_duration = 45
-
-
-
-
 -- Insert prices for each barber and service
 INSERT INTO BarberServicePrices (barber_id, service_id, price) VALUES
 -- Skin Fade (full haircut) for all barbers
@@ -1,29 +1,41 @@
 
 from database.database_conn import get_connection, release_connection
+from srvices.cache.invalidation import BREAKS, apply_invalidation, notify_invalidation
+from srvices.observability.logger import get_logger
 
+logger = get_logger(__name__)
 
-def delete_barber_break(break_id):
+
+def delete_barber_break(break_id, barber_id):
     """
-    Delete a break slot from the BarberBreaks table based on break_id.
+    Delete a break slot from the BarberBreaks table based on break_id, if it is one of barber_id's.
 
     Parameters:
     - break_id (int): The ID of the break to delete.
+    - barber_id (int): The barber the break must belong to.
 
     Returns:
-    - bool: True if the deletion is successful, False otherwise.
+    - bool or None: True if the deletion is successful, None if the barber has no such break,
+      False otherwise.
     """
     conn = get_connection()
     try:
         cursor = conn.cursor()
         query = """
-            DELETE FROM BarberBreaks WHERE break_id = %s
+            DELETE FROM BarberBreaks WHERE break_id = %s AND barber_id = %s
+            RETURNING barber_id, break_date
         """
-        cursor.execute(query, (break_id,))
+        cursor.execute(query, (break_id, barber_id))
+        deleted = cursor.fetchone()
+        if deleted:
+            notify_invalidation(cursor, BREAKS, deleted[0], deleted[1])
         conn.commit()
+        if deleted:
+            apply_invalidation(BREAKS, deleted[0], deleted[1])
         cursor.close()
         release_connection(conn)
-        return True  # Indicate success
+        return True if deleted else None
     except Exception as e:
         release_connection(conn)
-        print(f"Error deleting barber break: {e}")
+        logger.error("Error deleting barber break: %s", e)
         return False  # Indicate failure
@@ -1,6 +1,10 @@
 from datetime import timedelta
 
 from database.database_conn import get_connection, release_connection
+from srvices.bookings.day_occupancy import duration_in_minutes
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 def get_appointments_and_breaks(barber_id, selected_date):
     """
@@ -17,7 +21,7 @@ def get_appointments_and_breaks(barber_id, selected_date):
     """
     conn = get_connection()  # Assuming you have a function to get the database connection
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return []
 
     try:
@@ -31,6 +35,7 @@ def get_appointments_and_breaks(barber_id, selected_date):
                 b.extra,
                 bb.break_date, 
                 bb.break_time,
+                to_char(COALESCE(bb.break_end - TIME '00:00', LEAST(bb.break_time - TIME '00:00' + INTERVAL '15 minutes', INTERVAL '24 hours')), 'HH24:MI:SS') AS break_end,
                 bb.type AS break_type,
                 bs.start_time, 
                 bs.end_time,
@@ -38,7 +43,12 @@ def get_appointments_and_breaks(barber_id, selected_date):
                 be.custom_start_time, 
                 be.custom_end_time, 
                 be.is_off,
-                s.estimated_time AS primary_estimated_time
+                s.estimated_time AS primary_estimated_time,
+                (
+                    SELECT SUM(es.estimated_time)
+                    FROM Services es
+                    WHERE es.service_id = ANY(b.extra)
+                ) AS extra_estimated_time
             FROM 
                 bookings b
             LEFT JOIN 
@@ -59,11 +69,7 @@ def get_appointments_and_breaks(barber_id, selected_date):
 
         # Loop through the query result
         for row in results:
-            appointment_time, service_id, extra, break_date, break_time, break_type, start_time, end_time, exception_date, custom_start_time, custom_end_time, is_off, primary_estimated_time = row
-
-            # Ensure primary_estimated_time is an integer representing minutes
-            if isinstance(primary_estimated_time, timedelta):
-                primary_estimated_time = int(primary_estimated_time.total_seconds() // 60)
+            appointment_time, service_id, extra, break_date, break_time, break_end, break_type, start_time, end_time, exception_date, custom_start_time, custom_end_time, is_off, primary_estimated_time, extra_estimated_time = row
 
             # Format the final start and end time based on the exception or regular schedule
             if exception_date and not is_off:
@@ -77,26 +83,9 @@ def get_appointments_and_breaks(barber_id, selected_date):
             appointment_date = appointment_time.strftime('%Y-%m-%d')
             appointment_only_time = appointment_time.strftime('%H:%M:%S')
 
-            # Calculate the total estimated time
-            total_estimated_time = primary_estimated_time  # Start with the primary service time
-
-            # If there are extra services, calculate the estimated time for each
-            if extra and isinstance(extra, list):  # Check if 'extra' is a list
-                extra_service_ids = tuple(map(int, extra))  # Convert the extra services to integers
-                if extra_service_ids:
-                    extra_services_query = """
-                        SELECT SUM(estimated_time)
-                        FROM Services
-                        WHERE service_id IN %s;
-                    """
-                    cursor.execute(extra_services_query, (extra_service_ids,))
-                    extra_estimated_time = cursor.fetchone()[0] or 0
-
-                    # Ensure extra_estimated_time is treated as an integer
-                    if isinstance(extra_estimated_time, timedelta):
-                        extra_estimated_time = int(extra_estimated_time.total_seconds() // 60)
-
-                    total_estimated_time += extra_estimated_time
+            # The primary and extra services (summed by the query) in whole minutes, rounded up
+            # like the slot engines do, so the admin view ends bookings where the engines do
+            total_estimated_time = duration_in_minutes(primary_estimated_time) + duration_in_minutes(extra_estimated_time)
 
             # Calculate the appointment end time by adding the total estimated time (in minutes) to the appointment start time
             appointment_end_time = appointment_time + timedelta(minutes=total_estimated_time)
@@ -130,6 +119,7 @@ def get_appointments_and_breaks(barber_id, selected_date):
                 existing_appointment["breaks"].append({
                     "break_date": break_date.strftime('%Y-%m-%d'),
                     "break_time": break_time.strftime('%H:%M:%S'),
+                    "break_end": break_end,
                     "break_type": break_type
                 })
 
@@ -140,6 +130,6 @@ def get_appointments_and_breaks(barber_id, selected_date):
         return list(appointments_dict.values())
 
     except Exception as e:
-        print(f"Error occurred while fetching data for barber {barber_id}: {e}")
+        logger.error("Error occurred while fetching data for barber %s: %s", barber_id, e)
         release_connection(conn)
         return []
\ No newline at end of file
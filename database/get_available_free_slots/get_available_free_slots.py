@@ -1,26 +1,39 @@
 
-from datetime import datetime, timedelta
 
+from datetime import datetime
+
+from database.barber_schedule.weekly_schedule import load_weekly_template
 from database.database_conn import get_connection, release_connection
+from database.get_existing_breaks_for_barber.get_existing_breaks_for_barber import BREAKS_ON_DATE
+from database.prepared_statements import execute_prepared, register_statement
+from srvices.bookings.day_occupancy import MINUTE_LABELS, duration_in_minutes, first_free_minute, minute_of_day
+from srvices.cache.availability_cache import CACHE_MISS, availability_cache
+from srvices.observability.logger import get_logger
+from srvices.observability.metrics import count_day, instrument_slot_engine
 
-def round_up_to_next_15_minutes(dt):
-    """
-    Round a datetime object up to the next 15-minute interval.
-    """
-    if dt.minute % 15 == 0:
-        return dt
-    else:
-        return dt + timedelta(minutes=(15 - dt.minute % 15))
+logger = get_logger(__name__)
 
-import datetime
-from datetime import timedelta, datetime
+# Length of, and step between, the free slots returned to the booking widget
+SLOT_MINUTES = 15
 
-def round_up_to_next_15_minutes(dt):
+# Bookings of one barber on one date, with the duration of their extra services summed
+BOOKINGS_WITH_DURATIONS_ON_DATE = register_statement(
+    "bookings_with_durations_on_date",
     """
-    Rounds the time to the next 15-minute interval.
-    """
-    discard = timedelta(minutes=dt.minute % 15, seconds=dt.second, microseconds=dt.microsecond)
-    return dt + (timedelta(minutes=15) - discard)
+        SELECT
+            b.appointment_time,
+            s.estimated_time,
+            (
+                SELECT SUM(es.estimated_time)
+                FROM Services es
+                WHERE es.service_id = ANY(b.extra)
+            ) AS extra_estimated_time
+        FROM Bookings b
+        JOIN Services s ON b.service_id = s.service_id
+        WHERE b.barber_id = $1 AND DATE(b.appointment_time) = $2
+    """,
+    ("integer", "date")
+)
 
 def get_available_free_slots(barber_id, date):
     """
@@ -39,131 +52,93 @@ def get_available_free_slots(barber_id, date):
         try:
             date = datetime.strptime(date, '%Y-%m-%d').date()
         except ValueError as e:
-            print(f"Error parsing date: {e}")
+            logger.error("Error parsing date: %s", e)
             return []
 
     # Get the current time
     now = datetime.now()
 
+    # Served from the availability cache when the day was computed before
+    key = availability_cache.make_key(barber_id, date, SLOT_MINUTES, SLOT_MINUTES, anchor=0)
+    starts = availability_cache.get(key)
+    if starts is CACHE_MISS:
+        generation = availability_cache.generation(barber_id)
+        starts = _compute_free_slot_starts(barber_id, date)
+        if starts is None:
+            return []
+        availability_cache.put(key, starts, generation=generation)
+
+    # Free 15-minute slots from the current time onwards
+    not_before = first_free_minute(now, date)
+    return [MINUTE_LABELS[start] for start in starts if start >= not_before]
+
+
+@instrument_slot_engine("free_slots", count=count_day)
+def _compute_free_slot_starts(barber_id, date):
+    """
+    Compute the start minutes of every free 15-minute slot of a barber on a date,
+    including the ones that are already past.
+
+    Parameters:
+    - barber_id (int): The ID of the barber.
+    - date (datetime.date): The date for which to check availability.
+
+    Returns:
+    - list: Start minutes on the quarter-hour grid, or None if the database could not be read.
+    """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
-        return []
+        logger.error("Failed to connect to the database")
+        return None
 
     try:
         cursor = conn.cursor()
 
-        # 1. Fetch the barber's working hours from BarberSchedules
-        cursor.execute("""
-            SELECT start_time, end_time 
-            FROM BarberSchedules 
-            WHERE barber_id = %s
-        """, (barber_id,))
-        schedule = cursor.fetchone()
+        # 1. Stamp the barber's weekly template: the weekday's working hours and recurring breaks
+        template = load_weekly_template(cursor, barber_id)
 
-        if not schedule:
-            print(f"No schedule found for barber ID {barber_id}")
+        if template is None:
+            logger.warning("No schedule found for barber ID %s", barber_id)
+            cursor.close()
+            release_connection(conn)
             return []
 
-        start_time, end_time = schedule
-        start_time = datetime.combine(date, start_time)
-        end_time = datetime.combine(date, end_time)
-
-        # If the date is today, adjust the start time to be at least the current time
-        if date == now.date() and start_time < now:
-            start_time = now
-
-        # Round start_time to the next nearest 15-minute interval
-        start_time = round_up_to_next_15_minutes(start_time)
+        occupancy = template.occupancy(date.weekday())
+        if occupancy is None:
+            # A day off in the weekly schedule
+            cursor.close()
+            release_connection(conn)
+            return []
 
         # 2. Fetch barber's breaks for the specific date
-        cursor.execute("""
-            SELECT break_time 
-            FROM BarberBreaks
-            WHERE barber_id = %s AND break_date = %s
-        """, (barber_id, date))
+        execute_prepared(cursor, BREAKS_ON_DATE, (barber_id, date))
         breaks = cursor.fetchall()
 
-        # Convert the fetched break times into datetime objects
-        break_times = [datetime.combine(date, break_time[0]) for break_time in breaks]
+        # Each break blocks its [start, end) interval
+        for break_start, break_end in breaks:
+            occupancy.block(break_start, break_end)
 
-        # 3. Fetch existing bookings for the barber on the specified date, including extra services
-        cursor.execute("""
-            SELECT appointment_time, s.estimated_time, b.extra
-            FROM Bookings b
-            JOIN Services s ON b.service_id = s.service_id
-            WHERE b.barber_id = %s AND DATE(b.appointment_time) = %s
-        """, (barber_id, date))
+        # 3. Fetch existing bookings for the barber on the specified date, with the duration of
+        #    their extra services summed in the same query
+        execute_prepared(cursor, BOOKINGS_WITH_DURATIONS_ON_DATE, (barber_id, date))
         bookings = cursor.fetchall()
 
-        booked_slots = []
-        for appointment_time, estimated_time, extra_services in bookings:
-            booking_start = appointment_time
-            total_estimated_time = estimated_time
-
-            # If there are extra services, fetch their estimated times and add them
-            if extra_services:
-                extra_service_ids = tuple(extra_services)  # assuming extra_services is an array of service IDs
-                if extra_service_ids:  # ensure extra_service_ids is not empty
-                    cursor.execute("""
-                        SELECT estimated_time
-                        FROM Services
-                        WHERE service_id IN %s
-                    """, (extra_service_ids,))
-                    extra_times = cursor.fetchall()
-
-                    # Add the estimated times of all extra services
-                    for extra_time in extra_times:
-                        total_estimated_time += extra_time[0]  # Assuming extra_time is a timedelta
-
-            booking_end = booking_start + total_estimated_time
-            booked_slots.append((booking_start, booking_end))
-
-        # 4. Generate time slots in increments (e.g., every 15 minutes)
-        current_time = start_time
-        available_slots = []
-
-        # Adjust the condition to ensure the last slot is included
-        while current_time < end_time:
-            slot_end_time = current_time + timedelta(minutes=15)
-
-            # Debugging: print the current slot being checked
-            print(f"Checking slot: {current_time.strftime('%H:%M')} - {slot_end_time.strftime('%H:%M')}")
-
-            # Check if the time slot overlaps with any booked slots
-            overlap = False
-            for booking_start, booking_end in booked_slots:
-                print(f"Comparing with booking: {booking_start.strftime('%H:%M')} - {booking_end.strftime('%H:%M')}")
-                if (current_time < booking_end) and (slot_end_time > booking_start):
-                    print(f"Overlap with booking {booking_start.strftime('%H:%M')} - {booking_end.strftime('%H:%M')}")
-                    overlap = True
-                    break
-
-            # Check if the time slot overlaps with any break slots
-            for break_time in break_times:
-                print(f"Comparing with break: {break_time.strftime('%H:%M')}")
-                if (current_time <= break_time < slot_end_time) or (break_time <= current_time < break_time + timedelta(minutes=15)):
-                    print(f"Overlap with break at {break_time.strftime('%H:%M')}")
-                    overlap = True
-                    break
-
-            # Only add slots that are in the future (from the current time onwards) and have no overlaps
-            if not overlap and current_time >= now:
-                available_slots.append(current_time.strftime('%H:%M'))
-
-            current_time += timedelta(minutes=15)
+        for appointment_time, estimated_time, extra_estimated_time in bookings:
+            total_estimated_time = duration_in_minutes(estimated_time) + duration_in_minutes(extra_estimated_time)
+            booking_start = minute_of_day(appointment_time)
+            occupancy.block(booking_start, booking_start + total_estimated_time)
+
+        # 4. Free 15-minute slots on the quarter-hour grid
+        available_starts = occupancy.fitting_starts(SLOT_MINUTES, SLOT_MINUTES, anchor=0)
 
         # Close the cursor and connection
         cursor.close()
         release_connection(conn)
 
-        return available_slots
+        return available_starts
 
     except Exception as e:
-        print(f"Error occurred while fetching available slots: {e}")
+        logger.error("Error occurred while fetching available slots: %s", e)
         if conn:
             release_connection(conn)
-        return []
-
-
-
+        return None
@@ -1,116 +1,252 @@
 
-from datetime import datetime
+from datetime import date, datetime
+from database.barber_schedule.weekly_schedule import recurring_breaks_from_rows, weekly_hours_from_rows
 from database.database_conn import get_connection, release_connection
+from srvices.bookings.barbers_slots_main import DEFAULT_HORIZON_DAYS
+from srvices.bookings.weekly_template import compile_weekly_template
+from srvices.cache.catalog import get_catalog
+from srvices.observability.logger import get_logger
 
+logger = get_logger(__name__)
 
-def fetch_barber_data_from_db(service_ids=None):
+
+# Everything the slot engine needs in one statement, so the endpoint pays a single round trip.
+# The horizon is computed in SQL the same way as resolve_barber_date_range(), bookings, exceptions
+# and breaks are limited to it, and every block comes back as a JSON array of rows.
+BARBER_DATA_QUERY = """
+    WITH requested AS (
+        SELECT barber_id FROM BarberSchedules WHERE %(barber_ids)s::int[] IS NULL
+        UNION
+        SELECT barber_id FROM BarberWeeklySchedules WHERE %(barber_ids)s::int[] IS NULL
+        UNION
+        SELECT barber_id FROM BarberRecurringBreaks WHERE %(barber_ids)s::int[] IS NULL
+        UNION
+        SELECT UNNEST(%(barber_ids)s::int[])
+    ),
+    horizon AS (
+        SELECT
+            COALESCE(MIN(start_date), %(today)s::date) AS start_date,
+            COALESCE(MAX(end_date), %(today)s::date) AS end_date
+        FROM (
+            SELECT
+                COALESCE(a.start_date, %(today)s::date) AS start_date,
+                COALESCE(a.end_date, COALESCE(a.start_date, %(today)s::date) + %(default_days)s::int) AS end_date
+            FROM requested r
+            LEFT JOIN BarberAvailability a ON a.barber_id = r.barber_id
+        ) ranges
+    )
+    SELECT
+        (
+            SELECT json_agg(json_build_array(bs.barber_id, to_char(bs.start_time, 'HH24:MI'), to_char(bs.end_time, 'HH24:MI')))
+            FROM BarberSchedules bs
+            WHERE bs.barber_id IN (SELECT barber_id FROM requested)
+        ) AS schedules,
+        (
+            SELECT json_agg(json_build_array(a.barber_id, a.start_date, a.end_date))
+            FROM BarberAvailability a
+            WHERE a.barber_id IN (SELECT barber_id FROM requested)
+        ) AS availability,
+        (
+            SELECT json_agg(json_build_array(
+                b.barber_id,
+                to_char(b.appointment_time, 'YYYY-MM-DD HH24:MI:SS'),
+                COALESCE(EXTRACT(EPOCH FROM s.estimated_time) / 60, 0) + COALESCE((
+                    SELECT SUM(EXTRACT(EPOCH FROM es.estimated_time) / 60)
+                    FROM UNNEST(b.extra) AS extra_service_id
+                    JOIN Services es ON es.service_id = extra_service_id
+                ), 0)
+            ))
+            FROM Bookings b
+            JOIN Services s ON b.service_id = s.service_id
+            CROSS JOIN horizon h
+            WHERE b.barber_id IN (SELECT barber_id FROM requested)
+                AND b.appointment_time >= h.start_date
+                AND b.appointment_time < h.end_date + 1
+        ) AS bookings,
+        (
+            SELECT json_agg(json_build_array(
+                be.barber_id, be.exception_date, to_char(be.custom_start_time, 'HH24:MI'),
+                to_char(be.custom_end_time, 'HH24:MI'), be.is_off
+            ))
+            FROM BarberExceptions be
+            CROSS JOIN horizon h
+            WHERE be.barber_id IN (SELECT barber_id FROM requested)
+                AND be.exception_date BETWEEN h.start_date AND h.end_date
+        ) AS exceptions,
+        (
+            SELECT json_agg(json_build_array(
+                br.barber_id, br.break_date,
+                EXTRACT(EPOCH FROM br.break_time)::int / 60,
+                -- A row without break_end blocks one 15-minute slot
+                COALESCE(
+                    EXTRACT(EPOCH FROM br.break_end)::int / 60,
+                    LEAST(EXTRACT(EPOCH FROM br.break_time)::int / 60 + 15, 24 * 60)
+                )
+            ))
+            FROM BarberBreaks br
+            CROSS JOIN horizon h
+            WHERE br.barber_id IN (SELECT barber_id FROM requested)
+                AND br.break_date BETWEEN h.start_date AND h.end_date
+                AND br.break_time IS NOT NULL
+        ) AS breaks,
+        (
+            SELECT json_agg(json_build_array(
+                ws.barber_id, ws.weekday,
+                EXTRACT(EPOCH FROM ws.start_time)::int / 60, EXTRACT(EPOCH FROM ws.end_time)::int / 60, ws.is_off
+            ))
+            FROM BarberWeeklySchedules ws
+            WHERE ws.barber_id IN (SELECT barber_id FROM requested)
+        ) AS weekly_schedules,
+        (
+            SELECT json_agg(json_build_array(
+                rb.barber_id, rb.weekday,
+                EXTRACT(EPOCH FROM rb.start_time)::int / 60, EXTRACT(EPOCH FROM rb.end_time)::int / 60
+            ))
+            FROM BarberRecurringBreaks rb
+            WHERE rb.barber_id IN (SELECT barber_id FROM requested)
+        ) AS recurring_breaks
+"""
+
+
+def fetch_barber_data_from_db(service_ids=None, barber_ids=None):
     """
-    Fetch barber schedules, availability dates, existing bookings, exceptions, and service prices from the database.
+    Fetch barber schedules, availability dates, existing bookings, exceptions, breaks and service prices
+    from the database.
+
+    Only the requested barbers are loaded, and bookings, exceptions and breaks are limited to the
+    [start_date, end_date] horizon the slot engine covers. Everything is read with one statement,
+    in a single round trip, and decoded straight into the slot engine's input structures.
     
     Parameters:
     - service_ids (list, optional): A list of service IDs to fetch prices for.
+    - barber_ids (list, optional): The barbers to load data for. Defaults to every barber with a schedule.
     
     Returns:
-    - barber_schedules (dict): Barber IDs mapped to their working hours.
+    - barber_schedules (dict): Barber IDs mapped to their compiled WeeklyTemplate.
     - barber_dates (dict): Barber IDs mapped to their availability date ranges.
     - existing_bookings (dict): Barber IDs mapped to their existing bookings with total estimated time.
     - exceptions (dict): Barber-specific exceptions for custom working hours or days off.
     - barber_prices (dict): Barber IDs mapped to the total price of the specified services.
+    - breaks (dict): Barber IDs mapped to dates mapped to (start, end) break intervals in minutes.
     """
     conn = get_connection() 
     if not conn:
-        print("Failed to connect to the database")
-        return None, None, None, None, None
+        logger.error("Failed to connect to the database")
+        return None, None, None, None, None, None
     
     try:
         cur = conn.cursor()
+        cur.execute(BARBER_DATA_QUERY, {
+            "barber_ids": list(barber_ids) if barber_ids is not None else None,
+            "today": datetime.now().date(),
+            "default_days": DEFAULT_HORIZON_DAYS,
+        })
+        (
+            schedule_rows, availability_rows, booking_rows, exception_rows, break_rows,
+            weekly_rows, recurring_break_rows
+        ) = cur.fetchone()
+        cur.close()
 
-        # Fetch barber schedules
-        cur.execute("SELECT barber_id, start_time, end_time FROM BarberSchedules")
-        barber_schedules = {row[0]: (row[1].strftime('%H:%M'), row[2].strftime('%H:%M')) for row in cur.fetchall()}
+        # json_agg returns NULL instead of an empty array when a block has no rows
+        default_hours = {barber_id: (start_time, end_time) for barber_id, start_time, end_time in schedule_rows or ()}
 
-        # Fetch barber availability dates
-        cur.execute("SELECT barber_id, start_date, end_date FROM BarberAvailability")
-        barber_dates = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+        # Default hours, weekly hours and recurring breaks compiled into one template per barber
+        weekly_by_barber = {}
+        for barber_id, weekday, start, end, is_off in weekly_rows or ():
+            weekly_by_barber.setdefault(barber_id, []).append((weekday, start, end, is_off))
+        recurring_by_barber = {}
+        for barber_id, weekday, start, end in recurring_break_rows or ():
+            recurring_by_barber.setdefault(barber_id, []).append((weekday, start, end))
+
+        # Like load_weekly_template, a barber with only weekly rows gets a template too
+        if barber_ids is None:
+            barber_ids = list(dict.fromkeys([*default_hours, *weekly_by_barber, *recurring_by_barber]))
+        barber_ids = list(barber_ids)
 
-        # Get today's date
-        today = datetime.now().date()
+        barber_schedules = {
+            barber_id: compile_weekly_template(
+                default_hours.get(barber_id),
+                weekly_hours_from_rows(weekly_by_barber.get(barber_id, ())),
+                recurring_breaks_from_rows(recurring_by_barber.get(barber_id, ()))
+            )
+            for barber_id in barber_ids
+            if barber_id in default_hours or barber_id in weekly_by_barber or barber_id in recurring_by_barber
+        }
 
-        # Fetch existing bookings for today and calculate total estimated time for the given services
+        barber_dates = {
+            barber_id: (date.fromisoformat(start_date), date.fromisoformat(end_date))
+            for barber_id, start_date, end_date in availability_rows or ()
+        }
+
+        # Bookings with the duration of the main and extra services in minutes
         existing_bookings = {}
-        cur.execute("""
-            SELECT 
-                b.barber_id, 
-                b.appointment_time, 
-                s.estimated_time AS main_estimated_time,
-                COALESCE(SUM(EXTRACT(EPOCH FROM es.estimated_time) / 60), 0) AS total_extra_estimated_time
-            FROM 
-                Bookings b
-            JOIN 
-                Services s ON b.service_id = s.service_id
-            LEFT JOIN 
-                LATERAL UNNEST(b.extra) AS extra_service_id ON TRUE
-            LEFT JOIN 
-                Services es ON es.service_id = extra_service_id
-            WHERE 
-                DATE(b.appointment_time) = %s
-            GROUP BY 
-                b.barber_id, b.appointment_time, s.estimated_time
-        """, (today,))
-
-        for row in cur.fetchall():
-            barber_id, appointment_time, main_estimated_time, total_extra_estimated_time = row
-            
-            # Convert main_estimated_time to total minutes
-            main_estimated_minutes = main_estimated_time.total_seconds() / 60 if main_estimated_time else 0
-            total_extra_estimated_time_float = float(total_extra_estimated_time)  # Convert to float
-
-            # Sum the estimated times
-            total_estimated_time = main_estimated_minutes + total_extra_estimated_time_float
-
-            if barber_id not in existing_bookings:
-                existing_bookings[barber_id] = []
-            existing_bookings[barber_id].append((appointment_time.strftime('%Y-%m-%d %H:%M:%S'), total_estimated_time))
-
-        # Fetch exceptions
-        cur.execute("SELECT barber_id, exception_date, custom_start_time, custom_end_time, is_off FROM BarberExceptions")
+        for barber_id, appointment_time, total_estimated_time in booking_rows or ():
+            existing_bookings.setdefault(barber_id, []).append((appointment_time, float(total_estimated_time)))
+
         exceptions = {}
-        for row in cur.fetchall():
-            barber_id, exception_date, custom_start, custom_end, is_off = row
-            date_str = exception_date.strftime('%Y-%m-%d')
-            if date_str not in exceptions:
-                exceptions[date_str] = {}
-            if is_off:
-                exceptions[date_str][barber_id] = None
-            else:
-                exceptions[date_str][barber_id] = (custom_start.strftime('%H:%M'), custom_end.strftime('%H:%M'))
-
-        # Fetch barber service prices for the given list of service_ids and sum the prices
+        for barber_id, date_str, custom_start, custom_end, is_off in exception_rows or ():
+            exceptions.setdefault(date_str, {})[barber_id] = None if is_off else (custom_start, custom_end)
+
+        # Each break row blocks its [start, end) interval
+        breaks = {}
+        for barber_id, date_str, break_start, break_end in break_rows or ():
+            breaks.setdefault(barber_id, {}).setdefault(date_str, []).append((break_start, break_end))
+
+        # Sum the barber service prices for the given list of service_ids, from the catalog snapshot
         barber_prices = {}
         if service_ids is not None and len(service_ids) > 0:
-            service_ids_tuple = tuple(service_ids)  # Convert list to tuple for SQL IN clause
-            cur.execute(f"""
-                SELECT barber_id, SUM(price) AS total_price
-                FROM BarberServicePrices 
-                WHERE service_id IN %s
-                GROUP BY barber_id
-            """, (service_ids_tuple,))
-            barber_prices = {row[0]: float(row[1]) for row in cur.fetchall()}
+            catalog = get_catalog()
+            if catalog is None:
+                return None, None, None, None, None, None
+            barber_prices = catalog.total_prices(barber_ids, service_ids)
 
-        cur.close()
-        return barber_schedules, barber_dates, existing_bookings, exceptions, barber_prices
+        return barber_schedules, barber_dates, existing_bookings, exceptions, barber_prices, breaks
 
     except Exception as e:
-        print(f"Error occurred while fetching barber data: {e}")
-        return None, None, None, None, None
+        logger.error("Error occurred while fetching barber data: %s", e)
+        return None, None, None, None, None, None
 
     finally:
         # Release the connection back to the pool
         release_connection(conn)
 
 
+def fetch_barber_dates(barber_ids):
+    """
+    Fetch only the availability date ranges of the given barbers.
+
+    Used when the slots themselves can be served from the availability cache.
+
+    Parameters:
+    - barber_ids (list): The barbers to load data for.
+
+    Returns:
+    - barber_dates (dict): Barber IDs mapped to their availability date ranges, None on error.
+    """
+    conn = get_connection()
+    if not conn:
+        logger.error("Failed to connect to the database")
+        return None
 
+    try:
+        cur = conn.cursor()
 
+        cur.execute("""
+            SELECT barber_id, start_date, end_date
+            FROM BarberAvailability
+            WHERE barber_id = ANY(%s)
+        """, (list(barber_ids),))
+        barber_dates = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+        cur.close()
+        return barber_dates
+
+    except Exception as e:
+        logger.error("Error occurred while fetching barber dates: %s", e)
+        return None
+
+    finally:
+        release_connection(conn)
 
 
 def get_barber_data(barber_id):
@@ -124,7 +260,7 @@ def get_barber_data(barber_id):
         SELECT 
             b.booking_id, b.barber_id, b.service_id, b.customer_name, b.appointment_time, 
             b.email, b.phone, b.price, b.extra_charge, b.extra,
-            br.break_id, br.break_date, br.break_time, br.type, br.booking_id AS break_booking_id,
+            br.break_id, br.break_date, br.break_time, br.break_end, br.type, br.booking_id AS break_booking_id,
             be.exception_date, be.custom_start_time, be.custom_end_time, be.is_off
         FROM 
             bookings b
@@ -147,9 +283,9 @@ def get_barber_data(barber_id):
         return data
     
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
         return None
     finally:
         if conn:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            release_connection(conn)
\ No newline at end of file
@@ -1,10 +1,11 @@
-
-from database.database_conn import get_connection, release_connection
+from srvices.cache.catalog import get_catalog
 
 
 def get_barber_name_by_id(barber_id):
     """
-    Fetch the barber's name from the barbers table using the barber_id.
+    Fetch the barber's name using the barber_id.
+
+    Served from the in-memory catalog snapshot, see srvices/cache/catalog.py.
 
     Parameters:
     - barber_id (int): The ID of the barber.
@@ -12,32 +13,9 @@ def get_barber_name_by_id(barber_id):
     Returns:
     - str: The name of the barber, or None if no barber is found.
     """
-    conn = get_connection()
-    if not conn:
-        print("Failed to connect to the database")
-        return None
-    
-    try:
-        cur = conn.cursor()
-
-        # Query to get the barber's name by barber_id
-        cur.execute("""
-            SELECT name FROM barbers
-            WHERE barber_id = %s
-        """, (barber_id,))  # Safely passing barber_id as a parameter to avoid SQL injection
-
-        result = cur.fetchone()
-        cur.close()
-
-        if result:
-            return result[0]  # Return the barber's name
-        else:
-            return None  # Return None if no barber was found
-
-    except Exception as e:
-        print(f"Error occurred while fetching the barber's name: {e}")
+    catalog = get_catalog()
+    if catalog is None:
         return None
 
-    finally:
-        # Release the connection back to the pool
-        release_connection(conn)
+    barber = catalog.barbers_by_id.get(barber_id)
+    return barber.name if barber is not None else None
@@ -1,6 +1,22 @@
 
 from datetime import timedelta
 from database.database_conn import get_connection, release_connection
+from database.prepared_statements import execute_prepared, register_statement
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bookings of one barber on one date with the duration of their main service
+BOOKINGS_ON_DATE = register_statement(
+    "bookings_on_date",
+    """
+        SELECT appointment_time, s.estimated_time
+        FROM Bookings b
+        JOIN Services s ON b.service_id = s.service_id
+        WHERE b.barber_id = $1 AND DATE(b.appointment_time) = $2
+    """,
+    ("integer", "date")
+)
 
 
 def get_bookings_for_barber(barber_id, date):
@@ -16,20 +32,14 @@ def get_bookings_for_barber(barber_id, date):
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return []
 
     try:
         cursor = conn.cursor()
 
-        # SQL query to get all bookings for the barber on the specified date
-        query = """
-            SELECT appointment_time, s.estimated_time 
-            FROM Bookings b
-            JOIN Services s ON b.service_id = s.service_id
-            WHERE b.barber_id = %s AND DATE(b.appointment_time) = %s
-        """
-        cursor.execute(query, (barber_id, date))
+        # Get all bookings for the barber on the specified date
+        execute_prepared(cursor, BOOKINGS_ON_DATE, (barber_id, date))
 
         bookings = []
         for row in cursor.fetchall():
@@ -50,7 +60,7 @@ def get_bookings_for_barber(barber_id, date):
         return bookings
 
     except Exception as e:
-        print(f"Error occurred while fetching bookings for barber {barber_id}: {e}")
+        logger.error("Error occurred while fetching bookings for barber %s: %s", barber_id, e)
         release_connection(conn)
         return []
 
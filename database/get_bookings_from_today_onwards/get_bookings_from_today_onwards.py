@@ -7,9 +7,11 @@ def convert_timedelta_to_minutes(td):
     return td  # If not a timedelta, return as is
 
 from datetime import datetime, timedelta
-import traceback
 
 from database.database_conn import get_connection, release_connection
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 def convert_timedelta_to_minutes(td):
     """Convert timedelta or string representation of time to total minutes."""
@@ -37,7 +39,7 @@ def get_bookings_from_today_onwards(barber_id):
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return False, "Failed to connect to the database."
 
     try:
@@ -120,7 +122,6 @@ def get_bookings_from_today_onwards(barber_id):
             return True, "No bookings found from today onwards."
 
     except Exception as e:
-        print(f"Error occurred while retrieving bookings: {e}")
-        traceback.print_exc()  # This will print the full traceback in the console
+        logger.exception("Error occurred while retrieving bookings: %s", e)
         release_connection(conn)
         return False, "An error occurred while fetching bookings."
@@ -0,0 +1,57 @@
+from database.database_conn import get_connection, release_connection
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def fetch_catalog():
+    """
+    Fetch the whole service catalog: categories, services, barbers, which barber performs
+    which service, and the barber x service prices.
+
+    Returns:
+    - dict: Row lists under 'services' (service_id, service_name, category_name, description,
+      estimated_time, price) ordered by category and service name, 'barbers' (barber_id, name),
+      'barber_services' (barber_id, service_id) and 'barber_service_prices'
+      (barber_id, service_id, price).
+    - Returns None if an error occurs.
+    """
+    conn = get_connection()
+    if not conn:
+        logger.error("Failed to connect to the database")
+        return None
+
+    try:
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT s.service_id, s.service_name, c.category_name, s.description, s.estimated_time, s.price
+            FROM Services s
+            LEFT JOIN Categories c ON c.category_id = s.category_id
+            ORDER BY c.category_name, s.service_name, s.service_id
+        """)
+        services = cur.fetchall()
+
+        cur.execute("SELECT barber_id, name FROM Barbers ORDER BY barber_id")
+        barbers = cur.fetchall()
+
+        cur.execute("SELECT barber_id, service_id FROM BarberServices ORDER BY barber_id")
+        barber_services = cur.fetchall()
+
+        cur.execute("SELECT barber_id, service_id, price FROM BarberServicePrices")
+        barber_service_prices = cur.fetchall()
+
+        cur.close()
+        return {
+            "services": services,
+            "barbers": barbers,
+            "barber_services": barber_services,
+            "barber_service_prices": barber_service_prices,
+        }
+
+    except Exception as e:
+        logger.error("Error occurred while fetching the service catalog: %s", e)
+        return None
+
+    finally:
+        release_connection(conn)
@@ -1,7 +1,26 @@
 
 
-import traceback
 from database.database_conn import get_connection, release_connection
+from database.prepared_statements import execute_prepared, register_statement
+from srvices.bookings.day_occupancy import BREAK_SLOT_MINUTES, MINUTE_LABELS, MINUTES_PER_DAY
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Breaks of one barber on one date, as [start, end) minutes of the day. A row without break_end
+# (written by hand, or by a worker older than migration 001) blocks one 15-minute slot
+BREAKS_ON_DATE = register_statement(
+    "breaks_on_date",
+    """
+        SELECT
+            EXTRACT(EPOCH FROM break_time)::int / 60,
+            COALESCE(EXTRACT(EPOCH FROM break_end)::int / 60, LEAST(EXTRACT(EPOCH FROM break_time)::int / 60 + 15, 24 * 60))
+        FROM BarberBreaks
+        WHERE barber_id = $1 AND break_date = $2 AND break_time IS NOT NULL
+        ORDER BY break_time
+    """,
+    ("integer", "date")
+)
 
 
 def get_existing_breaks_for_barber(barber_id, break_date):
@@ -17,40 +36,39 @@ def get_existing_breaks_for_barber(barber_id, break_date):
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return []
 
     try:
         cursor = conn.cursor()
 
-        # SQL query to get all break times for the barber on the specified date
-        query = """
-            SELECT break_time 
-            FROM BarberBreaks
-            WHERE barber_id = %s AND break_date = %s
-        """
-        cursor.execute(query, (barber_id, break_date))
+        # Get all break times for the barber on the specified date
+        execute_prepared(cursor, BREAKS_ON_DATE, (barber_id, break_date))
         existing_breaks = cursor.fetchall()
         
         # Ensure you're seeing all breaks properly
-        print(f"Raw fetched breaks for barber {barber_id} on {break_date}: {existing_breaks}")
+        logger.debug("Raw fetched breaks for barber %s on %s: %s", barber_id, break_date, existing_breaks)
 
         # Check if multiple entries are being fetched or not
         if len(existing_breaks) < 2:
-            print("Only one or no break times found, this may be the issue!")
+            logger.debug("Only one or no break times found, this may be the issue!")
 
-        # Convert the fetched results to a list of formatted break times
-        breaks = [row[0].strftime('%H:%M') for row in existing_breaks]
+        # Every 15-minute slot covered by the break intervals, as formatted break times
+        breaks = [
+            MINUTE_LABELS[minute]
+            for break_start, break_end in existing_breaks
+            for minute in range(break_start, min(break_end, MINUTES_PER_DAY), BREAK_SLOT_MINUTES)
+        ]
 
         # Print formatted times
-        print(f"Formatted break times: {breaks}")
+        logger.debug("Formatted break times: %s", breaks)
 
         cursor.close()
         release_connection(conn)
         return breaks
 
     except Exception as e:
-        print(f"Error occurred while fetching breaks for barber {barber_id} on {break_date}: {e}")
+        logger.error("Error occurred while fetching breaks for barber %s on %s: %s", barber_id, break_date, e)
         release_connection(conn)
         return []
     
@@ -73,7 +91,7 @@ def get_barber_breaks(barber_id, break_type=None):
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return False, "Failed to connect to the database."
 
     try:
@@ -85,13 +103,15 @@ def get_barber_breaks(barber_id, break_type=None):
         # Query to select breaks from today onward, with optional filtering by type
         if break_type:
             query = """
-            SELECT * FROM BarberBreaks 
+            SELECT break_id, barber_id, break_date, break_time, type, booking_id, to_char(COALESCE(break_end - TIME '00:00', LEAST(break_time - TIME '00:00' + INTERVAL '15 minutes', INTERVAL '24 hours')), 'HH24:MI:SS')
+            FROM BarberBreaks 
             WHERE barber_id = %s AND break_date >= %s AND type = %s;
             """
             cursor.execute(query, (barber_id, today, break_type))
         else:
             query = """
-            SELECT * FROM BarberBreaks 
+            SELECT break_id, barber_id, break_date, break_time, type, booking_id, to_char(COALESCE(break_end - TIME '00:00', LEAST(break_time - TIME '00:00' + INTERVAL '15 minutes', INTERVAL '24 hours')), 'HH24:MI:SS')
+            FROM BarberBreaks 
             WHERE barber_id = %s AND break_date >= %s;
             """
             cursor.execute(query, (barber_id, today))
@@ -108,10 +128,10 @@ def get_barber_breaks(barber_id, break_type=None):
                 break_time = break_[3]   # This should be a time object
                 type_ = break_[4]        # The break type (Extend, Break, etc.)
                 booking_id = break_[5]        # The break type (Extend, Break, etc.)
+                break_end = break_[6]    # End of the break interval, 'HH:MM:SS' ('24:00:00' at midnight)
 
                 
                 # # Debug: Print the values before formatting
-                # print(f"Break ID: {break_id}, Barber ID: {barber_id}, Break Date: {break_date}, Break Time: {break_time}, Type: {type_}")
                 
                 # Format break_time and break_date
                 formatted_breaks.append({
@@ -120,6 +140,7 @@ def get_barber_breaks(barber_id, break_type=None):
 
                     'barber_id': barber_id,
                     'break_time': break_time.strftime('%H:%M:%S') if break_time else "N/A",
+                    'break_end': break_end if break_end else "N/A",
                     'break_date': break_date.strftime('%d.%m.%Y') if break_date else "N/A",
                     'type': type_ if type_ else "N/A"  # Include the break type
                 })
@@ -130,7 +151,6 @@ def get_barber_breaks(barber_id, break_type=None):
         return True, formatted_breaks if formatted_breaks else "No future breaks found for this barber."
 
     except Exception as e:
-        print(f"Error occurred while retrieving breaks: {e}")
-        traceback.print_exc()
+        logger.exception("Error occurred while retrieving breaks: %s", e)
         release_connection(conn)
         return False, "An error occurred while fetching breaks."
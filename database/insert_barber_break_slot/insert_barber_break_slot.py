@@ -1,10 +1,22 @@
 
+from psycopg2.extras import execute_values
+
+from database.barber_locks import lock_barber_calendar
+from database.calendar_conflicts import find_booking_conflicts, invalidation_day
 from database.database_conn import get_connection, release_connection
+from srvices.bookings.day_occupancy import BREAK_SLOT_MINUTES, merge_intervals, minute_label, minute_of_day
+from srvices.cache.invalidation import BREAKS, apply_invalidation, notify_invalidation
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def insert_barber_break_slot(barber_id, break_date, break_times, timeType, booking_id=None):
     """
-    Insert multiple break time slots into the BarberBreaks table.
+    Insert break time slots into the BarberBreaks table.
+
+    Each time blocks BREAK_SLOT_MINUTES, and consecutive slots are stored as one interval, so a
+    two-hour lunch given as 8 slot times becomes a single row.
 
     Parameters:
     - barber_id (int): The ID of the barber.
@@ -15,27 +27,102 @@ def insert_barber_break_slot(barber_id, break_date, break_times, timeType, booki
     Returns:
     - bool: True if the insertion is successful for all times, False otherwise.
     """
+    intervals = []
+    for break_time in break_times:
+        break_start = minute_of_day(break_time)
+        intervals.append((break_start, break_start + BREAK_SLOT_MINUTES))
+
+    return insert_barber_break_intervals(barber_id, break_date, intervals, timeType, booking_id)
+
+
+def insert_barber_break_intervals(barber_id, break_date, intervals, timeType, booking_id=None):
+    """
+    Insert breaks given as [start, end) intervals into the BarberBreaks table, in one statement.
+
+    Overlapping or touching intervals are merged first.
+
+    Parameters:
+    - barber_id (int): The ID of the barber.
+    - break_date (date): The date of the breaks.
+    - intervals (list): (start, end) pairs in minutes since midnight, end up to 1440.
+    - timeType (str): The break type, e.g. "Break" or "Extend".
+    - booking_id (int or None): The ID of the booking associated with the breaks, or None if not applicable.
+
+    Returns:
+    - bool: True if the insertion is successful, False otherwise.
+    """
+    success, _ = insert_barber_breaks(
+        barber_id, [(break_date, start, end) for start, end in intervals], timeType, booking_id, check_bookings=False
+    )
+    return success
+
+
+def insert_barber_breaks(barber_id, breaks, timeType, booking_id=None, check_bookings=True):
+    """
+    Insert breaks on any number of dates into the BarberBreaks table, in one transaction.
+
+    Overlapping or touching intervals of a date are merged, then every row is written by a single
+    INSERT. With check_bookings, the bookings overlapping any of the breaks are looked up in one
+    query first, and nothing is written if there are some.
+
+    Parameters:
+    - barber_id (int): The ID of the barber.
+    - breaks (list): (date, start, end) tuples, start and end in minutes since midnight, end up to 1440.
+    - timeType (str): The break type, e.g. "Break" or "Extend".
+    - booking_id (int or None): The ID of the booking associated with the breaks, or None if not applicable.
+    - check_bookings (bool): Refuse breaks that overlap a booking of the barber.
+
+    Returns:
+    - tuple: (success, conflicts). conflicts lists the overlapping bookings when the breaks were
+      refused because of them, and is empty otherwise.
+    """
+    intervals_by_date = {}
+    for break_date, start, end in breaks:
+        intervals_by_date.setdefault(break_date, []).append((start, end))
+    merged = [
+        (break_date, start, end)
+        for break_date, intervals in sorted(intervals_by_date.items())
+        for start, end in merge_intervals(intervals)
+    ]
+    if not merged:
+        return True, []
+
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        query = """
-            INSERT INTO BarberBreaks (barber_id, break_date, break_time, type , booking_id)
-            VALUES (%s, %s, %s, %s, %s)
-        """
 
-        # Loop through each time in the array and insert into the database
-        for break_time in break_times:
-            cursor.execute(query, (barber_id, break_date, break_time, timeType, booking_id))
+        # Don't interleave with a booking of the same barber that is checking for conflicts
+        lock_barber_calendar(cursor, barber_id)
+
+        if check_bookings:
+            conflicts = find_booking_conflicts(cursor, barber_id, merged)
+            if conflicts:
+                conn.rollback()
+                cursor.close()
+                release_connection(conn)
+                return False, conflicts
+
+        execute_values(cursor, """
+            INSERT INTO BarberBreaks (barber_id, break_date, break_time, break_end, type, booking_id)
+            VALUES %s
+        """, [
+            (barber_id, break_date, minute_label(start), minute_label(end), timeType, booking_id)
+            for break_date, start, end in merged
+        ], template="(%s, %s, %s::time, %s::time, %s, %s)", page_size=len(merged))
+
+        day = invalidation_day(intervals_by_date)
+        notify_invalidation(cursor, BREAKS, barber_id, day)
 
         # Commit the transaction if all insertions are successful
         conn.commit()
+        apply_invalidation(BREAKS, barber_id, day)
         cursor.close()
         release_connection(conn)
-        return True  # Indicate success
+        return True, []  # Indicate success
     except Exception as e:
         # Rollback the transaction in case of any error
         if conn:
             conn.rollback()
         release_connection(conn)
-        print(f"Error inserting barber breaks: {e}")
-        return False  # Indicate failure
\ No newline at end of file
+        logger.error("Error inserting barber breaks: %s", e)
+        return False, []  # Indicate failure
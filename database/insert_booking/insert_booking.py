@@ -1,9 +1,63 @@
 
 
 from datetime import datetime
-import traceback
 
+from database.barber_locks import lock_barber_calendar
 from database.database_conn import get_connection, release_connection
+from database.prepared_statements import execute_prepared, register_statement
+from srvices.cache.invalidation import BOOKINGS, apply_invalidation, notify_invalidation
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Conflict check run before every booking: does [start, start + main and extra service time)
+# overlap any booking of the barber, with its own extra services, or any break interval?
+BOOKING_CONFLICTS = register_statement(
+    "booking_conflicts",
+    """
+        WITH new_booking AS (
+            SELECT
+                $2::timestamp AS starts_at,
+                $2::timestamp
+                    + COALESCE((SELECT estimated_time FROM Services WHERE service_id = $3), INTERVAL '0')
+                    + COALESCE((
+                        SELECT SUM(es.estimated_time)
+                        FROM UNNEST($4::int[]) AS extra_service_id
+                        JOIN Services es ON es.service_id = extra_service_id
+                    ), INTERVAL '0') AS ends_at
+        )
+        SELECT
+            (
+                SELECT COUNT(*)
+                FROM Bookings b
+                JOIN Services s ON s.service_id = b.service_id
+                CROSS JOIN new_booking n
+                WHERE b.barber_id = $1
+                    AND b.appointment_time >= n.starts_at - INTERVAL '1 day'
+                    AND b.appointment_time < GREATEST(n.ends_at, n.starts_at + INTERVAL '1 minute')
+                    AND (
+                        b.appointment_time = n.starts_at
+                        OR b.appointment_time + s.estimated_time + COALESCE((
+                            SELECT SUM(es.estimated_time)
+                            FROM UNNEST(b.extra) AS extra_service_id
+                            JOIN Services es ON es.service_id = extra_service_id
+                        ), INTERVAL '0') > n.starts_at
+                    )
+            )
+            +
+            (
+                SELECT COUNT(*)
+                FROM BarberBreaks br
+                CROSS JOIN new_booking n
+                WHERE br.barber_id = $1
+                    AND br.break_time IS NOT NULL
+                    AND br.break_date BETWEEN n.starts_at::date - 1 AND n.ends_at::date
+                    AND br.break_date + br.break_time < n.ends_at
+                    AND COALESCE(br.break_date + br.break_end, br.break_date + br.break_time + INTERVAL '15 minutes') > n.starts_at
+            )
+    """,
+    ("integer", "timestamp", "integer", "integer[]")
+)
 
 def insert_booking(barber_id, service_id, customer_name, appointment_time, email, phone, price, extra):
     """
@@ -23,22 +77,22 @@ def insert_booking(barber_id, service_id, customer_name, appointment_time, email
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return False, "Failed to connect to the database."
 
     try:
         cursor = conn.cursor()
 
-        # Check if there is an existing booking for the barber at the same time
-        check_query = """
-            SELECT COUNT(*) FROM Bookings
-            WHERE barber_id = %s AND appointment_time = %s;
-        """
-        cursor.execute(check_query, (barber_id, appointment_time))
-        (existing_bookings,) = cursor.fetchone()
+        # One booking or break write per barber at a time until the transaction ends, so the
+        # check below stays true until the insert commits
+        lock_barber_calendar(cursor, barber_id)
 
-        if existing_bookings > 0:
-            print(f"Barber {barber_id} is already booked at {appointment_time}.")
+        # Check if the booking, for its full duration, overlaps a booking or a break of the barber
+        execute_prepared(cursor, BOOKING_CONFLICTS, (barber_id, appointment_time, service_id, list(extra or [])))
+        (conflicts,) = cursor.fetchone()
+
+        if conflicts > 0:
+            logger.warning("Barber %s is already booked at %s.", barber_id, appointment_time)
             cursor.close()
             release_connection(conn)
             return False, "Time slot unavailable. Choose another time."
@@ -50,21 +104,26 @@ def insert_booking(barber_id, service_id, customer_name, appointment_time, email
         """
         # Execute the query with provided data
         cursor.execute(insert_query, (barber_id, service_id, customer_name, appointment_time, email, phone, price, extra))
+
+        # Tell the other workers, delivered only if the transaction commits
+        notify_invalidation(cursor, BOOKINGS, barber_id, appointment_time)
         
         # Commit the transaction
         conn.commit()
-        print("Booking inserted successfully.")
+        logger.info("Booking inserted successfully.")
+
+        # The barber's free slots on that day changed
+        apply_invalidation(BOOKINGS, barber_id, appointment_time)
 
         # Close the cursor and release the connection
         cursor.close()
         release_connection(conn)
-        print("Connection released successfully.")
+        logger.debug("Connection released successfully.")
         
         return True, "Booking created successfully."
 
     except Exception as e:
-        print(f"Error occurred while inserting booking: {e}")
-        traceback.print_exc()
+        logger.exception("Error occurred while inserting booking: %s", e)
         release_connection(conn)
         return False, "An error occurred while creating the booking."
 
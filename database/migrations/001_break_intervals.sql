@@ -0,0 +1,63 @@
+-- Store breaks as [break_time, break_end) intervals instead of one row per 15-minute slot.
+--
+-- Adds BarberBreaks.break_end, gives every existing slot row its end (start + 15 minutes), then
+-- merges the rows of a barber, date, type and booking that touch or overlap into one interval.
+-- Safe to run more than once. Run it before deploying the code that reads break_end:
+--
+--     psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f database/migrations/001_break_intervals.sql
+
+BEGIN;
+
+ALTER TABLE BarberBreaks ADD COLUMN IF NOT EXISTS break_end TIME;
+
+-- A slot at 23:45 ends at midnight, stored as 24:00 so the interval stays ordered
+UPDATE BarberBreaks
+SET break_end = CASE
+    WHEN break_time >= TIME '23:45' THEN TIME '24:00'
+    ELSE break_time + INTERVAL '15 minutes'
+END
+WHERE break_end IS NULL AND break_time IS NOT NULL;
+
+-- Gaps and islands: a row starts a new interval unless an earlier row of the group reaches it
+CREATE TEMP TABLE break_runs ON COMMIT DROP AS
+WITH ordered AS (
+    SELECT
+        break_id, barber_id, break_date, type, booking_id, break_time, break_end,
+        MAX(break_end) OVER (
+            PARTITION BY barber_id, break_date, type, booking_id
+            ORDER BY break_time, break_id
+            ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+        ) AS reached
+    FROM BarberBreaks
+    WHERE break_time IS NOT NULL
+),
+numbered AS (
+    SELECT
+        *,
+        SUM(CASE WHEN reached >= break_time THEN 0 ELSE 1 END) OVER (
+            PARTITION BY barber_id, break_date, type, booking_id
+            ORDER BY break_time, break_id
+        ) AS run
+    FROM ordered
+)
+SELECT
+    MIN(break_id) AS keep_id,
+    MIN(break_time) AS run_start,
+    MAX(break_end) AS run_end,
+    ARRAY_AGG(break_id) AS break_ids
+FROM numbered
+GROUP BY barber_id, break_date, type, booking_id, run
+HAVING COUNT(*) > 1;
+
+UPDATE BarberBreaks b
+SET break_time = r.run_start, break_end = r.run_end
+FROM break_runs r
+WHERE b.break_id = r.keep_id;
+
+DELETE FROM BarberBreaks b
+USING break_runs r
+WHERE b.break_id = ANY(r.break_ids) AND b.break_id <> r.keep_id;
+
+CREATE INDEX IF NOT EXISTS barberbreaks_barber_date_idx ON BarberBreaks (barber_id, break_date);
+
+COMMIT;
@@ -0,0 +1,29 @@
+-- Per-weekday working hours and weekly recurring breaks.
+--
+-- A weekday without a BarberWeeklySchedules row keeps the BarberSchedules hours, and Sunday stays
+-- off, so barbers are unaffected until they set a weekly schedule. Safe to run more than once:
+--
+--     psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f database/migrations/002_weekly_schedules.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS BarberWeeklySchedules (
+    barber_id INT REFERENCES Barbers(barber_id),
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+    start_time TIME,
+    end_time TIME,
+    is_off BOOLEAN DEFAULT FALSE,
+    PRIMARY KEY (barber_id, weekday)
+);
+
+CREATE TABLE IF NOT EXISTS BarberRecurringBreaks (
+    recurring_break_id SERIAL PRIMARY KEY,
+    barber_id INT REFERENCES Barbers(barber_id),
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS barberrecurringbreaks_barber_idx ON BarberRecurringBreaks (barber_id);
+
+COMMIT;
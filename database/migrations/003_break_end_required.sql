@@ -0,0 +1,22 @@
+-- Every break with a start has an end.
+--
+-- Gives the rows written without break_end since migration 001 (by workers still running the old
+-- code during the deploy, or by hand) the end of one 15-minute slot, then refuses new ones. Run it
+-- once every worker runs the code that writes break_end. Safe to run more than once:
+--
+--     psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f database/migrations/003_break_end_required.sql
+
+BEGIN;
+
+UPDATE BarberBreaks
+SET break_end = CASE
+    WHEN break_time >= TIME '23:45' THEN TIME '24:00'
+    ELSE break_time + INTERVAL '15 minutes'
+END
+WHERE break_end IS NULL AND break_time IS NOT NULL;
+
+-- break_time itself may be NULL on old rows, which every reader skips
+ALTER TABLE BarberBreaks DROP CONSTRAINT IF EXISTS barberbreaks_break_end_set;
+ALTER TABLE BarberBreaks ADD CONSTRAINT barberbreaks_break_end_set CHECK (break_time IS NULL OR break_end IS NOT NULL);
+
+COMMIT;
@@ -0,0 +1,112 @@
+import threading
+import weakref
+
+from psycopg2 import errors
+
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PreparedStatement:
+    """
+    A query that is parsed and planned once per connection and then executed by name.
+
+    The query uses $1, $2, ... placeholders, with the type of each parameter given in
+    `arg_types`, e.g. ("integer", "date").
+    """
+
+    __slots__ = ("name", "query", "arg_types")
+
+    def __init__(self, name, query, arg_types):
+        self.name = name
+        self.query = query
+        self.arg_types = tuple(arg_types)
+
+    def prepare_sql(self):
+        types = f"({', '.join(self.arg_types)})" if self.arg_types else ""
+        return f"PREPARE {self.name}{types} AS {self.query}"
+
+    def execute_sql(self):
+        params = f"({', '.join(['%s'] * len(self.arg_types))})" if self.arg_types else ""
+        return f"EXECUTE {self.name}{params}"
+
+
+_statements = {}
+_registry_lock = threading.Lock()
+
+# Names prepared on each connection. Keyed weakly, so a connection the pool closes and replaces
+# drops its entry, and its replacement prepares the statements again on first use.
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+_stats = {"prepares": 0, "invalidated": 0}
+
+
+def register_statement(name, query, arg_types=()):
+    """
+    Register a hot query under a name, typically at module import.
+
+    Parameters:
+    - name (str): Statement name, a plain SQL identifier.
+    - query (str): The SQL, with $1, $2, ... placeholders.
+    - arg_types (tuple): PostgreSQL type of each placeholder.
+
+    Returns:
+    - PreparedStatement: The registered statement, to pass to execute_prepared().
+    """
+    statement = PreparedStatement(name, query, arg_types)
+    with _registry_lock:
+        existing = _statements.get(name)
+        if existing is not None:
+            if (existing.query, existing.arg_types) != (statement.query, statement.arg_types):
+                raise ValueError(f"prepared statement {name!r} is already registered with a different query")
+            return existing
+        _statements[name] = statement
+    return statement
+
+
+def _prepared_names(conn):
+    with _prepared_lock:
+        names = _prepared.get(conn)
+        if names is None:
+            names = _prepared[conn] = set()
+        return names
+
+
+def execute_prepared(cursor, statement, params=()):
+    """
+    Execute a registered statement on the cursor, preparing it on the cursor's connection first if needed.
+
+    Parameters:
+    - cursor: A cursor of a pooled connection. Results are fetched from it as usual.
+    - statement (PreparedStatement): The statement returned by register_statement().
+    - params (tuple): The parameter values, in placeholder order.
+    """
+    # cursor.connection is the real connection, also when it was handed out by a unit of work
+    names = _prepared_names(cursor.connection)
+    if statement.name not in names:
+        # PREPARE is not undone by a rollback, the statement lives as long as the session
+        cursor.execute(statement.prepare_sql())
+        with _prepared_lock:
+            names.add(statement.name)
+            _stats["prepares"] += 1
+
+    try:
+        cursor.execute(statement.execute_sql(), params)
+    except errors.InvalidSqlStatementName:
+        # The session lost its statements (e.g. DISCARD ALL), forget them so the next call prepares again
+        with _prepared_lock:
+            names.clear()
+            _stats["invalidated"] += 1
+        raise
+
+
+def get_prepared_statement_stats():
+    """Return the registry metrics: statements registered, connections tracked, prepares and invalidations."""
+    with _prepared_lock:
+        return {
+            "registered": len(_statements),
+            "connections": len(_prepared),
+            **_stats,
+        }
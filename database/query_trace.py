@@ -0,0 +1,370 @@
+from collections import deque
+from datetime import datetime, timezone
+import os
+import re
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+from psycopg2 import extensions
+
+from srvices.observability.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+slow_query_logger = get_logger("database.slow_queries")
+
+# Trace every statement of the pooled connections: "1" to turn on. Off, the cursors only count
+# statements for /metrics and none of this module runs
+DB_TRACE = os.getenv("DB_TRACE", "0") == "1"
+
+# Statements slower than this are written to the slow query log
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
+# "1" to start with EXPLAIN on: slow statements get their plan in the slow query log. It can also
+# be switched on and off at runtime through POST /query_stats/explain
+DB_SLOW_QUERY_EXPLAIN = os.getenv("DB_SLOW_QUERY_EXPLAIN", "0") == "1"
+
+# Each EXPLAIN costs one more round trip, and slow statements pile up exactly when the database
+# is struggling: at most this many EXPLAINs per minute and worker, the other slow statements
+# are logged without a plan
+DB_SLOW_QUERY_EXPLAINS_PER_MINUTE = int(os.getenv("DB_SLOW_QUERY_EXPLAINS_PER_MINUTE", "10"))
+
+# Statements kept in the top table, and how long one window of the table lasts. The table
+# covers the current and the previous window, so old traffic rolls out of it
+DB_TRACE_TOP = int(os.getenv("DB_TRACE_TOP", "20"))
+DB_TRACE_WINDOW_SECONDS = float(os.getenv("DB_TRACE_WINDOW_SECONDS", "600"))
+
+# Distinct statements tracked per window, and slow statements kept for /query_stats
+DB_TRACE_MAX_STATEMENTS = 1000
+SLOW_QUERIES_KEPT = 50
+
+# Caller reported for statements that don't come from the project's code
+UNKNOWN_CALLER = "unknown"
+
+_DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_DIR = os.path.dirname(_DATABASE_DIR)
+
+# The connection and cursor plumbing, never reported as the caller of a statement
+_PLUMBING_FILES = frozenset(
+    os.path.join(_DATABASE_DIR, name)
+    for name in ("cursors.py", "database_conn.py", "prepared_statements.py", "query_trace.py")
+)
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"([(\[])\s*\?(?:\s*,\s*\?)+\s*([)\]])")
+_ROW_LIST = re.compile(r"(\((?:\?|\.\.\.)\))(?:\s*,\s*\((?:\?|\.\.\.)\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Statements EXPLAIN accepts
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "VALUES", "EXECUTE")
+
+_normalized = {}
+_NORMALIZED_KEPT = 1024
+
+
+def normalize_sql(query):
+    """
+    Reduce a statement to its shape, so every call of the same query is counted together.
+
+    Literals and placeholders become ?, lists of them (IN lists, execute_values rows) become
+    "...", comments are dropped and whitespace collapsed.
+
+    Parameters:
+    - query (str or bytes): The SQL as passed to execute().
+
+    Returns:
+    - str: The normalized statement.
+    """
+    normalized = _normalized.get(query)
+    if normalized is not None:
+        return normalized
+
+    sql = query.decode("utf-8", "replace") if isinstance(query, bytes) else str(query)
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _VALUE_LIST.sub(r"\1...\2", sql)
+    sql = _ROW_LIST.sub(r"\1, ...", sql)
+    normalized = _WHITESPACE.sub(" ", sql).strip()
+
+    # Statements with inlined values (execute_values) all differ, don't let them fill the memory
+    if len(_normalized) >= _NORMALIZED_KEPT:
+        _normalized.clear()
+    _normalized[query] = normalized
+    return normalized
+
+
+def count_params(vars):
+    """Return the number of parameters passed with a statement."""
+    return len(vars) if isinstance(vars, (tuple, list, dict)) else 0
+
+
+def find_caller():
+    """
+    Return the function that ran the statement being traced, "module.function".
+
+    The first database/* function up the stack wins, the cursor and connection plumbing is
+    skipped. Statements run from elsewhere in the project (e.g. the cache warm-up) are
+    reported with their own function, anything else as UNKNOWN_CALLER.
+    """
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename not in _PLUMBING_FILES and filename.startswith(_PROJECT_DIR):
+            caller = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+            if filename.startswith(_DATABASE_DIR):
+                return caller
+            if fallback is None:
+                fallback = caller
+        frame = frame.f_back
+    return fallback or UNKNOWN_CALLER
+
+
+def explain(cursor, query, vars):
+    """
+    Return the plan of a statement that just ran on `cursor`, or None if it can't be explained.
+
+    EXPLAIN runs on a separate cursor of the same connection, so the caller's results are left
+    untouched, and inside a savepoint, so a failure doesn't abort the caller's transaction.
+    EXPLAIN without ANALYZE never executes the statement again.
+    """
+    conn = cursor.connection
+    if not normalize_sql(query).upper().startswith(_EXPLAINABLE):
+        return None
+    # The savepoint needs the transaction the statement opened (autocommit connections have none)
+    if conn.info.transaction_status != extensions.TRANSACTION_STATUS_INTRANS:
+        return None
+
+    prefix = b"EXPLAIN " if isinstance(query, bytes) else "EXPLAIN "
+    explain_cursor = extensions.cursor(conn)
+    try:
+        explain_cursor.execute("SAVEPOINT query_trace_explain")
+        try:
+            explain_cursor.execute(prefix + query, vars)
+            plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+        except Exception as e:
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT query_trace_explain")
+            plan = None
+            logger.warning("Could not explain a slow query: %s", e)
+        explain_cursor.execute("RELEASE SAVEPOINT query_trace_explain")
+        return plan
+    except Exception as e:
+        logger.error("Error occurred while explaining a slow query: %s", e)
+        return None
+    finally:
+        explain_cursor.close()
+
+
+class StatementStats:
+    """What one normalized statement cost during a window."""
+
+    __slots__ = ("calls", "errors", "seconds", "max_seconds", "rows", "params", "callers")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.params = 0
+        self.callers = {}
+
+    def add(self, other):
+        self.calls += other.calls
+        self.errors += other.errors
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.rows += other.rows
+        self.params = max(self.params, other.params)
+        for caller, calls in other.callers.items():
+            self.callers[caller] = self.callers.get(caller, 0) + calls
+
+
+class QueryTrace:
+    """
+    The traced statements of this process: a top table of the most expensive ones, by total
+    time over the current and the previous window, and the most recent slow statements.
+    """
+
+    def __init__(self, window_seconds=DB_TRACE_WINDOW_SECONDS, slow_query_ms=DB_SLOW_QUERY_MS,
+                 explain=DB_SLOW_QUERY_EXPLAIN, explains_per_minute=DB_SLOW_QUERY_EXPLAINS_PER_MINUTE):
+        self.window_seconds = window_seconds
+        self.slow_seconds = slow_query_ms / 1000
+        self.explain = explain
+        self.explains_per_minute = explains_per_minute
+        self._explained = deque()
+        self._explains_skipped = 0
+        self._current = {}
+        self._previous = {}
+        self._window_started = time.monotonic()
+        self._slow = deque(maxlen=SLOW_QUERIES_KEPT)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def _roll(self, now):
+        if now - self._window_started >= 2 * self.window_seconds:
+            # Nothing ran during a whole window
+            self._previous = {}
+            self._current = {}
+            self._window_started = now
+        elif now - self._window_started >= self.window_seconds:
+            self._previous = self._current
+            self._current = {}
+            self._window_started += self.window_seconds
+
+    def _may_explain(self):
+        # Take one EXPLAIN of the budget of the last minute, if any is left
+        if not self.explain:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            while self._explained and now - self._explained[0] >= 60:
+                self._explained.popleft()
+            if len(self._explained) >= self.explains_per_minute:
+                self._explains_skipped += 1
+                return False
+            self._explained.append(now)
+            return True
+
+    def set_explain(self, enabled):
+        """
+        Switch EXPLAIN of slow statements on or off in this process, without a restart.
+
+        Parameters:
+        - enabled (bool): True to add plans to the slow query log.
+        """
+        with self._lock:
+            self.explain = enabled
+            self._explained.clear()
+
+    def record(self, cursor, query, vars, params, seconds, succeeded, explainable=True):
+        """
+        Count one statement, and log it if it was slow.
+
+        Parameters:
+        - cursor: The cursor it ran on.
+        - query (str or bytes): The SQL as passed to execute().
+        - vars: Its parameters, only used to explain it.
+        - params (int): The number of parameters.
+        - seconds (float): How long it took.
+        - succeeded (bool): False if it raised.
+        - explainable (bool): False when `vars` can't be used to explain it (executemany).
+        """
+        statement = normalize_sql(query)
+        caller = find_caller()
+        rows = max(cursor.rowcount, 0) if succeeded else 0
+
+        with self._lock:
+            self._roll(time.monotonic())
+            stats = self._current.get(statement)
+            if stats is None:
+                if len(self._current) >= DB_TRACE_MAX_STATEMENTS:
+                    self._dropped += 1
+                else:
+                    stats = self._current[statement] = StatementStats()
+            if stats is not None:
+                stats.calls += 1
+                stats.errors += not succeeded
+                stats.seconds += seconds
+                stats.max_seconds = max(stats.max_seconds, seconds)
+                stats.rows += rows
+                stats.params = max(stats.params, params)
+                stats.callers[caller] = stats.callers.get(caller, 0) + 1
+
+        if seconds >= self.slow_seconds:
+            plan = explain(cursor, query, vars) if succeeded and explainable and self._may_explain() else None
+            self._log_slow(statement, caller, params, rows, seconds, succeeded, plan)
+
+    def _log_slow(self, statement, caller, params, rows, seconds, succeeded, plan):
+        # Parameter values are not kept, they hold customer data
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "statement": statement,
+            "caller": caller,
+            "params": params,
+            "rows": rows,
+            "ms": round(seconds * 1000, 2),
+            "failed": not succeeded,
+            "plan": plan,
+        }
+        with self._lock:
+            self._slow.append(entry)
+        slow_query_logger.warning(
+            "Slow query took %.1f ms in %s: %s", entry["ms"], caller, statement,
+            extra={key: entry[key] for key in ("statement", "caller", "params", "rows", "ms", "failed", "plan")},
+        )
+
+    def top(self, limit=DB_TRACE_TOP):
+        """
+        Return the most expensive statements, by total time over the current and the previous window.
+
+        Parameters:
+        - limit (int): How many statements to return.
+
+        Returns:
+        - list: [{"statement", "calls", "errors", "total_ms", "mean_ms", "max_ms", "rows", "params", "callers"}]
+        """
+        with self._lock:
+            self._roll(time.monotonic())
+            merged = {}
+            for window in (self._previous, self._current):
+                for statement, stats in window.items():
+                    total = merged.get(statement)
+                    if total is None:
+                        total = merged[statement] = StatementStats()
+                    total.add(stats)
+
+        ranked = sorted(merged.items(), key=lambda item: item[1].seconds, reverse=True)[:limit]
+        return [
+            {
+                "statement": statement,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "total_ms": round(stats.seconds * 1000, 2),
+                "mean_ms": round(stats.seconds * 1000 / stats.calls, 3),
+                "max_ms": round(stats.max_seconds * 1000, 2),
+                "rows": stats.rows,
+                "params": stats.params,
+                "callers": sorted(stats.callers, key=stats.callers.get, reverse=True),
+            }
+            for statement, stats in ranked
+        ]
+
+    def slow_queries(self):
+        """Return the most recent slow statements, newest first."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def stats(self):
+        """
+        Return the statements tracked in each window, the ones left out once the window was full,
+        and the slow statements not explained because the EXPLAIN budget was spent.
+        """
+        with self._lock:
+            return {
+                "statements": len(self._current),
+                "previous_statements": len(self._previous),
+                "dropped": self._dropped,
+                "explains_skipped": self._explains_skipped,
+            }
+
+    def reset(self):
+        """Forget every traced statement, e.g. before measuring a change."""
+        with self._lock:
+            self._current = {}
+            self._previous = {}
+            self._window_started = time.monotonic()
+            self._slow.clear()
+            self._dropped = 0
+            self._explains_skipped = 0
+
+
+query_trace = QueryTrace()
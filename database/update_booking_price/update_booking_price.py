@@ -1,15 +1,18 @@
 
-import traceback
 from database.database_conn import get_connection, release_connection
+from srvices.observability.logger import get_logger
 
+logger = get_logger(__name__)
 
-def update_booking_price(booking_id, new_price):
+
+def update_booking_price(booking_id, new_price, barber_id):
     """
-    Update the price of a booking in the Bookings table.
+    Update the price of a booking in the Bookings table, if it is one of barber_id's bookings.
 
     Parameters:
     - booking_id (int): The ID of the booking to be updated.
     - new_price (float): The new price to set for the booking.
+    - barber_id (int): The barber the booking must belong to.
 
     Returns:
     - A tuple (success, message), where success is a boolean indicating if the price was updated,
@@ -17,21 +20,21 @@ def update_booking_price(booking_id, new_price):
     """
     conn = get_connection()
     if not conn:
-        print("Failed to connect to the database")
+        logger.error("Failed to connect to the database")
         return False, "Failed to connect to the database."
 
     try:
         cursor = conn.cursor()
 
-        # Check if the booking exists
+        # Check if the booking exists, other barbers' bookings are not found
         check_query = """
-            SELECT COUNT(*) FROM Bookings WHERE booking_id = %s;
+            SELECT COUNT(*) FROM Bookings WHERE booking_id = %s AND barber_id = %s;
         """
-        cursor.execute(check_query, (booking_id,))
+        cursor.execute(check_query, (booking_id, barber_id))
         (booking_exists,) = cursor.fetchone()
 
         if booking_exists == 0:
-            print(f"Booking ID {booking_id} does not exist.")
+            logger.warning("Booking ID %s does not exist.", booking_id)
             cursor.close()
             release_connection(conn)
             return False, "Booking ID does not exist."
@@ -40,24 +43,24 @@ def update_booking_price(booking_id, new_price):
         update_query = """
             UPDATE Bookings
             SET price = %s
-            WHERE booking_id = %s;
+            WHERE booking_id = %s AND barber_id = %s;
         """
-        # Execute the query with the new price and booking ID
-        cursor.execute(update_query, (new_price, booking_id))
+        # Execute the query with the new price and booking ID. No cache holds booking prices,
+        # so there is nothing to invalidate
+        cursor.execute(update_query, (new_price, booking_id, barber_id))
 
         # Commit the transaction
         conn.commit()
-        print(f"Price updated successfully for booking ID {booking_id}.")
+        logger.info("Price updated successfully for booking ID %s.", booking_id)
 
         # Close the cursor and release the connection
         cursor.close()
         release_connection(conn)
-        print("Connection released successfully.")
+        logger.debug("Connection released successfully.")
         
         return True, "Booking price updated successfully."
 
     except Exception as e:
-        print(f"Error occurred while updating booking price: {e}")
-        traceback.print_exc()
+        logger.exception("Error occurred while updating booking price: %s", e)
         release_connection(conn)
         return False, "An error occurred while updating the booking price."
\ No newline at end of file
@@ -1,40 +1,42 @@
 
-import hashlib
-import os
-
 import psycopg2
 
-from database.database_conn import get_connection
+from database.database_conn import get_connection, release_connection
+from srvices.auth.passwords import PasswordHashingBusyError, check_password, hash_password
+from srvices.observability.logger import get_logger
 
+logger = get_logger(__name__)
 
-def hash_password(password):
-    salt = os.urandom(16)  # Generate a new salt
-    # Hash the password using the salt
-    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
-    return salt, password_hash
 
 def barber_exists(barber_id):
     conn = get_connection()
     cur = conn.cursor()
 
     try:
-        cur.execute('SELECT * FROM barber_login WHERE barber_id = %s', (barber_id,))
+        cur.execute('SELECT COUNT(*) FROM barber_login WHERE barber_id = %s', (barber_id,))
         count = cur.fetchone()[0]
         return count > 0  # Returns True if exists, False otherwise
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 
 def create_user(barber_id, username, password):
     if barber_exists(barber_id):
         return "barber_exists"  # Barber ID already exists
 
+    try:
+        # Hashed on the hashing pool. The request's connection, checked out by barber_exists(),
+        # stays held meanwhile, PASSWORD_HASH_WORKERS bounds how many hashes run at once
+        salt, password_hash = hash_password(password)
+    except PasswordHashingBusyError as e:
+        logger.warning("Signup turned away: %s", e)
+        return "busy"
+
     conn = get_connection()
     cur = conn.cursor()
 
     try:
-        salt, password_hash = hash_password(password)
         cur.execute('INSERT INTO barber_login (barber_id, username, password_hash, salt) VALUES (%s, %s, %s, %s)',
                     (barber_id, username, password_hash, salt))
         conn.commit()
@@ -44,7 +46,7 @@ def create_user(barber_id, username, password):
         return "username_exists"  # Username already exists
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 
 
@@ -61,18 +63,26 @@ def verify_user(username, password):
 
         password_hash, salt, barber_id = result
 
-        if isinstance(password_hash, memoryview):
-            password_hash = bytes(password_hash)
-        if isinstance(salt, memoryview):
-            salt = bytes(salt)
-
-        provided_password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
+        try:
+            matches, needs_rehash = check_password(password, salt, password_hash)
+        except PasswordHashingBusyError as e:
+            logger.warning("Login turned away: %s", e)
+            return "busy", None
 
-        if provided_password_hash == password_hash:
-            return "login_success", barber_id  # Return barber_id on success
-        else:
+        if not matches:
             return "invalid_password", None  # Incorrect password
+
+        # Move the stored hash to the current work factor while we know the password
+        if needs_rehash:
+            try:
+                new_salt, new_password_hash = hash_password(password)
+                cur.execute('UPDATE barber_login SET password_hash = %s, salt = %s WHERE username = %s',
+                            (new_password_hash, new_salt, username))
+                conn.commit()
+            except PasswordHashingBusyError:
+                pass  # Upgraded on a later login
+
+        return "login_success", barber_id  # Return barber_id on success
     finally:
         cur.close()
-        conn.close()
-
+        release_connection(conn)
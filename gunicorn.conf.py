@@ -0,0 +1,68 @@
+# Production server: gunicorn -c gunicorn.conf.py
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Every worker writes its metrics to files in this directory and /metrics adds them all up.
+# Set before the app is imported, emptied at startup so a restart doesn't add up old workers
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"barber_booking_metrics_{os.getpid()}")
+)
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+wsgi_app = "wsgi:app"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8080")
+
+# One process per core, each serving requests on a few threads while others wait on the database.
+# Every worker has its own connection pool of up to DB_POOL_MAX connections
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import the app and load the catalog once in the master, workers share that memory copy-on-write
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+
+def when_ready(server):
+    # The master used the pool to preload the app, close it before any worker is forked
+    from database.database_conn import close_connection_pool, reset_connection_pool
+    close_connection_pool()
+    reset_connection_pool()
+
+
+def post_fork(server, worker):
+    # Database connections and the listener thread don't survive a fork, every worker opens its own
+    # and warms its caches in the background, /ready answers 200 once done
+    from database.database_conn import reset_connection_pool
+    from srvices.cache.invalidation import start_invalidation_listener
+    from srvices.cache.warmup import start_warm_up
+    reset_connection_pool()
+    start_invalidation_listener()
+    start_warm_up()
+
+
+def worker_exit(server, worker):
+    # Graceful shutdown: close this worker's connections once its requests are done
+    from database.database_conn import close_connection_pool
+    close_connection_pool()
+
+
+def child_exit(server, worker):
+    # Runs in the master for every worker that exited, crashed ones too: its live gauges
+    # (connections in use, cache entries) stop counting, its counters are kept
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
@@ -1,5 +1,6 @@
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from routes.categories_and_services import categories_and_services_bp
 from routes.auth import login_bp, signup_bp, protected_bp
 from routes.booking import insert_booking_bp
@@ -12,30 +13,126 @@ from routes.barber_exceptions import get_barber_exceptions_bp, insert_barber_exc
 from routes.over_all import over_all_bp
 from routes.available_slots import available_slots_bp
 from routes.update_price import update_price_bp
-# Flask app initialization
-app = Flask(__name__)
-# Enable CORS for all origins and allow credentials
-CORS(app, supports_credentials=True, origins=["*"])
-
-app.register_blueprint(categories_and_services_bp)
-app.register_blueprint(login_bp)
-app.register_blueprint(signup_bp)
-app.register_blueprint(protected_bp)
-app.register_blueprint(barbers_and_slots_bp)
-app.register_blueprint(insert_booking_bp)
-app.register_blueprint(set_barber_break_slots_bp)
-app.register_blueprint(get_todays_bookings_bp)
-app.register_blueprint(delete_barber_break_bp)
-app.register_blueprint(get_barber_breaks_bp)
-app.register_blueprint(add_barber_breaks_bp)
-app.register_blueprint(update_barber_schedule_bp)
-app.register_blueprint(get_barber_schedule_bp)
-app.register_blueprint(get_barber_exceptions_bp)
-app.register_blueprint(insert_barber_exception_bp)
-app.register_blueprint(over_all_bp)
-app.register_blueprint(available_slots_bp)
-app.register_blueprint(update_price_bp)
+from routes.cache_stats import cache_stats_bp
+from routes.pool_stats import pool_stats_bp
+from routes.readiness import readiness_bp
+from routes.metrics import metrics_bp
+from routes.query_stats import query_stats_bp
+from database.database_conn import DB_POOL_RETRY_AFTER, init_unit_of_work
+from srvices.auth.throttle import TRUSTED_PROXY_HOPS
+from srvices.cache.catalog import refresh_catalog
+from srvices.cache.invalidation import start_invalidation_listener
+from srvices.cache.warmup import start_warm_up
+from srvices.observability.metrics import init_request_metrics
+from srvices.observability.request_log import REQUEST_LOG_PATH, init_request_log
+
+# Every blueprint of the API, registered on each app built by create_app()
+BLUEPRINTS = (
+    categories_and_services_bp,
+    login_bp,
+    signup_bp,
+    protected_bp,
+    barbers_and_slots_bp,
+    insert_booking_bp,
+    set_barber_break_slots_bp,
+    get_todays_bookings_bp,
+    delete_barber_break_bp,
+    get_barber_breaks_bp,
+    add_barber_breaks_bp,
+    update_barber_schedule_bp,
+    get_barber_schedule_bp,
+    get_barber_exceptions_bp,
+    insert_barber_exception_bp,
+    over_all_bp,
+    available_slots_bp,
+    update_price_bp,
+    cache_stats_bp,
+    pool_stats_bp,
+    readiness_bp,
+    metrics_bp,
+    query_stats_bp,
+)
+
+
+def pool_exhausted_response(response):
+    # No database connection became free in time: ask the client to retry instead of failing
+    if g.get("db_pool_exhausted"):
+        response = jsonify({"error": "The server is busy, please retry shortly."})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(DB_POOL_RETRY_AFTER)
+    return response
+
+
+def create_app(config=None):
+    """
+    Build the Flask application.
+
+    Parameters:
+    - config (dict, optional): Flask config values. Besides Flask's own settings:
+      - WARM_CATALOG (bool, default True): load the service catalog before returning, so the
+        first requests don't wait for it (and preloaded gunicorn workers share it).
+      - START_INVALIDATION_LISTENER (bool, default True): start the cache invalidation listener
+        thread. Turned off when the app is built before forking, each worker starts its own.
+      - WARM_START (bool, default True): open the pool's connections and compute the first days
+        of availability in the background, /ready answers 200 once done. Per process, like the listener.
+      - REQUEST_METRICS (bool, default True): measure every request for /metrics and send the
+        breakdown of its time back in a Server-Timing header.
+      - REQUEST_LOG (str, default REQUEST_LOG_PATH): file to record every request to, for
+        benchmarks.load_harness to replay. Empty to record nothing.
+      - PROXY_HOPS (int, default TRUSTED_PROXY_HOPS): proxies in front of the app. Their
+        X-Forwarded-For and X-Forwarded-Proto entries are trusted, so request.remote_addr is the
+        client's address, which the login throttle counts attempts by.
+
+    Returns:
+    - Flask: The application.
+    """
+    app = Flask(__name__)
+    app.config.update(
+        WARM_CATALOG=True, START_INVALIDATION_LISTENER=True, WARM_START=True,
+        REQUEST_METRICS=True, REQUEST_LOG=REQUEST_LOG_PATH, PROXY_HOPS=TRUSTED_PROXY_HOPS
+    )
+    if config:
+        app.config.update(config)
+
+    # Behind a load balancer, take the client's address from the trusted X-Forwarded-For entries
+    if app.config["PROXY_HOPS"]:
+        hops = app.config["PROXY_HOPS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Enable CORS for all origins and allow credentials
+    CORS(app, supports_credentials=True, origins=["*"])
+
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
+
+    # Time every request. Registered first, so its after_request runs last and sees the commit
+    if app.config["REQUEST_METRICS"]:
+        init_request_metrics(app)
+
+    # Record the traffic, to replay a peak offline. Registered before the unit of work, so its
+    # after_request records the final status
+    init_request_log(app, app.config["REQUEST_LOG"])
+
+    # One database connection and transaction per request, committed or rolled back once at the end
+    init_unit_of_work(app)
+
+    app.after_request(pool_exhausted_response)
+
+    # Load the service catalog once at startup
+    if app.config["WARM_CATALOG"]:
+        refresh_catalog()
+
+    # Apply cache invalidations published by the other workers
+    if app.config["START_INVALIDATION_LISTENER"]:
+        start_invalidation_listener()
+
+    # Warm the pool and the availability caches before the load balancer sends traffic
+    if app.config["WARM_START"]:
+        start_warm_up()
+
+    return app
 
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=8080)
+    # Development server, production runs gunicorn -c gunicorn.conf.py
+    create_app().run(debug=True, host="0.0.0.0", port=8080)
@@ -1,15 +1,31 @@
 
 # route to create account
 from datetime import datetime
-from flask import Blueprint, jsonify, request
-import jwt
+import math
+from flask import Blueprint, g, jsonify, request
 import pytz
 
-from database.get_barber_name_by_id.get_barber_name_by_id import get_barber_name_by_id
 from database.userAccount.userAccounts import create_user, verify_user
+from srvices.auth.barber_auth import barber_required
+from srvices.auth.passwords import PASSWORD_HASH_QUEUE_TIMEOUT
+from srvices.auth.throttle import ip_throttle, username_throttle
 from srvices.jwt.jwt_models import generate_token
 finland_tz = pytz.timezone('Europe/Helsinki')
-SECRET_KEY = "ndwdkw-defdef-fefefe"
+
+
+def too_many_attempts(retry_after):
+    response = jsonify({'error': 'Too many attempts, please try again later.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def hashing_busy():
+    response = jsonify({'error': 'The server is busy, please retry shortly.'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, math.ceil(PASSWORD_HASH_QUEUE_TIMEOUT)))
+    return response
+
 
 signup_bp = Blueprint('signup', __name__)
 
@@ -22,6 +38,11 @@ def signup():
     if not barber_id or not username or not password:
         return jsonify({'error': 'Barber ID, username, and password are required!'}), 400
 
+    # Refuse floods before any password is hashed
+    retry_after = ip_throttle.attempt(request.remote_addr)
+    if retry_after:
+        return too_many_attempts(retry_after)
+
     result = create_user(barber_id, username, password)
 
     if result == "success":
@@ -30,6 +51,8 @@ def signup():
         return jsonify({'error': 'Barber ID already exists!'}), 409
     elif result == "username_exists":
         return jsonify({'error': 'Username already exists!'}), 409
+    elif result == "busy":
+        return hashing_busy()
 
 
 login_bp = Blueprint('login_bp', __name__)
@@ -43,63 +66,43 @@ def login():
     if not username or not password:
         return jsonify({'error': 'Username and password are required!'}), 400
 
+    # Refuse floods before any password is hashed
+    retry_after = ip_throttle.attempt(request.remote_addr) or username_throttle.attempt(username)
+    if retry_after:
+        return too_many_attempts(retry_after)
+
     result, barber_id = verify_user(username, password) 
 
     if result == "login_success":
+        username_throttle.reset(username)
         token = generate_token(barber_id) 
         return jsonify({'message': 'Login successful!', 'token': token}), 200
     elif result == "user_not_found":
         return jsonify({'error': 'Username does not exist!'}), 404
     elif result == "invalid_password":
         return jsonify({'error': 'Incorrect password!'}), 401
+    elif result == "busy":
+        return hashing_busy()
     
 
 
 protected_bp = Blueprint('protected_bp', __name__)
 
 @protected_bp.route('/protected', methods=['GET'])
+@barber_required
 def protected_route():
-    # Get the token from the Authorization header
-    token = request.headers.get('Authorization')
-    
-    if not token:
-        return jsonify({'message': 'Token is missing!'}), 401
-    
-    try:
-        # Split the token from "Bearer <token>"
-        token = token.split(" ")[1]
-        data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-
-        # Get the expiration timestamp from the token
-        exp_timestamp = data['exp']
-
-        # Convert the UTC expiration time to Finland time
-        utc_expiration = datetime.utcfromtimestamp(exp_timestamp)
-        finland_expiration = utc_expiration.replace(tzinfo=pytz.utc).astimezone(finland_tz)
-
-        # Format the expiration time for Finland
-        exp = finland_expiration.strftime('%Y-%m-%d %H:%M:%S')
-
-        # Extract barber_id from the decoded JWT data
-        barber_id = data.get('barber_id')
-
-        if not barber_id:
-            return jsonify({'message': 'Barber ID not found in token!'}), 400
-
-        # Fetch the barber's name using the barber_id
-        barber_name = get_barber_name_by_id(barber_id)
-
-        if not barber_name:
-            return jsonify({'message': 'Barber not found!'}), 404
+    # Token and barber were checked by barber_required, without any query
+    exp_timestamp = g.token_claims['exp']
 
-        return jsonify({
-            'barber_id': barber_id,
-            'barber_name': barber_name,
-            'expiration_date': exp  
-        })
+    # Convert the UTC expiration time to Finland time
+    utc_expiration = datetime.utcfromtimestamp(exp_timestamp)
+    finland_expiration = utc_expiration.replace(tzinfo=pytz.utc).astimezone(finland_tz)
 
-    except jwt.ExpiredSignatureError:
-        return jsonify({'message': 'Token has expired!'}), 401
-    except jwt.InvalidTokenError:
-        return jsonify({'message': 'Token is invalid!'}), 401
+    # Format the expiration time for Finland
+    exp = finland_expiration.strftime('%Y-%m-%d %H:%M:%S')
 
+    return jsonify({
+        'barber_id': g.barber.barber_id,
+        'barber_name': g.barber.name,
+        'expiration_date': exp  
+    })
@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta  # Correct import for timedelta
 from flask import Blueprint, jsonify, request
 
-from database.get_barber_data.fetch_barber_data_from_db import fetch_barber_data_from_db
-from database.get_barbers_for_service.get_barbers_for_service import get_barbers_for_service
-from database.get_bookings_for_barber.get_bookings_for_barber import get_bookings_for_barber
-from database.get_service_id.get_service_id import get_service_id
-from database.insert_barber_break_slot.insert_barber_break_slot import insert_barber_break_slot
-from srvices.bookings.barbers_slots_main import generate_barber_specific_slots_with_bookings
+from database.get_barber_data.fetch_barber_data_from_db import fetch_barber_dates
+from database.insert_barber_break_slot.insert_barber_break_slot import insert_barber_breaks
+from srvices.bookings.availability import get_barber_calendar_slots
+from srvices.bookings.day_occupancy import BREAK_SLOT_MINUTES, MINUTE_LABELS, minute_of_day
+from srvices.auth.barber_auth import authorize_barber, barber_required
+from srvices.cache.catalog import get_catalog
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 barbers_and_slots_bp = Blueprint('barbers_and_slots_bp', __name__)
 
@@ -23,8 +26,13 @@ def get_barbers_and_slots():
         if not service_name or not isinstance(service_name, list) or len(service_name) == 0:
             return jsonify({"error": "'service_name' must be a non-empty array."}), 400
 
+        # Services, barbers and prices all come from one catalog snapshot, without any query
+        catalog = get_catalog()
+        if catalog is None:
+            return jsonify({"error": "An error occurred while fetching barbers."}), 500
+
         # Get the barbers for the given service
-        barbers_data = get_barbers_for_service(service_names=service_name)
+        barbers_data = catalog.barbers_for_services(service_name)
 
         # Check if the call to the database returned an error
         if barbers_data is None:
@@ -40,20 +48,26 @@ def get_barbers_and_slots():
         estimated_time_minutes = int(estimated_time.total_seconds() / 60) if isinstance(estimated_time, timedelta) else estimated_time
 
         # Fetch the service ID for the given category and service
-        service_id = get_service_id(service_name)
+        service_id = catalog.service_ids_for_names(service_name)
 
         if not service_id:
             return jsonify({"error": "Service ID not found."}), 404
 
-        # Fetch data from the database for time slot generation and prices
-        barber_schedules, barber_dates, existing_bookings, exceptions, barber_prices = fetch_barber_data_from_db(service_ids=service_id)
+        barber_prices = catalog.total_prices(barber_ids, service_id)
 
-        # Generate time slots
-        time_slots_by_barber = generate_barber_specific_slots_with_bookings(
-            barber_schedules, barber_dates, existing_bookings, barber_ids=barber_ids, 
-            gap_minutes=gap_minutes, exceptions=exceptions, service_duration_minutes=estimated_time_minutes
+        # Fetch the date ranges, the slots themselves come from the availability cache
+        barber_dates = fetch_barber_dates(barber_ids)
+
+        if barber_dates is None:
+            return jsonify({"error": "An error occurred while fetching barber data."}), 500
+
+        # Slot start minutes for all barbers and days, computed in one batch for cache misses
+        time_slots_by_barber = get_barber_calendar_slots(
+            barber_ids, barber_dates, estimated_time_minutes, gap_minutes=gap_minutes
         )
-        print("ssssss", existing_bookings)
+
+        if time_slots_by_barber is None:
+            return jsonify({"error": "An error occurred while fetching barber data."}), 500
 
         # Prepare the final response
         response = {
@@ -64,8 +78,8 @@ def get_barbers_and_slots():
                 "estimated_time": estimated_time,
                 "time_slots": {
                     barber_id: {
-                        day: [{"Time": slot[0].strftime('%H:%M')} for slot in slots]
-                        for day, slots in days.items()
+                        day: [{"Time": MINUTE_LABELS[start]} for start in starts]
+                        for day, starts in days.items()
                     } for barber_id, days in time_slots_by_barber.items()
                 }
             }
@@ -82,33 +96,36 @@ set_barber_break_slots_bp = Blueprint('set_barber_break_slots_bp', __name__)
 
 # Route to set barber break time 
 @set_barber_break_slots_bp.route('/set_barber_break_slots', methods=['POST'])
+@barber_required
 def set_barber_break_slots():
     try:
         data = request.json
-        barber_id = data['barber_id']
-        break_date = datetime.fromisoformat(data['break_date']).date()
-        break_slots = data['break_slots'] 
-
-        # Ensure that the time slots are valid and don't overlap with existing bookings
-        existing_bookings = get_bookings_for_barber(barber_id, break_date)
-        for slot in break_slots:
-            break_time = datetime.combine(break_date, datetime.strptime(slot, "%H:%M").time())
-
-            # Check if the selected break slot overlaps with existing bookings
-            for booking in existing_bookings:
-                appointment_time = booking['appointment_time']
-                service_duration = timedelta(minutes=booking['service_duration']) 
-                booking_end_time = appointment_time + service_duration
-
-                if break_time >= appointment_time and break_time < booking_end_time:
-                    return jsonify({"error": f"Break time {slot} overlaps with an existing booking."}), 409
-
-        # Insert the break slots into the BarberBreaks table
-        for slot in break_slots:
-            break_time = datetime.strptime(slot, "%H:%M").time()
-            insert_barber_break_slot(barber_id, break_date, break_time)
+        # The breaks go to the barber of the token, like every other break and exception write
+        barber_id, error = authorize_barber(data.get('barber_id'))
+        if error is not None:
+            return error
+
+        # Every slot blocks BREAK_SLOT_MINUTES, checked against the bookings and stored in one transaction
+        breaks = []
+        try:
+            break_date = datetime.fromisoformat(data['break_date']).date()
+            for slot in data['break_slots']:
+                break_start = minute_of_day(datetime.strptime(slot, "%H:%M").time())
+                breaks.append((break_date, break_start, break_start + BREAK_SLOT_MINUTES))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"error": "Invalid break slots. Use a YYYY-MM-DD break_date and HH:MM break_slots."}), 400
+
+        success, conflicts = insert_barber_breaks(barber_id, breaks, "Break")
+        if conflicts:
+            return jsonify({
+                "error": f"Break time overlaps with an existing booking at {conflicts[0]['appointment_time'][11:]}.",
+                "conflicts": conflicts
+            }), 409
+        if not success:
+            return jsonify({"error": "Failed to add break slots."}), 500
 
         return jsonify({"status": "success", "message": "Break slots added successfully."}), 201
 
     except Exception as e:
-        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+        logger.error("Error in set_barber_break_slots: %s", e)
+        return jsonify({"error": "An error occurred while adding break slots."}), 500
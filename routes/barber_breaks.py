@@ -1,14 +1,22 @@
 from datetime import datetime
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, g, jsonify, request
 
 from database.delete_barber_break.delete_barber_break import delete_barber_break
 from database.get_existing_breaks_for_barber.get_existing_breaks_for_barber import get_barber_breaks
-from database.insert_barber_break_slot.insert_barber_break_slot import insert_barber_break_slot
+from database.insert_barber_break_slot.insert_barber_break_slot import (
+    insert_barber_break_intervals, insert_barber_break_slot, insert_barber_breaks
+)
+from srvices.auth.barber_auth import authorize_barber, barber_required
+from srvices.bookings.day_occupancy import BREAK_SLOT_MINUTES, minute_of_day, parse_minute_label
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 get_barber_breaks_bp = Blueprint('get_barber_breaks_bp', __name__)
 
 
 @get_barber_breaks_bp.route('/get_barber_breaks', methods=['GET'])
+@barber_required
 def barber_breaks_route():
     """
     Route to get all breaks for a specific barber.
@@ -34,22 +42,29 @@ add_barber_breaks_bp = Blueprint('add_barber_breaks_bp', __name__)
 
 
 @add_barber_breaks_bp.route('/add_barber_break_slot', methods=['POST'])
+@barber_required
 def add_barber_break_slot():
     """
     Route to add one or multiple barber break slots.
-    Expects JSON with barber_id, break_date, break_time (can be a single value or an array of times), and type.
+    Expects JSON with break_date, break_time (can be a single value or an array of times), and type.
+    barber_id is optional, it defaults to the barber of the token and may only be theirs.
+    Each time blocks a 15-minute slot. With a single break_time, an optional break_end ('HH:MM')
+    adds the whole [break_time, break_end) interval instead.
     """
     try:
         data = request.json
-        barber_id = data.get('barber_id')
+        barber_id, error = authorize_barber(data.get('barber_id'))
+        if error is not None:
+            return error
         break_date = data.get('break_date')
         break_time = data.get('break_time')
         timeType = data.get('timeType')  
         booking_id = data.get('booking_id') 
+        break_end = data.get('break_end')
 
 
         # Check if all fields are provided
-        if barber_id is None or break_date is None or break_time is None or timeType is None or booking_id is None:
+        if break_date is None or break_time is None or timeType is None or booking_id is None:
             return jsonify({"success": False, "message": "Missing data."}), 400
 
         # Convert break_date to date object if necessary (depending on how break_date is formatted)
@@ -72,8 +87,21 @@ def add_barber_break_slot():
         except ValueError:
             return jsonify({"success": False, "message": "Invalid time format. Use HH:MM."}), 400
 
-        # Call the function to insert the break slots
-        success = insert_barber_break_slot(barber_id, break_date, break_times, timeType, booking_id= booking_id)
+        if break_end is not None:
+            # One interval, stored as a single row
+            try:
+                break_end_minute = parse_minute_label(break_end)
+            except (TypeError, ValueError):
+                return jsonify({"success": False, "message": "Invalid time format. Use HH:MM."}), 400
+            if len(break_times) != 1 or break_end_minute <= minute_of_day(break_times[0]):
+                return jsonify({"success": False, "message": "break_end must come after a single break_time."}), 400
+
+            success = insert_barber_break_intervals(
+                barber_id, break_date, [(minute_of_day(break_times[0]), break_end_minute)], timeType, booking_id=booking_id
+            )
+        else:
+            # Call the function to insert the break slots
+            success = insert_barber_break_slot(barber_id, break_date, break_times, timeType, booking_id= booking_id)
 
         if success:
             return jsonify({"success": True, "message": "Break slots added successfully."}), 201
@@ -81,31 +109,87 @@ def add_barber_break_slot():
             return jsonify({"success": False, "message": "Failed to add break slots."}), 500
 
     except Exception as e:
-        print(f"Error in add_barber_break_slot: {e}")  
+        logger.error("Error in add_barber_break_slot: %s", e)
         return jsonify({"success": False, "message": "An error occurred."}), 500
     
 
 
+@add_barber_breaks_bp.route('/add_barber_breaks_bulk', methods=['POST'])
+@barber_required
+def add_barber_breaks_bulk():
+    """
+    Route to add many breaks, on any number of dates, in one transaction.
+    Expects JSON with timeType and breaks, a list of {break_date, break_time, break_end}.
+    barber_id is optional, it defaults to the barber of the token and may only be theirs.
+    break_end is optional, a break without it blocks one 15-minute slot.
+    Nothing is added if any break overlaps a booking, the overlapping bookings are returned with a 409.
+    """
+    try:
+        data = request.json
+        barber_id, error = authorize_barber(data.get('barber_id'))
+        if error is not None:
+            return error
+        timeType = data.get('timeType')
+        items = data.get('breaks')
+
+        if timeType is None or not isinstance(items, list) or not items:
+            return jsonify({"success": False, "message": "Missing data."}), 400
+
+        breaks = []
+        try:
+            for item in items:
+                break_date = datetime.strptime(item['break_date'], '%Y-%m-%d').date()
+                break_start = parse_minute_label(item['break_time'])
+                break_end = item.get('break_end')
+                break_end = parse_minute_label(break_end) if break_end is not None else break_start + BREAK_SLOT_MINUTES
+                if break_end <= break_start:
+                    return jsonify({"success": False, "message": "break_end must come after break_time."}), 400
+                breaks.append((break_date, break_start, break_end))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return jsonify({"success": False, "message": "Invalid break. Use YYYY-MM-DD dates and HH:MM times."}), 400
+
+        success, conflicts = insert_barber_breaks(barber_id, breaks, timeType)
+
+        if conflicts:
+            return jsonify({"success": False, "message": "Breaks overlap existing bookings.", "conflicts": conflicts}), 409
+        if success:
+            return jsonify({"success": True, "message": "Breaks added successfully."}), 201
+        else:
+            return jsonify({"success": False, "message": "Failed to add breaks."}), 500
+
+    except Exception as e:
+        logger.error("Error in add_barber_breaks_bulk: %s", e)
+        return jsonify({"success": False, "message": "An error occurred."}), 500
+
+
+
 delete_barber_break_bp = Blueprint('delete_barber_break_bp', __name__)
 
 
 @delete_barber_break_bp.route('/delete_barber_break', methods=['DELETE'])
+@barber_required
 def delete_barber_break_route():
+    """
+    Route to delete one of the breaks of the barber of the token, given its break_id.
+    """
     try:
         break_id = request.args.get('break_id')
 
         if break_id is None:
             return jsonify({"success": False, "message": "Missing break_id."}), 400
 
-        success = delete_barber_break(int(break_id))
+        # Only the token's barber's breaks can be deleted, other barbers' ones are not found
+        success = delete_barber_break(int(break_id), g.barber.barber_id)
 
         if success:
             return jsonify({"success": True, "message": "Break slot deleted successfully."}), 200
+        elif success is None:
+            return jsonify({"success": False, "message": "Break not found."}), 404
         else:
             return jsonify({"success": False, "message": "Failed to delete break slot."}), 500
 
     except Exception as e:
-        print(f"Error in delete_barber_break_route: {e}")
+        logger.error("Error in delete_barber_break_route: %s", e)
         return jsonify({"success": False, "message": "An error occurred."}), 500
 
 
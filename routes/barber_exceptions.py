@@ -1,18 +1,29 @@
 
+from datetime import date, timedelta
 from flask import Blueprint, jsonify, request
 
-from database.barber_exceptions.barber_exceptions import get_barber_exceptions, insert_barber_exception
+from database.barber_exceptions.barber_exceptions import get_barber_exceptions, insert_barber_exception, insert_barber_exceptions
+from srvices.auth.barber_auth import authorize_barber, barber_required
+from srvices.cache.invalidation import EXCEPTIONS
+from srvices.cache.response_cache import conditional_get
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Longest date range a single /insert_barber_exceptions call may cover
+MAX_EXCEPTION_RANGE_DAYS = 366
 
 insert_barber_exception_bp = Blueprint('insert_barber_exception_bp', __name__)
 
 @insert_barber_exception_bp.route('/insert_barber_exception', methods=['POST'])
+@barber_required
 def insert_barber_exception_route():
     """
     Route to insert a new record into BarberExceptions.
 
-    Expects a JSON body:
+    Expects a JSON body, "barber_id" defaults to the barber of the token and may only be theirs:
     {
-        "barber_id": int,
+        "barber_id": int, (optional)
         "exception_date": "YYYY-MM-DD",
         "custom_start_time": "HH:MM:SS", (optional)
         "custom_end_time": "HH:MM:SS", (optional)
@@ -22,6 +33,7 @@ def insert_barber_exception_route():
     Returns:
     - 200 if the insert/update was successful.
     - 400 if there's an issue with the input data.
+    - 403 if barber_id is another barber.
     - 500 if an error occurred during the insert.
     """
     try:
@@ -29,18 +41,20 @@ def insert_barber_exception_route():
         data = request.get_json()
 
         # Log the incoming data for debugging
-        print(f"Received data: {data}")
+        logger.debug("Received data: %s", data)
 
         # Extract and validate the data from the JSON body
-        barber_id = data.get('barber_id')
+        barber_id, error = authorize_barber(data.get('barber_id'))
+        if error is not None:
+            return error
         exception_date = data.get('exception_date')
         custom_start_time = data.get('custom_start_time')  # Optional
         custom_end_time = data.get('custom_end_time')  # Optional
         is_off = data.get('is_off', False)  # Defaults to False if not provided
 
         # Validate required fields
-        if not barber_id or not exception_date:
-            return jsonify({"error": "Missing barber_id or exception_date"}), 400
+        if not exception_date:
+            return jsonify({"error": "Missing exception_date"}), 400
 
         # Call the insert function
         if insert_barber_exception(barber_id, exception_date, custom_start_time, custom_end_time, is_off):
@@ -49,12 +63,77 @@ def insert_barber_exception_route():
             return jsonify({"error": "Failed to insert barber exception"}), 500
 
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@insert_barber_exception_bp.route('/insert_barber_exceptions', methods=['POST'])
+@barber_required
+def insert_barber_exceptions_route():
+    """
+    Route to insert the same exception on a range of dates, e.g. a vacation, in one statement.
+
+    Expects a JSON body, "barber_id" defaults to the barber of the token and may only be theirs:
+    {
+        "barber_id": int, (optional)
+        "start_date": "YYYY-MM-DD",
+        "end_date": "YYYY-MM-DD", (inclusive, optional: defaults to start_date)
+        "custom_start_time": "HH:MM:SS", (optional)
+        "custom_end_time": "HH:MM:SS", (optional)
+        "is_off": bool
+    }
+
+    Returns:
+    - 200 if the insert/update was successful.
+    - 400 if there's an issue with the input data.
+    - 403 if barber_id is another barber.
+    - 409 with the affected bookings if the new hours leave bookings outside of them.
+    - 500 if an error occurred during the insert.
+    """
+    try:
+        data = request.get_json()
+        logger.debug("Received data: %s", data)
+
+        barber_id, error = authorize_barber(data.get('barber_id'))
+        if error is not None:
+            return error
+        start_date = data.get('start_date')
+        end_date = data.get('end_date') or start_date
+        custom_start_time = data.get('custom_start_time')  # Optional
+        custom_end_time = data.get('custom_end_time')  # Optional
+        is_off = data.get('is_off', False)
+
+        if not start_date:
+            return jsonify({"error": "Missing start_date"}), 400
+
+        try:
+            start_date = date.fromisoformat(start_date)
+            end_date = date.fromisoformat(end_date)
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
+
+        days = (end_date - start_date).days + 1
+        if days < 1 or days > MAX_EXCEPTION_RANGE_DAYS:
+            return jsonify({"error": f"end_date must be on or after start_date, at most {MAX_EXCEPTION_RANGE_DAYS} days later"}), 400
+
+        exception_dates = [start_date + timedelta(days=offset) for offset in range(days)]
+        success, conflicts = insert_barber_exceptions(barber_id, exception_dates, custom_start_time, custom_end_time, is_off)
+
+        if conflicts:
+            return jsonify({"error": "Bookings fall outside the new hours", "conflicts": conflicts}), 409
+        if success:
+            return jsonify({"message": f"Barber exceptions inserted successfully for {days} days"}), 200
+        else:
+            return jsonify({"error": "Failed to insert barber exceptions"}), 500
+
+    except Exception as e:
+        logger.error("Error occurred: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
 get_barber_exceptions_bp = Blueprint('get_barber_exceptions_bp', __name__)
 @get_barber_exceptions_bp.route('/get_barber_exceptions', methods=['GET'])
+@conditional_get(kinds=(EXCEPTIONS,), per_day=True)
 def get_barber_exceptions_route():
     """
     Flask route to fetch all future barber exceptions based on barber_id.
@@ -81,7 +160,7 @@ def get_barber_exceptions_route():
         return jsonify(exceptions), 200
 
     except Exception as e:
-        print(f"Error occurred in route: {e}")
+        logger.error("Error occurred in route: %s", e)
         return jsonify({"error": str(e)}), 500
     
 
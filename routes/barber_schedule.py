@@ -3,10 +3,20 @@
 from flask import Blueprint, jsonify, request
 
 from database.barber_schedule.get_barber_schedule import get_barber_schedule, update_barber_schedule
+from database.barber_schedule.weekly_schedule import get_weekly_schedule, update_weekly_schedule
+from srvices.auth.barber_auth import authorize_barber, barber_required
+from srvices.bookings.day_occupancy import parse_minute_label
+from srvices.bookings.weekly_template import DAYS_PER_WEEK
+from srvices.cache.invalidation import SCHEDULES
+from srvices.cache.response_cache import conditional_get
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 get_barber_schedule_bp = Blueprint('get_barber_schedule_bp', __name__)
 
 @get_barber_schedule_bp.route('/get_barber_schedule', methods=['GET'])
+@conditional_get(kinds=(SCHEDULES,))
 def barber_schedule():
     # Get barber_id from query parameters
     barber_id = request.args.get('barber_id')
@@ -35,16 +45,36 @@ def barber_schedule():
 
 
 
+@get_barber_schedule_bp.route('/get_weekly_schedule', methods=['GET'])
+@conditional_get(kinds=(SCHEDULES,))
+def weekly_schedule():
+    """
+    Route to get a barber's working hours for every day of the week and their recurring breaks.
+    Weekdays are numbered from 0 (Monday) to 6 (Sunday).
+    """
+    try:
+        barber_id = int(request.args.get('barber_id', ''))
+    except ValueError:
+        return jsonify({"error": "barber_id is required"}), 400
+
+    schedule = get_weekly_schedule(barber_id)
+    if schedule is None:
+        return jsonify({"error": "Failed to fetch the weekly schedule"}), 500
+
+    return jsonify({"barber_id": barber_id, **schedule}), 200
+
+
 update_barber_schedule_bp = Blueprint('update_barber_schedule_bp', __name__)
 
 @update_barber_schedule_bp.route('/update_barber_schedule', methods=['POST'])
+@barber_required
 def update_schedule():
     """
     API route to update the start and end times for a barber's schedule.
 
-    Expects JSON input:
+    Expects JSON input, "barber_id" defaults to the barber of the token and may only be theirs:
     {
-        "barber_id": int,
+        "barber_id": int, (optional)
         "start_time": "HH:MM:SS",
         "end_time": "HH:MM:SS"
     }
@@ -52,6 +82,7 @@ def update_schedule():
     Returns:
     - 200 if the update was successful.
     - 400 if there's an issue with the input data.
+    - 403 if barber_id is another barber.
     - 500 if there's an error updating the schedule.
     """
     try:
@@ -59,13 +90,15 @@ def update_schedule():
         data = request.get_json()
 
         # Extract data from the request
-        barber_id = data.get("barber_id")
+        barber_id, error = authorize_barber(data.get("barber_id"))
+        if error is not None:
+            return error
         start_time = data.get("start_time")
         end_time = data.get("end_time")
 
         # Validate the input data
-        if not all([barber_id, start_time, end_time]):
-            return jsonify({"error": "Missing barber_id, start_time, or end_time"}), 400
+        if not all([start_time, end_time]):
+            return jsonify({"error": "Missing start_time or end_time"}), 400
 
         # Call the update function
         if update_barber_schedule(barber_id, start_time, end_time):
@@ -74,5 +107,93 @@ def update_schedule():
             return jsonify({"error": "Failed to update barber schedule"}), 500
 
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+def _parse_weekday(value):
+    weekday = int(value)
+    if not 0 <= weekday < DAYS_PER_WEEK:
+        raise ValueError(f"Invalid weekday: {value}")
+    return weekday
+
+
+def _parse_hours(item):
+    # 'HH:MM' or 'HH:MM:SS' start and end times as a (start, end) minute interval
+    start, end = parse_minute_label(item['start_time'][:5]), parse_minute_label(item['end_time'][:5])
+    if end <= start:
+        raise ValueError("end_time must come after start_time")
+    return start, end
+
+
+@update_barber_schedule_bp.route('/update_weekly_schedule', methods=['POST'])
+@barber_required
+def update_weekly_schedule_route():
+    """
+    API route to set a barber's hours per day of the week and their recurring breaks.
+
+    Expects JSON input, both "days" and "recurring_breaks" are optional, "barber_id" defaults to
+    the barber of the token and may only be theirs:
+    {
+        "barber_id": int, (optional)
+        "days": [
+            {"weekday": 0, "start_time": "HH:MM", "end_time": "HH:MM"},
+            {"weekday": 5, "is_off": true},
+            {"weekday": 6, "default": true}
+        ],
+        "recurring_breaks": [
+            {"weekdays": [0, 1, 2, 3, 4], "start_time": "HH:MM", "end_time": "HH:MM"}
+        ]
+    }
+
+    Weekdays go from 0 (Monday) to 6 (Sunday). "default" goes back to the hours of
+    /update_barber_schedule. "recurring_breaks" replaces all of the barber's recurring breaks.
+
+    Returns:
+    - 200 if the update was successful.
+    - 400 if there's an issue with the input data.
+    - 403 if barber_id is another barber.
+    - 500 if there's an error updating the schedule.
+    """
+    try:
+        data = request.get_json()
+        barber_id, error = authorize_barber(data.get("barber_id"))
+        if error is not None:
+            return error
+        day_items = data.get("days")
+        break_items = data.get("recurring_breaks")
+
+        if day_items is None and break_items is None:
+            return jsonify({"error": "Missing days or recurring_breaks"}), 400
+
+        try:
+            days = None
+            if day_items is not None:
+                days = {}
+                for item in day_items:
+                    weekday = _parse_weekday(item['weekday'])
+                    if item.get('default'):
+                        days[weekday] = "default"
+                    elif item.get('is_off'):
+                        days[weekday] = None
+                    else:
+                        days[weekday] = _parse_hours(item)
+
+            recurring_breaks = None
+            if break_items is not None:
+                recurring_breaks = []
+                for item in break_items:
+                    start, end = _parse_hours(item)
+                    for weekday in item['weekdays']:
+                        recurring_breaks.append((_parse_weekday(weekday), start, end))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return jsonify({"error": f"Invalid weekly schedule: {e}"}), 400
+
+        if update_weekly_schedule(barber_id, days, recurring_breaks):
+            return jsonify({"message": "Weekly schedule updated successfully"}), 200
+        else:
+            return jsonify({"error": "Failed to update weekly schedule"}), 500
+
+    except Exception as e:
+        logger.error("Error occurred: %s", e)
         return jsonify({"error": str(e)}), 500
@@ -1,9 +1,11 @@
-import traceback
 from flask import Blueprint, jsonify, request
 from datetime import datetime
 
 from database.get_bookings_from_today_onwards.get_bookings_from_today_onwards import get_bookings_from_today_onwards
 from database.insert_booking.insert_booking import insert_booking
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 insert_booking_bp = Blueprint('insert_booking_bp', __name__)
@@ -52,6 +54,5 @@ def get_todays_bookings():
 
     except Exception as e:
         # Log the specific error message
-        print(f"Error occurred in /get_todays_bookings route: {e}")
-        traceback.print_exc() 
+        logger.exception("Error occurred in /get_todays_bookings route: %s", e)
         return jsonify({'error': f"An internal error occurred: {str(e)}"}), 500
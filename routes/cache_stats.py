@@ -0,0 +1,13 @@
+from flask import Blueprint, jsonify
+
+from srvices.cache.availability_cache import availability_cache
+
+cache_stats_bp = Blueprint('cache_stats_bp', __name__)
+
+
+@cache_stats_bp.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """
+    API route returning the hit, miss and eviction counters of the availability cache.
+    """
+    return jsonify({"availability_cache": availability_cache.stats()}), 200
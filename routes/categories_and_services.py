@@ -3,10 +3,14 @@
 from flask import Blueprint, jsonify
 
 from database.get_categories_and_services.fetch_categories_and_services import fetch_categories_and_services
+from srvices.cache.catalog import get_catalog
+from srvices.cache.invalidation import CATALOG
+from srvices.cache.response_cache import conditional_get
 
 categories_and_services_bp = Blueprint('categories_and_services_bp', __name__)
 
 @categories_and_services_bp.route('/get_categories_and_services', methods=['GET'])
+@conditional_get(kinds=(CATALOG,), max_age=300, vary_on=(), version=lambda: getattr(get_catalog(), "version", None))
 def get_categories_and_services():
     try:
         # Call the database function to fetch categories and services
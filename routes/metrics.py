@@ -0,0 +1,32 @@
+from flask import Blueprint, Response
+
+from database.database_conn import get_pool_stats
+from srvices.cache.availability_cache import availability_cache
+from srvices.observability.metrics import (
+    availability_cache_entries, availability_cache_hits, availability_cache_misses, db_pool_idle, db_pool_in_use,
+    db_pool_timeouts, db_pool_wait_seconds, db_pool_waits, register_stats_mirror, render_metrics
+)
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+# The pool and the cache keep their own counters, copied into the metrics after every request
+register_stats_mirror(
+    get_pool_stats,
+    counters={"waits": db_pool_waits, "wait_seconds_total": db_pool_wait_seconds, "timeouts": db_pool_timeouts},
+    gauges={"in_use": db_pool_in_use, "idle": db_pool_idle},
+)
+register_stats_mirror(
+    availability_cache.stats,
+    counters={"hits": availability_cache_hits, "misses": availability_cache_misses},
+    gauges={"entries": availability_cache_entries},
+)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    API route for Prometheus: request latency per route, SQL statements, pool wait and JSON
+    encoding time, slot engine counters, and the pool and cache state, summed over every worker.
+    """
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify
+
+from database.database_conn import get_pool_stats
+
+pool_stats_bp = Blueprint('pool_stats_bp', __name__)
+
+
+@pool_stats_bp.route('/pool_stats', methods=['GET'])
+def pool_stats():
+    """
+    API route returning the database connection pool metrics: connections in use and idle,
+    time spent waiting for a connection and checkout timeouts.
+    """
+    return jsonify({"connection_pool": get_pool_stats()}), 200
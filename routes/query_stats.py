@@ -0,0 +1,59 @@
+from flask import Blueprint, jsonify, request
+
+from database.query_trace import DB_SLOW_QUERY_MS, DB_TRACE, DB_TRACE_TOP, query_trace
+from srvices.auth.barber_auth import barber_required
+
+query_stats_bp = Blueprint('query_stats_bp', __name__)
+
+
+@query_stats_bp.route('/query_stats', methods=['GET'])
+@barber_required
+def query_stats():
+    """
+    API route returning the query trace of the worker answering: the most expensive statements
+    of the last one to two windows and the most recent slow ones. Empty unless DB_TRACE is on.
+
+    Query parameters:
+    - limit (int, optional): How many statements to return, defaults to DB_TRACE_TOP.
+    """
+    limit = request.args.get('limit', DB_TRACE_TOP, type=int)
+    if limit is None or limit < 1:
+        return jsonify({"error": "'limit' must be a positive integer."}), 400
+
+    return jsonify({
+        "tracing": DB_TRACE,
+        "slow_query_ms": DB_SLOW_QUERY_MS,
+        "explain": query_trace.explain,
+        "explains_per_minute": query_trace.explains_per_minute,
+        "window_seconds": query_trace.window_seconds,
+        "trace": query_trace.stats(),
+        "statements": query_trace.top(limit),
+        "slow_queries": query_trace.slow_queries(),
+    }), 200
+
+
+@query_stats_bp.route('/query_stats', methods=['DELETE'])
+@barber_required
+def reset_query_stats():
+    """API route clearing the query trace of the worker answering, e.g. before measuring a change."""
+    query_trace.reset()
+    return jsonify({"message": "Query trace cleared."}), 200
+
+
+@query_stats_bp.route('/query_stats/explain', methods=['POST'])
+@barber_required
+def set_query_explain():
+    """
+    API route switching EXPLAIN of slow statements on or off in the worker answering, without a
+    restart. Still capped at DB_SLOW_QUERY_EXPLAINS_PER_MINUTE.
+
+    Expected JSON body:
+    - enabled (bool): True to add plans to the slow query log.
+    """
+    data = request.get_json(silent=True) or {}
+    enabled = data.get('enabled')
+    if not isinstance(enabled, bool):
+        return jsonify({"error": "'enabled' must be true or false."}), 400
+
+    query_trace.set_explain(enabled)
+    return jsonify({"explain": enabled, "explains_per_minute": query_trace.explains_per_minute}), 200
@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+
+from srvices.cache.warmup import is_ready, readiness
+
+readiness_bp = Blueprint('readiness_bp', __name__)
+
+
+@readiness_bp.route('/ready', methods=['GET'])
+def ready():
+    """
+    API route for the load balancer: 200 once this worker has warmed its connections, catalog
+    and availability caches, 503 until then.
+    """
+    response = jsonify(readiness())
+    response.status_code = 200 if is_ready() else 503
+    response.headers["Cache-Control"] = "no-store"
+    return response
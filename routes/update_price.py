@@ -1,14 +1,16 @@
 ''
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, g, jsonify, request
 from database.update_booking_price.update_booking_price import update_booking_price
+from srvices.auth.barber_auth import barber_required
 
 update_price_bp = Blueprint('update_price_bp', __name__)
 
 @update_price_bp.route('/update_price', methods=['POST'])
+@barber_required
 def update_price():
     """
-    Route to update the price of a booking.
+    Route to update the price of a booking of the barber of the token.
     
     Expected JSON body:
     {
@@ -31,7 +33,7 @@ def update_price():
             return jsonify(success=False, message="Missing booking_id or new_price"), 400
 
         # Call the update_booking_price function to update the price
-        success, message = update_booking_price(booking_id, new_price)
+        success, message = update_booking_price(booking_id, new_price, g.barber.barber_id)
 
         # Return a success or error message based on the result
         if success:
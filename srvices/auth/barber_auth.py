@@ -0,0 +1,96 @@
+from functools import wraps
+
+from flask import g, jsonify, request
+import jwt
+
+from srvices.cache.catalog import get_catalog
+from srvices.jwt.jwt_models import SECRET_KEY
+
+
+def _unauthorized(message, status_code=401):
+    return jsonify({'message': message}), status_code
+
+
+def authenticate_request():
+    """
+    Verify the request's bearer token and resolve the barber it belongs to, once per request.
+
+    The barber comes from the catalog snapshot, which is refreshed whenever the barbers change,
+    so no query is made.
+
+    Returns:
+    - tuple: (barber, None) with the catalog's Barber (barber_id, name) on success,
+      (None, error_response) otherwise.
+    """
+    if "barber" in g:
+        return g.barber, None
+
+    # Get the token from the Authorization header, "Bearer <token>"
+    header = request.headers.get('Authorization')
+    if not header:
+        return None, _unauthorized('Token is missing!')
+
+    parts = header.split(" ")
+    if len(parts) != 2:
+        return None, _unauthorized('Token is invalid!')
+
+    try:
+        claims = jwt.decode(parts[1], SECRET_KEY, algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        return None, _unauthorized('Token has expired!')
+    except jwt.InvalidTokenError:
+        return None, _unauthorized('Token is invalid!')
+
+    barber_id = claims.get('barber_id')
+    if not barber_id:
+        return None, _unauthorized('Barber ID not found in token!', 400)
+
+    catalog = get_catalog()
+    barber = catalog.barbers_by_id.get(barber_id) if catalog is not None else None
+    if barber is None:
+        return None, _unauthorized('Barber not found!', 404)
+
+    g.token_claims = claims
+    g.barber = barber
+    return barber, None
+
+
+def barber_required(view):
+    """
+    Only let requests with a valid barber token through to the view.
+
+    The verified claims and the barber are available to the view as g.token_claims and g.barber.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        _, error = authenticate_request()
+        if error is not None:
+            return error
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def authorize_barber(barber_id=None):
+    """
+    Check that the request's barber may write the data of `barber_id`: barbers only change their own.
+
+    Call it from a view behind barber_required, with the barber the request names.
+
+    Parameters:
+    - barber_id (int or str, optional): The barber the request writes to, None for the barber of the token.
+
+    Returns:
+    - tuple: (barber_id, None) with the barber to write on success, (None, error_response) otherwise.
+    """
+    if barber_id is None:
+        return g.barber.barber_id, None
+
+    try:
+        barber_id = int(barber_id)
+    except (TypeError, ValueError):
+        return None, _unauthorized('Invalid barber_id!', 400)
+
+    if barber_id != g.barber.barber_id:
+        return None, _unauthorized("Not allowed to change another barber's data!", 403)
+    return barber_id, None
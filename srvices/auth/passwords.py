@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import hmac
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from srvices.observability.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# PBKDF2 work factor for new hashes, stored hashes with another one are re-hashed on the next login
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "100000"))
+
+# Hashes computed at the same time, the rest of the worker keeps its CPU for the other endpoints
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# How long a login or signup waits for a free hashing worker before it is turned away
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "3"))
+
+# Work factor of the hashes stored before it was recorded with them
+LEGACY_ITERATIONS = 100000
+
+_HASH_PREFIX = b"pbkdf2_sha256$"
+
+
+class PasswordHashingBusyError(Exception):
+    """Raised when no hashing worker became free within the queue timeout."""
+
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS)
+
+
+def _pbkdf2(password, salt, iterations):
+    """
+    Run PBKDF2-SHA256 on the hashing pool, at most PASSWORD_HASH_WORKERS at a time.
+
+    Raises:
+    - PasswordHashingBusyError: If every worker stayed busy for PASSWORD_HASH_QUEUE_TIMEOUT seconds.
+    """
+    if not _slots.acquire(timeout=PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise PasswordHashingBusyError(f"no password hashing worker became free within {PASSWORD_HASH_QUEUE_TIMEOUT} seconds")
+    try:
+        future = _executor.submit(hashlib.pbkdf2_hmac, 'sha256', password.encode(), salt, iterations)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future.result()
+
+
+def encode_hash(digest, iterations):
+    """Store the work factor with the digest: b"pbkdf2_sha256$<iterations>$<digest>"."""
+    return _HASH_PREFIX + str(iterations).encode() + b"$" + digest
+
+
+def decode_hash(stored_hash):
+    """
+    Split a stored hash into its digest and work factor.
+
+    Returns:
+    - tuple: (digest, iterations). Bare digests from before the work factor was stored use LEGACY_ITERATIONS.
+    """
+    stored_hash = bytes(stored_hash)
+    if stored_hash.startswith(_HASH_PREFIX):
+        iterations, digest = stored_hash[len(_HASH_PREFIX):].split(b"$", 1)
+        return digest, int(iterations)
+    return stored_hash, LEGACY_ITERATIONS
+
+
+def hash_password(password):
+    """
+    Hash a password with a new salt and the current work factor.
+
+    Returns:
+    - tuple: (salt, stored_hash), both bytes for the barber_login table.
+
+    Raises:
+    - PasswordHashingBusyError: If the hashing pool is saturated.
+    """
+    salt = os.urandom(16)  # Generate a new salt
+    return salt, encode_hash(_pbkdf2(password, salt, PASSWORD_HASH_ITERATIONS), PASSWORD_HASH_ITERATIONS)
+
+
+def check_password(password, salt, stored_hash):
+    """
+    Check a password against a stored hash, in constant time.
+
+    Returns:
+    - tuple: (matches, needs_rehash), needs_rehash is True when the hash uses another work factor.
+
+    Raises:
+    - PasswordHashingBusyError: If the hashing pool is saturated.
+    """
+    digest, iterations = decode_hash(stored_hash)
+    matches = hmac.compare_digest(_pbkdf2(password, bytes(salt), iterations), digest)
+    return matches, iterations != PASSWORD_HASH_ITERATIONS
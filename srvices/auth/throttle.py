@@ -0,0 +1,73 @@
+from collections import deque
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Attempts allowed per window, checked before any password is hashed
+LOGIN_ATTEMPTS_PER_USERNAME = int(os.getenv("LOGIN_ATTEMPTS_PER_USERNAME", "5"))
+LOGIN_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_ATTEMPTS_PER_IP", "20"))
+LOGIN_ATTEMPT_WINDOW_SECONDS = float(os.getenv("LOGIN_ATTEMPT_WINDOW_SECONDS", "60"))
+
+# Proxies in front of the app (load balancer, ingress, ...) whose X-Forwarded-For entries are trusted.
+# Attempts are counted per client address, behind a proxy request.remote_addr would otherwise be the
+# proxy's own and every client would share one bucket. 0 when clients connect directly
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+
+class AttemptThrottle:
+    """
+    Sliding-window attempt counter per key (a username, a client IP, ...).
+
+    Each key may make `limit` attempts within `window` seconds, further ones are refused until
+    the oldest attempt leaves the window. Keys without recent attempts are dropped, so memory
+    stays bounded by the attempts of the last window.
+    """
+
+    def __init__(self, limit, window=LOGIN_ATTEMPT_WINDOW_SECONDS):
+        self.limit = limit
+        self.window = window
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + window
+
+    def _sweep(self, now):
+        # Forget the keys whose attempts all left the window
+        cutoff = now - self.window
+        for key in [key for key, attempts in self._attempts.items() if not attempts or attempts[-1] <= cutoff]:
+            del self._attempts[key]
+        self._next_sweep = now + self.window
+
+    def attempt(self, key):
+        """
+        Record an attempt for `key` if it is allowed.
+
+        Returns:
+        - float: 0 when the attempt is allowed, otherwise the seconds until the next one will be.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            attempts = self._attempts.setdefault(key, deque())
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+
+            if len(attempts) >= self.limit:
+                return attempts[0] + self.window - now
+
+            attempts.append(now)
+            return 0
+
+    def reset(self, key):
+        """Forget the attempts of `key`, e.g. after a successful login."""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+username_throttle = AttemptThrottle(LOGIN_ATTEMPTS_PER_USERNAME)
+ip_throttle = AttemptThrottle(LOGIN_ATTEMPTS_PER_IP)
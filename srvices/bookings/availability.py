@@ -0,0 +1,99 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from database.get_barber_data.fetch_barber_data_from_db import fetch_barber_data_from_db
+from srvices.bookings.barbers_slots_main import resolve_barber_date_range
+from srvices.bookings.batch_slots import generate_barber_slots_batch
+from srvices.bookings.day_occupancy import duration_in_minutes, first_free_minute
+from srvices.cache.availability_cache import CACHE_MISS, DAY_OFF, availability_cache
+
+
+def _calendar_days(barber_dates, barber_id, today):
+    """List the days of a barber's horizon, the slot engine leaves out the days off."""
+    start_date, end_date = resolve_barber_date_range(barber_dates, barber_id, today)
+    if isinstance(start_date, datetime):
+        start_date = start_date.date()
+    if isinstance(end_date, datetime):
+        end_date = end_date.date()
+    return [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    ]
+
+
+def get_barber_calendar_slots(barber_ids, barber_dates, service_duration_minutes, gap_minutes=15):
+    """
+    Return the free slot start minutes of every barber-day in the calendar horizon.
+
+    Barber-days are served from the availability cache. Barbers with at least one day
+    missing from the cache are loaded from the database in one batch and computed with
+    the batch slot engine, and every day of theirs is cached again.
+
+    Parameters:
+    - barber_ids (list): The barbers to return slots for.
+    - barber_dates (dict): Barber IDs mapped to their availability date ranges.
+    - service_duration_minutes (int or float): The length of the requested service.
+    - gap_minutes (int): The step between two consecutive slot start times.
+
+    Returns:
+    - dict: Barber IDs mapped to 'YYYY-MM-DD' dates mapped to lists of start minutes, with
+      slots that already started removed. None if the database could not be read.
+    """
+    now = datetime.now()
+    today = now.date()
+    duration = duration_in_minutes(service_duration_minutes)
+
+    days_by_barber = {barber_id: _calendar_days(barber_dates, barber_id, today) for barber_id in barber_ids}
+    starts_by_barber = {}
+    missing_barbers = []
+
+    for barber_id in barber_ids:
+        cached_days = {}
+        for day in days_by_barber[barber_id]:
+            starts = availability_cache.get(availability_cache.make_key(barber_id, day, duration, gap_minutes))
+            if starts is CACHE_MISS:
+                missing_barbers.append(barber_id)
+                break
+            cached_days[day] = starts
+        else:
+            starts_by_barber[barber_id] = cached_days
+
+    if missing_barbers:
+        generations = {barber_id: availability_cache.generation(barber_id) for barber_id in missing_barbers}
+
+        barber_schedules, loaded_dates, existing_bookings, exceptions, _, breaks = fetch_barber_data_from_db(
+            barber_ids=missing_barbers
+        )
+        if barber_schedules is None:
+            return None
+
+        computed = generate_barber_slots_batch(
+            barber_schedules, loaded_dates, existing_bookings, barber_ids=missing_barbers,
+            gap_minutes=gap_minutes, exceptions=exceptions, service_duration_minutes=duration,
+            breaks=breaks, include_past=True, as_minutes=True
+        )
+
+        for barber_id in missing_barbers:
+            computed_days = {}
+            for day in days_by_barber[barber_id]:
+                # Days missing from the engine output are days off
+                starts = computed[barber_id].get(day.strftime('%Y-%m-%d'), DAY_OFF)
+                availability_cache.put(
+                    availability_cache.make_key(barber_id, day, duration, gap_minutes), starts,
+                    generation=generations[barber_id]
+                )
+                computed_days[day] = starts
+            starts_by_barber[barber_id] = computed_days
+
+    slots_by_barber = {}
+    for barber_id in barber_ids:
+        slots_by_barber[barber_id] = {}
+        for day, starts in starts_by_barber[barber_id].items():
+            if starts is DAY_OFF:
+                continue
+            # Start minutes are sorted, drop the ones that are already past
+            slots_by_barber[barber_id][day.strftime('%Y-%m-%d')] = list(
+                starts[bisect_left(starts, first_free_minute(now, day)):]
+            )
+
+    return slots_by_barber
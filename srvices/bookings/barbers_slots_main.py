@@ -1,40 +1,98 @@
-from datetime import datetime, time, timedelta
+from datetime import datetime, timedelta
 
-from database.get_existing_breaks_for_barber.get_existing_breaks_for_barber import get_existing_breaks_for_barber
+from srvices.bookings.day_occupancy import duration_in_minutes, first_free_minute, minute_of_day, minute_to_datetime
+from srvices.bookings.weekly_template import as_weekly_template
+from srvices.observability.metrics import instrument_slot_engine
 
+# Number of days shown after the start date when a barber has no BarberAvailability row
+DEFAULT_HORIZON_DAYS = 10
+
+
+def resolve_barber_date_range(barber_dates, barber_id, today=None):
+    """
+    Resolve the [start_date, end_date] horizon the slot engine covers for a barber.
+
+    Parameters:
+    - barber_dates (dict): Barber IDs mapped to their availability date ranges.
+    - barber_id (int): The ID of the barber.
+    - today (datetime.date, optional): Fallback start date, defaults to the current date.
+
+    Returns:
+    - tuple: (start_date, end_date) with the defaults applied.
+    """
+    start_date, end_date = barber_dates.get(barber_id, (None, None))
+
+    # If start_date or end_date is not provided, set default values
+    if start_date is None:
+        start_date = today or datetime.now().date()
+    if end_date is None:
+        end_date = start_date + timedelta(days=DEFAULT_HORIZON_DAYS)
+
+    return start_date, end_date
+
+
+@instrument_slot_engine("sequential")
 def generate_barber_specific_slots_with_bookings(
     barber_schedules, barber_dates, existing_bookings, barber_ids=None, 
-    gap_minutes: int = 15, exceptions: dict = None, service_duration_minutes: int = None
+    gap_minutes: int = 15, exceptions: dict = None, service_duration_minutes: int = None,
+    breaks: dict = None, include_past: bool = False
 ):
+    """
+    Generate the bookable slots for each barber over their date horizon.
+
+    This is a pure in-memory function: all the data it needs is passed in, usually
+    straight from fetch_barber_data_from_db.
+
+    Parameters:
+    - barber_schedules (dict): Barber IDs mapped to WeeklyTemplates, or to ('HH:MM', 'HH:MM') default
+      hours worked every day but Sunday.
+    - barber_dates (dict): Barber IDs mapped to their availability date ranges.
+    - existing_bookings (dict): Barber IDs mapped to ('YYYY-MM-DD HH:MM:SS', minutes) bookings.
+    - barber_ids (int or list, optional): The barbers to generate slots for, defaults to all.
+    - gap_minutes (int): The step between two consecutive slot start times.
+    - exceptions (dict, optional): Dates mapped to barber IDs mapped to custom hours or None (day off).
+    - service_duration_minutes (int): The length of the requested service.
+    - breaks (dict, optional): Barber IDs mapped to dates mapped to (start, end) break intervals in minutes.
+    - include_past (bool): Keep slots that start before the current time (used when caching).
+
+    Returns:
+    - dict: Barber IDs mapped to dates mapped to lists of (start, end) datetimes.
+    """
     # Normalize barber_ids to a list if it's a single int
     if isinstance(barber_ids, int):
         barber_ids = [barber_ids]
     elif barber_ids is None:
         barber_ids = list(barber_schedules.keys())
     
+    if breaks is None:
+        breaks = {}
+
+    service_duration_minutes = duration_in_minutes(service_duration_minutes)
+    now = datetime.now()
     slots_by_barber = {barber_id: {} for barber_id in barber_ids}
 
     for barber_id in barber_ids:
-        # Get the default start and end times for this barber
-        default_start_time, default_end_time = barber_schedules.get(barber_id, ('00:00', '00:00'))
-        
+        # Working hours and recurring breaks of every weekday, compiled once per barber
+        template = as_weekly_template(barber_schedules.get(barber_id))
+
+
         # Get the start and end dates specific to this barber
-        start_date, end_date = barber_dates.get(barber_id, (None, None))
-        
-        # If start_date or end_date is not provided, set default values
-        if start_date is None:
-            start_date = datetime.now().date()  
-        if end_date is None:
-            end_date = start_date + timedelta(days=10)  
+        start_date, end_date = resolve_barber_date_range(barber_dates, barber_id)
+
+        # Group this barber's bookings by date once, as [start, end) minute intervals
+        bookings_by_date = {}
+        for booking_time, service_duration in existing_bookings.get(barber_id, []):
+            booking_start = datetime.fromisoformat(booking_time)
+            start_minute = minute_of_day(booking_start)
+            bookings_by_date.setdefault(booking_start.date(), []).append(
+                (start_minute, start_minute + duration_in_minutes(service_duration))
+            )
+
+        barber_breaks = breaks.get(barber_id, {})
 
         current_date = start_date
 
         while current_date <= end_date:
-            # Skip Sundays (weekday() == 6 for Sunday)
-            if current_date.weekday() == 6:
-                current_date += timedelta(days=1)
-                continue
-
             current_date_str = current_date.strftime('%Y-%m-%d')
 
             # Handle exceptions (custom hours or exclusion) for specific days
@@ -43,72 +101,30 @@ def generate_barber_specific_slots_with_bookings(
                 if custom_times is None:
                     current_date += timedelta(days=1)
                     continue
-                else:
-                    start_hour, start_minute = map(int, custom_times[0].split(':'))
-                    end_hour, end_minute = map(int, custom_times[1].split(':'))
+                occupancy = template.occupancy(
+                    current_date.weekday(), (minute_of_day(custom_times[0]), minute_of_day(custom_times[1]))
+                )
             else:
-                start_hour, start_minute = map(int, default_start_time.split(':'))
-                end_hour, end_minute = map(int, default_end_time.split(':'))
-
-            # Create datetime objects for start and end times
-            start_time = datetime.combine(current_date, time(start_hour, start_minute))
-            end_time = datetime.combine(current_date, time(end_hour, end_minute))
-            slots = []
-
-            # Fetch bookings for this barber on this date
-            barber_bookings = existing_bookings.get(barber_id, [])
-            barber_bookings_today = [(datetime.strptime(booking_time, '%Y-%m-%d %H:%M:%S'), service_duration) 
-                                     for booking_time, service_duration in barber_bookings 
-                                     if datetime.strptime(booking_time, '%Y-%m-%d %H:%M:%S').date() == current_date]
-
-            # Sort the bookings by appointment time
-            barber_bookings_today.sort(key=lambda x: x[0])
-
-            # Get the current time
-            current_datetime = datetime.now()
-
-            # Fetch barber's break times for this date
-            break_times = get_existing_breaks_for_barber(barber_id, current_date)
-
-            # Generate slots while checking for bookings and breaks
-            for booking_time, booking_duration in barber_bookings_today:
-                if isinstance(booking_duration, timedelta):
-                    booking_duration = int(booking_duration.total_seconds() / 60)
-
-                while start_time + timedelta(minutes=service_duration_minutes) <= booking_time:
-                    # Skip expired slots if it's the current day
-                    if current_date == current_datetime.date() and start_time < current_datetime:
-                        start_time += timedelta(minutes=gap_minutes)
-                        continue
-                    
-                    # Format start_time as 'HH:MM' to compare with breaks
-                    formatted_start_time = start_time.strftime('%H:%M')
-
-                    # Only append the slot if it doesn't match a break time
-                    if formatted_start_time not in break_times:
-                        slots.append((start_time, start_time + timedelta(minutes=service_duration_minutes)))
-                    
-                    start_time += timedelta(minutes=gap_minutes)
-
-                start_time = booking_time + timedelta(minutes=booking_duration)
-
-            # Generate remaining slots after the last booking
-            while start_time + timedelta(minutes=service_duration_minutes) <= end_time:
-                # Skip expired slots if it's the current day
-                if current_date == current_datetime.date() and start_time < current_datetime:
-                    start_time += timedelta(minutes=gap_minutes)
+                # Stamp the weekday's hours and recurring breaks, None on a day off
+                occupancy = template.occupancy(current_date.weekday())
+                if occupancy is None:
+                    current_date += timedelta(days=1)
                     continue
 
-                # Format start_time as 'HH:MM' to compare with breaks
-                formatted_start_time = start_time.strftime('%H:%M')
+            # Block bookings and breaks on top of the working hours
+            for busy_start, busy_end in bookings_by_date.get(current_date, ()):
+                occupancy.block(busy_start, busy_end)
+            for busy_start, busy_end in barber_breaks.get(current_date_str, ()):
+                occupancy.block(busy_start, busy_end)
 
-                # Only add the slot if it fits within operating hours and is not a break time
-                if formatted_start_time not in break_times:
-                    slots.append((start_time, start_time + timedelta(minutes=service_duration_minutes)))
-                
-                start_time += timedelta(minutes=gap_minutes)
+            # Every start time where the whole service fits, skipping slots that are already past
+            not_before = 0 if include_past else first_free_minute(now, current_date)
+            starts = occupancy.fitting_starts(service_duration_minutes, gap_minutes, not_before=not_before)
 
-            slots_by_barber[barber_id][current_date_str] = slots
+            slots_by_barber[barber_id][current_date_str] = [
+                (minute_to_datetime(current_date, start), minute_to_datetime(current_date, start + service_duration_minutes))
+                for start in starts
+            ]
             current_date += timedelta(days=1)
 
     return slots_by_barber
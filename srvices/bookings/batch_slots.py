@@ -0,0 +1,230 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from srvices.bookings.barbers_slots_main import resolve_barber_date_range
+from srvices.bookings.day_occupancy import MINUTES_PER_DAY, duration_in_minutes, first_free_minute, minute_of_day
+from srvices.bookings.weekly_template import DAYS_PER_WEEK, as_weekly_template
+from srvices.observability.metrics import instrument_slot_engine
+
+# Barbers processed together in one occupancy array, bounds memory to ~CHUNK x days x 1440 cells
+BARBER_CHUNK_SIZE = 32
+
+_MINUTES = np.arange(MINUTES_PER_DAY, dtype=np.int16)
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+@instrument_slot_engine("batch")
+def generate_barber_slots_batch(
+    barber_schedules, barber_dates, existing_bookings, barber_ids=None,
+    gap_minutes: int = 15, exceptions: dict = None, service_duration_minutes: int = None,
+    breaks: dict = None, include_past: bool = False, as_minutes: bool = False
+):
+    """
+    Vectorized version of generate_barber_specific_slots_with_bookings for many barbers and days.
+
+    Builds a (barbers x days x minutes) occupancy array and finds every valid start time with
+    sliding-window sums, so the work done in Python grows with the number of bookings, breaks,
+    exceptions and returned barber-days, not with the number of candidate start times.
+
+    Takes the same parameters and returns the same structure as
+    generate_barber_specific_slots_with_bookings. With `as_minutes=True` every day holds a list of
+    slot start minutes instead of (start, end) datetimes. `include_past=True` keeps slots that
+    start before the current time.
+    """
+    # Normalize barber_ids to a list if it's a single int
+    if isinstance(barber_ids, int):
+        barber_ids = [barber_ids]
+    elif barber_ids is None:
+        barber_ids = list(barber_schedules.keys())
+
+    exceptions = exceptions or {}
+    breaks = breaks or {}
+
+    slots_by_barber = {barber_id: {} for barber_id in barber_ids}
+    if not barber_ids:
+        return slots_by_barber
+
+    now = datetime.now()
+    today = now.date()
+    barber_count = len(barber_ids)
+    barber_index = {barber_id: index for index, barber_id in enumerate(barber_ids)}
+
+    # Date range of every barber, and the union horizon covered by the array
+    ranges = [resolve_barber_date_range(barber_dates, barber_id, today) for barber_id in barber_ids]
+    range_starts = [_as_date(start) for start, _ in ranges]
+    range_ends = [_as_date(end) for _, end in ranges]
+    horizon_start = min(range_starts)
+    day_count = max((max(range_ends) - horizon_start).days + 1, 0)
+    days = [horizon_start + timedelta(days=offset) for offset in range(day_count)]
+    day_strings = [day.strftime('%Y-%m-%d') for day in days]
+    day_index = {day: index for index, day in enumerate(days)}
+
+    # Working hours and recurring breaks of every weekday, compiled once per barber
+    templates = [as_weekly_template(barber_schedules.get(barber_id)) for barber_id in barber_ids]
+    week_start = np.zeros((barber_count, DAYS_PER_WEEK), dtype=np.int16)
+    week_end = np.zeros((barber_count, DAYS_PER_WEEK), dtype=np.int16)
+    week_working = np.zeros((barber_count, DAYS_PER_WEEK), dtype=bool)
+    for index, template in enumerate(templates):
+        for weekday, day_hours in enumerate(template.hours):
+            if day_hours is not None:
+                week_start[index, weekday], week_end[index, weekday] = day_hours
+                week_working[index, weekday] = True
+
+    # Which (barber, day) cells are part of the output: inside the barber's range and a working weekday
+    day_offsets = np.arange(day_count)
+    weekdays = np.array([day.weekday() for day in days], dtype=np.intp)
+    first_day = np.array([(start - horizon_start).days for start in range_starts])
+    last_day = np.array([(end - horizon_start).days for end in range_ends])
+    in_range = (day_offsets >= first_day[:, None]) & (day_offsets <= last_day[:, None])
+    in_output = in_range & week_working[:, weekdays]
+
+    # Working hours per (barber, day), stamped from the weekly templates and overridden by exceptions
+    open_start = week_start[:, weekdays]
+    open_end = week_end[:, weekdays]
+
+    for date_str, barber_exceptions in exceptions.items():
+        column = day_index.get(date.fromisoformat(date_str))
+        if column is None:
+            continue
+        for barber_id, custom_times in barber_exceptions.items():
+            if barber_id not in barber_index:
+                continue
+            row = barber_index[barber_id]
+            if custom_times is None:
+                in_output[row, column] = False
+            else:
+                # Custom hours also open a weekday the barber is usually off
+                in_output[row, column] = in_range[row, column]
+                open_start[row, column] = minute_of_day(custom_times[0])
+                open_end[row, column] = minute_of_day(custom_times[1])
+
+    open_start[~in_output] = 0
+    open_end[~in_output] = 0
+
+    # Busy intervals (bookings and breaks) as flat (barber, day, start, end) arrays
+    busy_rows, busy_days, busy_starts, busy_ends = [], [], [], []
+    for barber_id in barber_ids:
+        row = barber_index[barber_id]
+        for booking_time, service_duration in existing_bookings.get(barber_id, []):
+            booking_start = datetime.fromisoformat(booking_time)
+            column = day_index.get(booking_start.date())
+            if column is None:
+                continue
+            start_minute = minute_of_day(booking_start)
+            busy_rows.append(row)
+            busy_days.append(column)
+            busy_starts.append(start_minute)
+            busy_ends.append(start_minute + duration_in_minutes(service_duration))
+        for date_str, intervals in breaks.get(barber_id, {}).items():
+            column = day_index.get(date.fromisoformat(date_str))
+            if column is None:
+                continue
+            for break_start, break_end in intervals:
+                busy_rows.append(row)
+                busy_days.append(column)
+                busy_starts.append(break_start)
+                busy_ends.append(break_end)
+
+    busy_rows = np.array(busy_rows, dtype=np.intp)
+    busy_days = np.array(busy_days, dtype=np.intp)
+    busy_starts = np.clip(np.array(busy_starts, dtype=np.int64), 0, MINUTES_PER_DAY)
+    busy_ends = np.clip(np.array(busy_ends, dtype=np.int64), 0, MINUTES_PER_DAY)
+
+    # Recurring breaks as one (barber, weekday, minute) array, stamped onto every day by its weekday
+    weekly_busy = None
+    if any(template.breaks[weekday] for template in templates for weekday in range(DAYS_PER_WEEK)):
+        weekly_busy = np.zeros((barber_count, DAYS_PER_WEEK, MINUTES_PER_DAY), dtype=bool)
+        for index, template in enumerate(templates):
+            for weekday, intervals in enumerate(template.breaks):
+                for break_start, break_end in intervals:
+                    weekly_busy[index, weekday, max(break_start, 0):min(break_end, MINUTES_PER_DAY)] = True
+
+    # Earliest start minute of each day, hides slots that are already past
+    not_before = np.array([0 if include_past else first_free_minute(now, day) for day in days], dtype=np.int16)
+
+    # Rounded up like the sequential engine does, a 22.5 minute service takes 23 minutes
+    duration = duration_in_minutes(service_duration_minutes)
+    found_rows, found_days, found_minutes = [], [], []
+
+    # Nothing can fit without a positive duration and step, every barber-day just stays empty
+    chunk_starts = range(0, barber_count, BARBER_CHUNK_SIZE) if duration > 0 and gap_minutes > 0 else ()
+
+    for chunk_start in chunk_starts:
+        chunk_end = min(chunk_start + BARBER_CHUNK_SIZE, barber_count)
+        rows = chunk_end - chunk_start
+
+        free = (_MINUTES >= open_start[chunk_start:chunk_end, :, None]) & \
+            (_MINUTES < open_end[chunk_start:chunk_end, :, None])
+
+        if weekly_busy is not None:
+            free &= ~weekly_busy[chunk_start:chunk_end][:, weekdays]
+
+        # Apply bookings and breaks with a difference array: +1 at start, -1 at end, then cumulate
+        in_chunk = (busy_rows >= chunk_start) & (busy_rows < chunk_end)
+        if in_chunk.any():
+            changes = np.zeros((rows, day_count, MINUTES_PER_DAY + 1), dtype=np.int16)
+            chunk_rows = busy_rows[in_chunk] - chunk_start
+            chunk_days = busy_days[in_chunk]
+            np.add.at(changes, (chunk_rows, chunk_days, busy_starts[in_chunk]), 1)
+            np.add.at(changes, (chunk_rows, chunk_days, busy_ends[in_chunk]), -1)
+            free &= np.cumsum(changes[:, :, :MINUTES_PER_DAY], axis=-1, dtype=np.int16) <= 0
+
+        # Sliding-window sum: the service fits at s when all `duration` minutes from s are free
+        fits = np.zeros_like(free)
+        if duration <= MINUTES_PER_DAY:
+            free_count = np.zeros((rows, day_count, MINUTES_PER_DAY + 1), dtype=np.int16)
+            np.cumsum(free, axis=-1, dtype=np.int16, out=free_count[:, :, 1:])
+            fits[:, :, :MINUTES_PER_DAY - duration + 1] = \
+                (free_count[:, :, duration:] - free_count[:, :, :MINUTES_PER_DAY - duration + 1]) == duration
+
+        # Start times step by gap_minutes from the beginning of each free run
+        run_begins = free.copy()
+        run_begins[:, :, 1:] &= ~free[:, :, :-1]
+        run_start = np.maximum.accumulate(np.where(run_begins, _MINUTES, 0), axis=-1)
+        on_grid = (_MINUTES - run_start) % gap_minutes == 0
+
+        valid = fits & on_grid & (_MINUTES >= not_before[None, :, None])
+        chunk_rows, chunk_days, chunk_minutes = np.nonzero(valid)
+        found_rows.append(chunk_rows + chunk_start)
+        found_days.append(chunk_days)
+        found_minutes.append(chunk_minutes)
+
+    # Every barber-day in range gets an entry, even without free slots
+    for row, column in zip(*np.nonzero(in_output)):
+        slots_by_barber[barber_ids[row]][day_strings[column]] = []
+
+    rows = np.concatenate(found_rows) if found_rows else np.zeros(0, dtype=np.intp)
+    if not len(rows):
+        return slots_by_barber
+
+    columns = np.concatenate(found_days)
+    minutes = np.concatenate(found_minutes)
+
+    # np.nonzero returns the slots in (barber, day, minute) order, find where each barber-day begins
+    cells = rows * day_count + columns
+    boundaries = np.flatnonzero(np.diff(cells)) + 1
+    firsts = np.concatenate(([0], boundaries)).tolist()
+    lasts = np.concatenate((boundaries, [len(cells)])).tolist()
+
+    if as_minutes:
+        for first, last in zip(firsts, lasts):
+            slots_by_barber[barber_ids[rows[first]]][day_strings[columns[first]]] = minutes[first:last].tolist()
+        return slots_by_barber
+
+    # Convert to datetimes in bulk and slice one list per barber-day
+    day_values = np.array(days, dtype='datetime64[D]')
+    starts = day_values[columns] + minutes.astype('timedelta64[m]')
+    ends = starts + np.timedelta64(duration, 'm')
+    start_values = starts.astype('datetime64[us]').astype(object)
+    end_values = ends.astype('datetime64[us]').astype(object)
+
+    for first, last in zip(firsts, lasts):
+        slots_by_barber[barber_ids[rows[first]]][day_strings[columns[first]]] = list(
+            zip(start_values[first:last], end_values[first:last])
+        )
+
+    return slots_by_barber
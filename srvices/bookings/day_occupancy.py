@@ -0,0 +1,223 @@
+from datetime import datetime, time, timedelta
+from math import ceil
+
+MINUTES_PER_DAY = 24 * 60
+
+# A break given as a single slot time (e.g. by /add_barber_break_slot) blocks this many minutes
+BREAK_SLOT_MINUTES = 15
+
+FULL_DAY_MASK = (1 << MINUTES_PER_DAY) - 1
+
+# 'HH:MM' for every minute of the day, so formatting a slot never calls strftime
+MINUTE_LABELS = tuple(f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(MINUTES_PER_DAY))
+
+
+def minute_of_day(value):
+    """
+    Convert a time of day into the number of minutes since midnight.
+
+    Parameters:
+    - value (str, datetime.time, datetime.datetime or datetime.timedelta): 'HH:MM' / 'HH:MM:SS' string or time value.
+
+    Returns:
+    - int: Minutes since midnight (seconds are truncated).
+    """
+    if isinstance(value, str):
+        parts = value.split(':')
+        return int(parts[0]) * 60 + int(parts[1])
+    if isinstance(value, timedelta):
+        return int(value.total_seconds() // 60)
+    return value.hour * 60 + value.minute
+
+
+def duration_in_minutes(value):
+    """
+    Convert a duration into whole minutes, rounding partial minutes up.
+
+    Parameters:
+    - value (int, float, datetime.timedelta or None): The duration.
+
+    Returns:
+    - int: The duration in minutes.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, timedelta):
+        value = value.total_seconds() / 60
+    return int(ceil(value))
+
+
+def first_free_minute(now, day):
+    """
+    Return the first minute of `day` that is not in the past at `now`.
+
+    Parameters:
+    - now (datetime.datetime): The current time.
+    - day (datetime.date): The day being scheduled.
+
+    Returns:
+    - int: 0 for future days, MINUTES_PER_DAY for past days, otherwise the current minute rounded up.
+    """
+    today = now.date()
+    if day > today:
+        return 0
+    if day < today:
+        return MINUTES_PER_DAY
+    seconds = now.hour * 3600 + now.minute * 60 + now.second + (1 if now.microsecond else 0)
+    return -(-seconds // 60)
+
+
+def interval_mask(start, end):
+    """
+    Build a bit mask with one bit set for every minute in [start, end).
+
+    Parameters:
+    - start (int): First minute of the interval.
+    - end (int): Minute right after the interval.
+
+    Returns:
+    - int: The mask, clipped to the day.
+    """
+    start = max(start, 0)
+    end = min(end, MINUTES_PER_DAY)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def minute_label(minute):
+    """
+    Format a minute of the day as 'HH:MM', with the end of the day as '24:00'.
+
+    Parameters:
+    - minute (int): Minutes since midnight, 0 to MINUTES_PER_DAY.
+
+    Returns:
+    - str: The label, PostgreSQL accepts '24:00' as a TIME.
+    """
+    return MINUTE_LABELS[minute] if minute < MINUTES_PER_DAY else "24:00"
+
+
+def parse_minute_label(value):
+    """
+    Parse an 'HH:MM' label into minutes since midnight, the inverse of minute_label().
+
+    Parameters:
+    - value (str): 'HH:MM', or '24:00' for the end of the day.
+
+    Returns:
+    - int: Minutes since midnight, 0 to MINUTES_PER_DAY.
+
+    Raises:
+    - ValueError: If the value is not a valid label.
+    """
+    if value == "24:00":
+        return MINUTES_PER_DAY
+    return minute_of_day(datetime.strptime(value, "%H:%M").time())
+
+
+def merge_intervals(intervals):
+    """
+    Merge overlapping or touching [start, end) intervals.
+
+    Parameters:
+    - intervals (iterable): (start, end) pairs in minutes, in any order.
+
+    Returns:
+    - list: Sorted, disjoint (start, end) pairs.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def minute_to_datetime(day, minute):
+    """Combine a date and a minute of the day into a datetime."""
+    return datetime.combine(day, time.min) + timedelta(minutes=minute)
+
+
+class DayOccupancy:
+    """
+    Occupancy of one barber for one day, stored as one bit per minute.
+
+    A set bit means the minute is not bookable: outside working hours, booked,
+    on a break or otherwise blocked. Bookings, breaks and exceptions are applied
+    as mask operations and free time is found with a run-length scan.
+    """
+
+    __slots__ = ('busy',)
+
+    @classmethod
+    def from_mask(cls, busy):
+        """Build a day from a precomputed busy mask, e.g. one stamped from a weekly template."""
+        occupancy = cls.__new__(cls)
+        occupancy.busy = busy
+        return occupancy
+
+    def __init__(self, open_start=0, open_end=MINUTES_PER_DAY):
+        """
+        Parameters:
+        - open_start (int): First working minute of the day.
+        - open_end (int): Minute at which the working day ends.
+        """
+        self.busy = FULL_DAY_MASK & ~interval_mask(open_start, open_end)
+
+    def block(self, start, end):
+        """Mark the minutes in [start, end) as busy."""
+        self.busy |= interval_mask(start, end)
+
+    def is_free(self, start, end):
+        """Return True if every minute in [start, end) is free."""
+        mask = interval_mask(start, end)
+        return bool(mask) and end <= MINUTES_PER_DAY and not self.busy & mask
+
+    def free_runs(self):
+        """
+        Yield the maximal free intervals of the day.
+
+        Returns:
+        - generator of (start, end) tuples in minutes, in chronological order.
+        """
+        free = ~self.busy & FULL_DAY_MASK
+        while free:
+            start = (free & -free).bit_length() - 1
+            shifted = free >> start
+            # The lowest clear bit of `shifted` marks the end of the run
+            length = ((shifted + 1) & ~shifted).bit_length() - 1
+            yield start, start + length
+            free &= ~(((1 << length) - 1) << start)
+
+    def fitting_starts(self, duration, step, not_before=0, anchor=None):
+        """
+        Find every start minute where a service of `duration` minutes fits.
+
+        Parameters:
+        - duration (int): Length of the service in minutes.
+        - step (int): Minutes between two consecutive candidate start times.
+        - not_before (int): Earliest allowed start minute (used to hide past slots).
+        - anchor (int, optional): Align start times to `anchor + k * step` for the whole day.
+          By default the grid restarts at the beginning of every free run, so slots follow
+          right after a booking or break ends.
+
+        Returns:
+        - list: Start minutes in chronological order.
+        """
+        starts = []
+        if step <= 0 or duration <= 0:
+            return starts
+
+        for run_start, run_end in self.free_runs():
+            base = run_start if anchor is None else anchor
+            first = max(run_start, not_before)
+            # Round the first candidate up to the next point of the grid
+            first = base + -(-(first - base) // step) * step
+            last = run_end - duration
+            if first <= last:
+                starts.extend(range(first, last + 1, step))
+
+        return starts
@@ -0,0 +1,114 @@
+from srvices.bookings.day_occupancy import (
+    FULL_DAY_MASK, DayOccupancy, interval_mask, merge_intervals, minute_of_day
+)
+
+DAYS_PER_WEEK = 7
+
+WEEKDAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Weekdays without a BarberWeeklySchedules row follow the default hours, except these, which stay off
+DEFAULT_DAYS_OFF = frozenset({6})
+
+
+class WeeklyTemplate:
+    """
+    One barber's week, compiled once into per-weekday occupancy masks.
+
+    Working hours come from the weekly schedule, or the default hours for weekdays without
+    one, and recurring breaks are blocked on top. The slot engines stamp the mask of a day's
+    weekday instead of rebuilding the day, and only exceptions still change it per date.
+    """
+
+    __slots__ = ('hours', 'breaks', 'break_masks', 'busy')
+
+    def __init__(self, hours, breaks):
+        """
+        Parameters:
+        - hours (sequence): 7 (start, end) working hours in minutes, or None for a day off, Monday first.
+        - breaks (sequence): 7 lists of (start, end) recurring breaks in minutes.
+        """
+        self.hours = tuple(hours)
+        self.breaks = tuple(merge_intervals(intervals) for intervals in breaks)
+        self.break_masks = tuple(
+            _intervals_mask(intervals) for intervals in self.breaks
+        )
+        self.busy = tuple(
+            None if day_hours is None else (FULL_DAY_MASK & ~interval_mask(*day_hours)) | break_mask
+            for day_hours, break_mask in zip(self.hours, self.break_masks)
+        )
+
+    def is_working_day(self, weekday):
+        """Return True if the barber works on `weekday` (0 is Monday) without an exception."""
+        return self.hours[weekday] is not None
+
+    def occupancy(self, weekday, custom_hours=None):
+        """
+        Stamp the template onto one day.
+
+        Parameters:
+        - weekday (int): The day of the week, 0 is Monday.
+        - custom_hours (tuple, optional): (start, end) working hours of an exception for that date,
+          in minutes. Recurring breaks still apply.
+
+        Returns:
+        - DayOccupancy or None: The day before bookings and dated breaks, None on a day off.
+        """
+        if custom_hours is not None:
+            busy = (FULL_DAY_MASK & ~interval_mask(*custom_hours)) | self.break_masks[weekday]
+        else:
+            busy = self.busy[weekday]
+            if busy is None:
+                return None
+        return DayOccupancy.from_mask(busy)
+
+
+def _intervals_mask(intervals):
+    mask = 0
+    for start, end in intervals:
+        mask |= interval_mask(start, end)
+    return mask
+
+
+def compile_weekly_template(default_hours=None, weekly_hours=None, recurring_breaks=None):
+    """
+    Compile a barber's default hours, weekly schedule and recurring breaks into a WeeklyTemplate.
+
+    Parameters:
+    - default_hours (tuple, optional): ('HH:MM', 'HH:MM') hours from BarberSchedules, None if there is none.
+    - weekly_hours (dict, optional): Weekdays mapped to (start, end) hours in minutes, or None for a day off.
+    - recurring_breaks (dict, optional): Weekdays mapped to lists of (start, end) breaks in minutes.
+
+    Returns:
+    - WeeklyTemplate: The compiled template.
+    """
+    weekly_hours = weekly_hours or {}
+    recurring_breaks = recurring_breaks or {}
+    if default_hours is not None:
+        default_hours = (minute_of_day(default_hours[0]), minute_of_day(default_hours[1]))
+
+    hours = []
+    for weekday in range(DAYS_PER_WEEK):
+        if weekday in weekly_hours:
+            hours.append(weekly_hours[weekday])
+        elif weekday in DEFAULT_DAYS_OFF or default_hours is None:
+            hours.append(None)
+        else:
+            hours.append(default_hours)
+
+    return WeeklyTemplate(hours, [recurring_breaks.get(weekday, []) for weekday in range(DAYS_PER_WEEK)])
+
+
+def as_weekly_template(schedule):
+    """
+    Accept either a compiled WeeklyTemplate or plain ('HH:MM', 'HH:MM') default hours.
+
+    Parameters:
+    - schedule (WeeklyTemplate, tuple or None): A value of the barber_schedules dict.
+
+    Returns:
+    - WeeklyTemplate: The template. A barber without any schedule has empty working hours.
+    """
+    if isinstance(schedule, WeeklyTemplate):
+        return schedule
+    return compile_weekly_template(schedule or ('00:00', '00:00'))
+
@@ -0,0 +1,235 @@
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime
+import os
+import sys
+import threading
+
+from dotenv import load_dotenv
+
+from srvices.cache.invalidation import (
+    BOOKINGS, BREAKS, EXCEPTIONS, SCHEDULES, register_invalidation_handler
+)
+from srvices.observability.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Memory cap of the cache, evicting least recently used entries first
+AVAILABILITY_CACHE_MAX_ENTRIES = int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", "20000"))
+AVAILABILITY_CACHE_MAX_BYTES = int(os.getenv("AVAILABILITY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Stored for barber-days that have no slots list at all (day off)
+DAY_OFF = None
+
+# Returned by get() on a miss, DAY_OFF is a valid cached value
+CACHE_MISS = object()
+
+# Writes that change which slots are free
+AVAILABILITY_KINDS = (BOOKINGS, BREAKS, EXCEPTIONS, SCHEDULES)
+
+# Rough per-entry bookkeeping cost (key tuple, dict slots, index sets)
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+def normalize_cache_date(value):
+    """
+    Convert a date, datetime or 'YYYY-MM-DD' string into a datetime.date.
+
+    Parameters:
+    - value (datetime.date, datetime.datetime or str): The date to normalize.
+
+    Returns:
+    - datetime.date: The normalized date.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+class AvailabilityCache:
+    """
+    In-process LRU cache of computed slot start times per barber-day.
+
+    Keys are (barber_id, date, service duration, gap_minutes, anchor), where `anchor` tells
+    the calendar grid (None, restarting after every booking) and the fixed quarter-hour grid
+    of /available-slots (0) apart. Values are the start minutes of every slot of the day
+    *before* past slots are removed, so a cached day stays valid as time moves on; readers
+    filter with first_free_minute when they serve it.
+
+    Entries are dropped by the write paths that change availability, see invalidate().
+    """
+
+    def __init__(self, max_entries=AVAILABILITY_CACHE_MAX_ENTRIES, max_bytes=AVAILABILITY_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._keys_by_barber_day = {}
+        self._bytes = 0
+        self._generations = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(barber_id, day, duration_minutes, gap_minutes, anchor=None):
+        return (int(barber_id), normalize_cache_date(day), int(duration_minutes), int(gap_minutes), anchor)
+
+    @staticmethod
+    def _entry_size(value):
+        if value is DAY_OFF:
+            return _ENTRY_OVERHEAD_BYTES
+        return _ENTRY_OVERHEAD_BYTES + sys.getsizeof(value)
+
+    def get(self, key, default=CACHE_MISS):
+        """Return the cached start minutes for `key`, or `default` (CACHE_MISS) on a miss."""
+        with self._lock:
+            value = self._entries.get(key, CACHE_MISS)
+            if value is CACHE_MISS:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, barber_id):
+        """
+        Return a token that changes whenever the barber's availability is invalidated.
+
+        Take it before loading data from the database and hand it to put(), so a result
+        computed from rows that were changed in the meantime is never cached.
+        """
+        with self._lock:
+            return self._global_generation, self._generations.get(int(barber_id), 0)
+
+    def put(self, key, start_minutes, generation=None):
+        """
+        Store the start minutes of a barber-day.
+
+        Parameters:
+        - key (tuple): A key built with make_key().
+        - start_minutes (iterable of int or None): Slot start minutes, or DAY_OFF.
+        - generation (tuple, optional): Token from generation() taken before the data was loaded.
+        """
+        value = DAY_OFF if start_minutes is DAY_OFF else array('H', start_minutes)
+        size = self._entry_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != (self._global_generation, self._generations.get(key[0], 0)):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self._keys_by_barber_day.setdefault(key[:2], set()).add(key)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key):
+        value = self._entries.pop(key)
+        self._bytes -= self._entry_size(value)
+        keys = self._keys_by_barber_day.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_barber_day[key[:2]]
+
+    def invalidate(self, barber_id, day=None):
+        """
+        Drop cached availability of a barber, for one date or for every date.
+
+        Parameters:
+        - barber_id (int): The ID of the barber.
+        - day (datetime.date or str, optional): The affected date. None drops every date of the barber.
+
+        Returns:
+        - int: The number of entries removed.
+        """
+        barber_id = int(barber_id)
+        with self._lock:
+            if day is None:
+                barber_days = [barber_day for barber_day in self._keys_by_barber_day if barber_day[0] == barber_id]
+            else:
+                barber_days = [(barber_id, normalize_cache_date(day))]
+
+            self._generations[barber_id] = self._generations.get(barber_id, 0) + 1
+
+            removed = 0
+            for barber_day in barber_days:
+                for key in list(self._keys_by_barber_day.get(barber_day, ())):
+                    self._remove(key)
+                    removed += 1
+
+            self.invalidations += 1
+            return removed
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_barber_day.clear()
+            self._bytes = 0
+            self._global_generation += 1
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        - dict: hits, misses, evictions, invalidations, entries, bytes and the configured limits.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Shared by every request handled by this worker
+availability_cache = AvailabilityCache()
+
+
+def invalidate_availability(barber_id=None, day=None):
+    """
+    Drop cached availability after a write that changed a barber's bookings, breaks,
+    exceptions or schedule.
+
+    Parameters:
+    - barber_id (int, optional): The ID of the barber, None for every barber.
+    - day (datetime.date, datetime.datetime or str, optional): The affected date, None for every date.
+    """
+    if barber_id is None:
+        availability_cache.clear()
+        return
+
+    try:
+        availability_cache.invalidate(barber_id, day)
+    except (TypeError, ValueError) as e:
+        # Can't tell exactly what changed, drop everything rather than serve stale slots
+        logger.error("Error occurred while invalidating availability cache: %s", e)
+        availability_cache.clear()
+
+
+def _on_invalidation(kind, barber_id, day):
+    if kind is None or kind in AVAILABILITY_KINDS:
+        invalidate_availability(barber_id, day)
+
+
+register_invalidation_handler(_on_invalidation)
@@ -0,0 +1,216 @@
+from collections import namedtuple
+from datetime import timedelta
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from dotenv import load_dotenv
+
+from database.get_catalog.fetch_catalog import fetch_catalog
+from srvices.cache.invalidation import CATALOG, register_invalidation_handler
+from srvices.observability.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Catalog changes are pushed with a CATALOG invalidation event, this is only a safety net
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", "3600"))
+
+Service = namedtuple("Service", "service_id service_name category_name description estimated_time price")
+Barber = namedtuple("Barber", "barber_id name")
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of the service catalog at one point in time.
+
+    Holds categories, services and their durations, the barber <-> service mapping and the
+    barber x service price matrix, indexed for O(1) lookups by name or id. A snapshot is
+    never modified: a refresh builds a new one and swaps the module reference, so a request
+    that grabbed a snapshot keeps a consistent view until it finishes.
+    """
+
+    __slots__ = (
+        "services_by_id", "service_ids_by_name", "barbers_by_id", "barber_ids_by_service",
+        "service_ids_by_category", "prices", "loaded_at", "version"
+    )
+
+    def __init__(self, rows, version=0):
+        """
+        Parameters:
+        - rows (dict): Catalog rows as returned by fetch_catalog().
+        - version (int): Number of this snapshot, increases with every refresh of the process.
+        """
+        services_by_id = {}
+        service_ids_by_name = {}
+        service_ids_by_category = {}
+        for service_id, service_name, category_name, description, estimated_time, price in rows["services"]:
+            services_by_id[service_id] = Service(service_id, service_name, category_name, description, estimated_time, price)
+            service_ids_by_name.setdefault(service_name, []).append(service_id)
+            if category_name is not None:
+                service_ids_by_category.setdefault(category_name, []).append(service_id)
+
+        barber_ids_by_service = {}
+        for barber_id, service_id in rows["barber_services"]:
+            barber_ids_by_service.setdefault(service_id, []).append(barber_id)
+
+        self.services_by_id = MappingProxyType(services_by_id)
+        self.service_ids_by_name = MappingProxyType({name: tuple(ids) for name, ids in service_ids_by_name.items()})
+        self.service_ids_by_category = MappingProxyType({name: tuple(ids) for name, ids in service_ids_by_category.items()})
+        self.barbers_by_id = MappingProxyType({barber_id: Barber(barber_id, name) for barber_id, name in rows["barbers"]})
+        self.barber_ids_by_service = MappingProxyType({service_id: tuple(ids) for service_id, ids in barber_ids_by_service.items()})
+        self.prices = MappingProxyType({
+            (barber_id, service_id): price for barber_id, service_id, price in rows["barber_service_prices"]
+        })
+        self.loaded_at = time.monotonic()
+        self.version = version
+
+    def service_ids_for_names(self, service_names):
+        """
+        Return the IDs of the services with the given names.
+
+        Parameters:
+        - service_names (list): A list of service names.
+
+        Returns:
+        - list: Service IDs, unknown names are left out.
+        """
+        return [
+            service_id
+            for service_name in dict.fromkeys(service_names)
+            for service_id in self.service_ids_by_name.get(service_name, ())
+        ]
+
+    def barbers_for_services(self, service_names):
+        """
+        Return every barber performing any of the services, and the total estimated time.
+
+        Parameters:
+        - service_names (list): A list of service names.
+
+        Returns:
+        - dict: {"barbers": [{"barber_id", "name"}], "estimated_time": minutes}, with the time of
+          each distinct service name counted once. None if no barber performs any of them.
+        """
+        barber_ids = set()
+        total_estimated_time = 0
+        for service_name in dict.fromkeys(service_names):
+            counted = False
+            for service_id in self.service_ids_by_name.get(service_name, ()):
+                performers = self.barber_ids_by_service.get(service_id, ())
+                if not performers:
+                    continue
+                barber_ids.update(performers)
+                if not counted:
+                    estimated_time = self.services_by_id[service_id].estimated_time
+                    total_estimated_time += (
+                        estimated_time.total_seconds() / 60 if isinstance(estimated_time, timedelta) else estimated_time
+                    )
+                    counted = True
+
+        if not barber_ids:
+            return None
+
+        return {
+            "barbers": [
+                {"barber_id": barber_id, "name": self.barbers_by_id[barber_id].name}
+                for barber_id in sorted(barber_ids) if barber_id in self.barbers_by_id
+            ],
+            "estimated_time": total_estimated_time
+        }
+
+    def total_prices(self, barber_ids, service_ids):
+        """
+        Return the total price of the services for each barber.
+
+        Parameters:
+        - barber_ids (list): The barbers to price.
+        - service_ids (list): The services to add up.
+
+        Returns:
+        - dict: Barber IDs mapped to the total price, barbers without any price are left out.
+        """
+        barber_prices = {}
+        service_ids = list(dict.fromkeys(service_ids or ()))
+        for barber_id in barber_ids:
+            prices = [self.prices[barber_id, service_id] for service_id in service_ids if (barber_id, service_id) in self.prices]
+            if prices:
+                barber_prices[barber_id] = float(sum(prices))
+        return barber_prices
+
+    def categories_and_services(self):
+        """
+        Return the categories with their priced services, in the /get_categories_and_services format.
+
+        Returns:
+        - dict: Category names mapped to lists of services (service_id, service_name, description,
+          estimated_time in minutes, price).
+        """
+        priced_services = {service_id for barber_id, service_id in self.prices if barber_id in self.barbers_by_id}
+        categories_services = {}
+        for category_name, service_ids in self.service_ids_by_category.items():
+            for service_id in service_ids:
+                if service_id not in priced_services:
+                    continue
+                service = self.services_by_id[service_id]
+                categories_services.setdefault(category_name, []).append({
+                    "service_id": service.service_id,
+                    "service_name": service.service_name,
+                    "description": service.description,
+                    "estimated_time": (
+                        int(service.estimated_time.total_seconds() / 60)
+                        if isinstance(service.estimated_time, timedelta) else None
+                    ),
+                    "price": service.price
+                })
+        return categories_services
+
+
+_snapshot = None
+_refresh_lock = threading.Lock()
+_stale_lock = threading.Lock()
+
+
+def refresh_catalog():
+    """
+    Load a new catalog snapshot from the database and swap it in.
+
+    Returns:
+    - CatalogSnapshot: The new snapshot, or the previous one (possibly None) if loading failed.
+    """
+    global _snapshot
+    with _refresh_lock:
+        rows = fetch_catalog()
+        if rows is None:
+            logger.error("Keeping the previous catalog snapshot, loading a new one failed")
+            return _snapshot
+        _snapshot = CatalogSnapshot(rows, version=_snapshot.version + 1 if _snapshot else 1)
+        logger.info("Catalog snapshot loaded with %s services", len(_snapshot.services_by_id))
+        return _snapshot
+
+
+def get_catalog():
+    """
+    Return the current catalog snapshot, loading it on first use or once it is too old.
+
+    Returns:
+    - CatalogSnapshot: The snapshot, or None if it was never loaded and the database can't be read.
+    """
+    snapshot = _snapshot
+    if snapshot is None or time.monotonic() - snapshot.loaded_at > CATALOG_MAX_AGE_SECONDS:
+        with _stale_lock:
+            # Another request may have reloaded it while we waited
+            if _snapshot is snapshot:
+                refresh_catalog()
+        snapshot = _snapshot
+    return snapshot
+
+
+def _on_invalidation(kind, barber_id, day):
+    if kind is None or kind == CATALOG:
+        refresh_catalog()
+
+
+register_invalidation_handler(_on_invalidation)
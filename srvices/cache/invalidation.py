@@ -0,0 +1,208 @@
+import json
+import os
+import select
+import socket
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions, sql
+from dotenv import load_dotenv
+
+from database.database_conn import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER, current_unit_of_work
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+# Channel every worker LISTENs on for cache invalidation events
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache_invalidation")
+
+# Set to 0 to run without the listener thread (single worker, scripts)
+CACHE_INVALIDATION_LISTENER = os.getenv("CACHE_INVALIDATION_LISTENER", "1") == "1"
+
+# How long the listener waits for a notification before checking the connection again
+LISTEN_POLL_SECONDS = 5
+
+# Longest wait between two reconnect attempts of the listener
+LISTEN_MAX_RETRY_SECONDS = 30
+
+# What a write changed, handlers decide which of their entries depend on it
+BOOKINGS = "bookings"
+BREAKS = "breaks"
+EXCEPTIONS = "exceptions"
+SCHEDULES = "schedules"
+CATALOG = "catalog"
+
+_handlers = []
+_listener_thread = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+# Set while the listener of this process is connected and its caches were resynced
+_listener_connected = threading.Event()
+
+
+def worker_origin():
+    """Identify this worker process, so it can skip the events it published itself."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def register_invalidation_handler(handler):
+    """
+    Register a cache to be invalidated by local writes and by events from other workers.
+
+    Parameters:
+    - handler (callable): Called as handler(kind, barber_id, day). kind, barber_id and day
+      are all None when the whole cache must be dropped (e.g. events may have been missed).
+    """
+    if handler not in _handlers:
+        _handlers.append(handler)
+
+
+def apply_invalidation(kind=None, barber_id=None, day=None):
+    """
+    Run every registered handler for a change in this process.
+
+    Inside a unit of work that holds a connection the handlers run once it commits, and not at
+    all if it rolls back, so no cache is refilled from data that is not committed yet.
+
+    Parameters:
+    - kind (str, optional): What changed (BOOKINGS, BREAKS, EXCEPTIONS, SCHEDULES, CATALOG), None for everything.
+    - barber_id (int, optional): The affected barber, None for every barber.
+    - day (datetime.date, datetime.datetime or str, optional): The affected date, None for every date.
+    """
+    unit = current_unit_of_work()
+    if unit is not None and unit.conn is not None:
+        unit.after_commit(lambda: _run_handlers(kind, barber_id, day))
+        return
+    _run_handlers(kind, barber_id, day)
+
+
+def _run_handlers(kind, barber_id, day):
+    for handler in list(_handlers):
+        try:
+            handler(kind, barber_id, day)
+        except Exception as e:
+            logger.error("Error occurred while applying cache invalidation: %s", e)
+
+
+def notify_invalidation(cursor, kind, barber_id=None, day=None):
+    """
+    Publish a cache invalidation event to the other workers.
+
+    Runs pg_notify inside the caller's transaction, so the event is only delivered once the
+    write commits and never for a rolled back one. The caller applies the change to its own
+    caches with apply_invalidation() after the commit.
+
+    Parameters:
+    - cursor: A cursor of the connection doing the write.
+    - kind (str): What changed (BOOKINGS, BREAKS, EXCEPTIONS, SCHEDULES, CATALOG).
+    - barber_id (int, optional): The affected barber, None for every barber.
+    - day (datetime.date, datetime.datetime or str, optional): The affected date, None for every date.
+    """
+    if day is not None and hasattr(day, "isoformat"):
+        day = day.isoformat()
+    payload = json.dumps({
+        "kind": kind,
+        "barber_id": barber_id,
+        "date": str(day)[:10] if day is not None else None,
+        "origin": worker_origin(),
+    })
+    cursor.execute("SELECT pg_notify(%s, %s)", (CACHE_INVALIDATION_CHANNEL, payload))
+
+
+def _handle_notification(payload):
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        # Can't tell what changed, drop everything rather than serve stale data
+        apply_invalidation()
+        return
+
+    if event.get("origin") == worker_origin():
+        return
+    apply_invalidation(event.get("kind"), event.get("barber_id"), event.get("date"))
+
+
+def _listen_forever():
+    retry_seconds = 1
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(
+                user=DB_USER,
+                password=DB_PASSWORD,
+                host=DB_HOST,
+                port=DB_PORT,
+                database=DB_NAME
+            )
+            conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            cur = conn.cursor()
+            cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(CACHE_INVALIDATION_CHANNEL)))
+
+            # Events sent while we were not listening are lost, start over from empty caches
+            apply_invalidation()
+            _listener_connected.set()
+            retry_seconds = 1
+
+            while True:
+                if select.select([conn], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    _handle_notification(notification.payload)
+
+        except Exception as e:
+            logger.error("Error occurred in the cache invalidation listener: %s", e)
+
+        finally:
+            _listener_connected.clear()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+        time.sleep(retry_seconds)
+        retry_seconds = min(retry_seconds * 2, LISTEN_MAX_RETRY_SECONDS)
+
+
+def start_invalidation_listener():
+    """
+    Start the background thread applying invalidation events from other workers.
+
+    Safe to call more than once, and again in a forked worker: a process gets a single listener.
+    """
+    global _listener_thread, _listener_pid
+    if not CACHE_INVALIDATION_LISTENER:
+        return
+
+    with _listener_lock:
+        if _listener_pid == os.getpid() and _listener_thread is not None and _listener_thread.is_alive():
+            return
+        _listener_connected.clear()
+        _listener_thread = threading.Thread(
+            target=_listen_forever, name="cache-invalidation-listener", daemon=True
+        )
+        _listener_pid = os.getpid()
+        _listener_thread.start()
+
+
+def wait_for_invalidation_listener(timeout):
+    """
+    Wait until the listener of this process is connected.
+
+    It drops every cache when it connects, so caches warmed before that would be lost.
+
+    Parameters:
+    - timeout (float): Seconds to wait at most.
+
+    Returns:
+    - bool: True once the listener is connected, or if it is not running in this process.
+    """
+    if not CACHE_INVALIDATION_LISTENER or _listener_pid != os.getpid():
+        return True
+    return _listener_connected.wait(timeout)
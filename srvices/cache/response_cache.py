@@ -0,0 +1,184 @@
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+import hashlib
+import os
+import threading
+
+from dotenv import load_dotenv
+from flask import Response, make_response, request
+
+from srvices.cache.invalidation import register_invalidation_handler
+
+load_dotenv()
+
+# Number of cached response bodies kept per worker
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of serialized JSON responses of read-mostly GET endpoints.
+
+    Each entry keeps the body and its strong ETag, the hash of the body. The ETag only changes
+    when the data changes, and every worker computes the same one for the same data. Entries
+    are dropped by the invalidation events of the kinds of rows they were built from.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Bumped by a full clear, by every event of a kind, by the events of a kind about every
+        # barber, and by the events of a kind about one barber
+        self._global_generation = 0
+        self._kind_generations = {}
+        self._every_barber_generations = {}
+        self._barber_generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached (body, mimetype, etag) for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[:3]
+            return None
+
+    def _token(self, kinds, barber_id):
+        if barber_id is None:
+            # A body about every barber goes stale with any barber's change
+            return self._global_generation, tuple(self._kind_generations.get(kind, 0) for kind in kinds)
+        return self._global_generation, tuple(
+            (self._every_barber_generations.get(kind, 0), self._barber_generations.get((kind, barber_id), 0))
+            for kind in kinds
+        )
+
+    def generation(self, kinds, barber_id):
+        """
+        Return a token that changes whenever an entry of `kinds` about `barber_id` would be invalidated.
+
+        Like AvailabilityCache.generation(), take it before the data is read and hand it to put().
+        Events of other kinds or about other barbers leave it alone, so unrelated writes don't keep
+        the cache from filling.
+
+        Parameters:
+        - kinds (tuple): The invalidation kinds the body is built from.
+        - barber_id (int or None): The barber the body is about, None if it covers every barber.
+        """
+        with self._lock:
+            return self._token(kinds, barber_id)
+
+    def put(self, key, body, mimetype, kinds, barber_id, generation):
+        """
+        Store a response body unless an invalidation of its kinds and barber happened since `generation` was taken.
+
+        Parameters:
+        - key (tuple): The endpoint and the request parameters the body depends on.
+        - body (bytes): The serialized response.
+        - mimetype (str): The response mimetype.
+        - kinds (tuple): The invalidation kinds that make the body stale.
+        - barber_id (int or None): The barber the body is about, None if it covers every barber.
+        - generation (tuple): Token from generation(kinds, barber_id) taken before the data was read.
+
+        Returns:
+        - str: The ETag of the body.
+        """
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            if generation == self._token(kinds, barber_id):
+                self._entries[key] = (body, mimetype, etag, kinds, barber_id)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, kind=None, barber_id=None):
+        """
+        Drop the entries built from rows of `kind`, for one barber or for every barber.
+
+        Parameters:
+        - kind (str, optional): What changed, None drops every entry.
+        - barber_id (int, optional): The affected barber, None for every barber.
+        """
+        with self._lock:
+            if kind is None:
+                self._global_generation += 1
+                self._entries.clear()
+                return
+            self._kind_generations[kind] = self._kind_generations.get(kind, 0) + 1
+            if barber_id is None:
+                self._every_barber_generations[kind] = self._every_barber_generations.get(kind, 0) + 1
+            else:
+                self._barber_generations[(kind, barber_id)] = self._barber_generations.get((kind, barber_id), 0) + 1
+            for key, (_, _, _, kinds, entry_barber_id) in list(self._entries.items()):
+                if kind in kinds and (barber_id is None or entry_barber_id in (None, barber_id)):
+                    del self._entries[key]
+
+
+# Shared by every request handled by this worker
+response_cache = ResponseCache()
+
+
+def _on_invalidation(kind, barber_id, day):
+    try:
+        barber_id = int(barber_id) if barber_id is not None else None
+    except (TypeError, ValueError):
+        # Can't tell which barber changed, drop the kind for every barber
+        barber_id = None
+    response_cache.invalidate(kind, barber_id)
+
+
+register_invalidation_handler(_on_invalidation)
+
+
+def conditional_get(kinds, max_age=0, vary_on=("barber_id",), per_day=False, version=None):
+    """
+    Cache a GET endpoint's JSON response, answer with a strong ETag, 304 on If-None-Match and Cache-Control.
+
+    Only 200 responses are cached. Error responses are passed through untouched.
+
+    Parameters:
+    - kinds (tuple): Invalidation kinds (see srvices/cache/invalidation.py) the response is built from.
+    - max_age (int): Seconds browsers and CDNs may reuse the response without revalidating,
+      0 makes them revalidate every time (a cheap 304 when nothing changed).
+    - vary_on (tuple): Query parameters the response depends on. 'barber_id' also scopes invalidation.
+    - per_day (bool): The response depends on the current date (e.g. "from today onwards").
+    - version (callable, optional): Returns an extra key part, e.g. the catalog snapshot version.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (
+                request.endpoint,
+                tuple(request.args.get(name) for name in vary_on),
+                date.today() if per_day else None,
+                version() if version else None,
+            )
+
+            cached = response_cache.get(key)
+            if cached is not None:
+                body, mimetype, etag = cached
+                response = Response(body, status=200, mimetype=mimetype)
+            else:
+                try:
+                    barber_id = int(request.args.get("barber_id"))
+                except (TypeError, ValueError):
+                    barber_id = None
+                generation = response_cache.generation(tuple(kinds), barber_id)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                etag = response_cache.put(
+                    key, response.get_data(), response.mimetype, tuple(kinds), barber_id, generation
+                )
+
+            response.set_etag(etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            if not max_age:
+                response.cache_control.must_revalidate = True
+            return response.make_conditional(request)
+
+        return wrapper
+    return decorator
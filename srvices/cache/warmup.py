@@ -0,0 +1,154 @@
+from datetime import date, timedelta
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from database.database_conn import initialize_connection_pool, unit_of_work
+from database.get_available_free_slots.get_available_free_slots import get_available_free_slots
+from database.get_barber_data.fetch_barber_data_from_db import fetch_barber_dates
+from srvices.bookings.availability import get_barber_calendar_slots
+from srvices.cache.catalog import get_catalog
+from srvices.cache.invalidation import wait_for_invalidation_listener
+from srvices.observability.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Days of booking widget availability computed before taking traffic, 2 is today and tomorrow
+WARMUP_DAYS = int(os.getenv("WARMUP_DAYS", "2"))
+
+# Longest wait between two warm-up attempts when the database can't be reached
+WARMUP_MAX_RETRY_SECONDS = 30
+
+# How long the warm-up waits for the invalidation listener, which empties the caches when it connects
+LISTENER_WAIT_SECONDS = 10
+
+_ready = threading.Event()
+_state = {"status": "starting", "attempts": 0, "error": None, "steps": {}}
+_state_lock = threading.Lock()
+_warmup_pid = None
+
+
+def _step(steps, name, started):
+    steps[name] = round((time.perf_counter() - started) * 1000, 1)
+    return time.perf_counter()
+
+
+def warm_up(days=WARMUP_DAYS):
+    """
+    Open the pool's connections, load the catalog and compute the first days of availability.
+
+    Every barber's free slots are computed for the booking widget over the first `days` days,
+    and for the calendar of every service over the barber's horizon, so the first customers
+    after a deploy are served from the caches.
+
+    Parameters:
+    - days (int): Days of booking widget availability to compute, starting today.
+
+    Returns:
+    - dict: Milliseconds spent in every step and the number of barber-days computed.
+
+    Raises:
+    - RuntimeError: If the database can't be read.
+    """
+    steps = {}
+    started = time.perf_counter()
+
+    initialize_connection_pool()
+    started = _step(steps, "connections", started)
+
+    catalog = get_catalog()
+    if catalog is None:
+        raise RuntimeError("the service catalog could not be loaded")
+    started = _step(steps, "catalog", started)
+
+    if not wait_for_invalidation_listener(LISTENER_WAIT_SECONDS):
+        logger.warning("Warming up before the cache invalidation listener connected")
+    started = _step(steps, "listener", started)
+
+    today = date.today()
+    barber_ids = sorted(catalog.barbers_by_id)
+
+    # Read everything on one connection
+    with unit_of_work():
+        for barber_id in barber_ids:
+            for offset in range(days):
+                get_available_free_slots(barber_id, today + timedelta(days=offset))
+        started = _step(steps, "available_slots", started)
+
+        # The calendar shows each barber's whole horizon and caches it per service duration, warm
+        # it for every single service the way /get_barbers_and_slots asks for it
+        barber_dates = fetch_barber_dates(barber_ids)
+        if barber_dates is None:
+            raise RuntimeError("barber dates could not be loaded")
+        for service_name in catalog.service_ids_by_name:
+            barbers = catalog.barbers_for_services([service_name])
+            if barbers is None:
+                continue
+            service_barber_ids = [barber['barber_id'] for barber in barbers['barbers']]
+            if get_barber_calendar_slots(service_barber_ids, barber_dates, barbers['estimated_time']) is None:
+                raise RuntimeError("barber data could not be loaded")
+        _step(steps, "calendar_slots", started)
+
+    steps["barber_days"] = len(barber_ids) * days
+    return steps
+
+
+def _warm_up_until_ready(days):
+    retry_seconds = 1
+    while True:
+        with _state_lock:
+            _state["attempts"] += 1
+        try:
+            steps = warm_up(days)
+        except Exception as e:
+            logger.error("Error occurred while warming up: %s", e)
+            with _state_lock:
+                _state["status"] = "retrying"
+                _state["error"] = str(e)
+            time.sleep(retry_seconds)
+            retry_seconds = min(retry_seconds * 2, WARMUP_MAX_RETRY_SECONDS)
+            continue
+
+        with _state_lock:
+            _state.update(status="ready", error=None, steps=steps)
+        _ready.set()
+        logger.info("Warm-up done: %s", steps)
+        return
+
+
+def start_warm_up(days=WARMUP_DAYS):
+    """
+    Warm up in a background thread, retrying until the database can be read.
+
+    The app takes requests meanwhile, readiness() tells the load balancer when to send traffic.
+    Safe to call more than once, and again in a forked worker: a process warms up once.
+    """
+    global _warmup_pid
+    with _state_lock:
+        if _warmup_pid == os.getpid():
+            return
+        _warmup_pid = os.getpid()
+        _ready.clear()
+        _state.update(status="starting", attempts=0, error=None, steps={})
+
+    threading.Thread(target=_warm_up_until_ready, args=(days,), name="warm-up", daemon=True).start()
+
+
+def is_ready():
+    """Return True once the warm-up of this process is done."""
+    return _ready.is_set()
+
+
+def readiness():
+    """
+    Return the warm-up state of this process.
+
+    Returns:
+    - dict: status ("starting", "retrying" or "ready"), attempts, the last error and the step timings.
+    """
+    with _state_lock:
+        return {**_state, "steps": dict(_state["steps"])}
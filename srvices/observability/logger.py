@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Default level of every project logger, OFF disables logging entirely
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Per-module overrides, e.g. "database=WARNING,srvices.cache=DEBUG"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# "json" for one JSON object per line, "text" for human readable lines
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+# Top-level packages whose loggers get the project handler
+PROJECT_LOGGERS = ("database", "routes", "srvices", "main")
+
+# Attributes every LogRecord has, anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as a single JSON line, including any fields passed with `extra=`."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _parse_level(name):
+    name = str(name).strip().upper()
+    if name == "OFF":
+        return logging.CRITICAL + 1
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else logging.INFO
+
+
+def configure_logging(level=None, levels=None, log_format=None, stream=None):
+    """
+    Set up the project loggers: one handler, a default level and per-module overrides.
+
+    Called once by get_logger(), call it directly to reconfigure (e.g. from a gunicorn hook).
+
+    Parameters:
+    - level (str, optional): Default level, defaults to LOG_LEVEL.
+    - levels (str, optional): "module=LEVEL,..." overrides, defaults to LOG_LEVELS.
+    - log_format (str, optional): "json" or "text", defaults to LOG_FORMAT.
+    - stream (file, optional): Where to write, defaults to stderr.
+    """
+    global _configured
+    with _configure_lock:
+        handler = logging.StreamHandler(stream or sys.stderr)
+        if (log_format or LOG_FORMAT) == "text":
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        else:
+            handler.setFormatter(JsonFormatter())
+
+        default_level = _parse_level(level or LOG_LEVEL)
+        for name in PROJECT_LOGGERS:
+            logger = logging.getLogger(name)
+            for old_handler in list(logger.handlers):
+                logger.removeHandler(old_handler)
+            logger.addHandler(handler)
+            logger.setLevel(default_level)
+            logger.propagate = False
+
+        for override in (levels if levels is not None else LOG_LEVELS).split(","):
+            if "=" in override:
+                name, override_level = override.split("=", 1)
+                logging.getLogger(name.strip()).setLevel(_parse_level(override_level))
+
+        _configured = True
+
+
+def get_logger(name):
+    """
+    Return the logger of a module, configuring the project loggers on first use.
+
+    Log with %-style arguments (logger.debug("rows: %s", rows)) so nothing is formatted
+    unless the level is enabled.
+
+    Parameters:
+    - name (str): The module name, usually __name__.
+
+    Returns:
+    - logging.Logger: The module logger.
+    """
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(name)
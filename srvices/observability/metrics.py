@@ -0,0 +1,310 @@
+from contextvars import ContextVar
+from functools import wraps
+import os
+import threading
+import time
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics,
+    generate_latest, multiprocess
+)
+
+from srvices.observability.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bounds, in seconds, of the buckets of the request latency histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of requests that matched no route, so unknown paths don't add series
+UNMATCHED_ROUTE = "unmatched"
+
+# Set in gunicorn.conf.py: every worker keeps its metrics in files there, and /metrics adds up
+# the files of all workers, whichever one answers the scrape. Unset, as with the development
+# server, the metrics of the only process are served
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+# Only counter totals are exported, the *_created series aren't kept in multiprocess mode anyway
+disable_created_metrics()
+
+ROUTE_LABELS = ("method", "route")
+
+requests_total = Counter("http_requests_total", "Requests served.", ("method", "route", "status"))
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Time to serve a request.", ROUTE_LABELS, buckets=LATENCY_BUCKETS
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time a request spent in SQL statements.", ROUTE_LABELS, buckets=LATENCY_BUCKETS
+)
+request_queries = Counter("http_request_db_queries_total", "SQL statements executed by requests.", ROUTE_LABELS)
+request_pool_wait = Counter(
+    "http_request_pool_wait_seconds_total", "Time requests waited for a pooled database connection.", ROUTE_LABELS
+)
+request_serialization = Counter(
+    "http_request_serialization_seconds_total", "Time requests spent encoding JSON responses.", ROUTE_LABELS
+)
+db_queries = Counter("db_queries_total", "SQL statements executed, in requests or not.")
+db_query_seconds = Counter("db_query_seconds_total", "Time spent in SQL statements, in requests or not.")
+slot_engine_runs = Counter("slot_engine_runs_total", "Slot engine calls.", ("engine",))
+slot_engine_barber_days = Counter("slot_engine_barber_days_total", "Barber-days computed by the slot engines.", ("engine",))
+slot_engine_slots = Counter("slot_engine_slots_total", "Slots generated by the slot engines.", ("engine",))
+slot_engine_seconds = Counter("slot_engine_seconds_total", "Time spent in the slot engines.", ("engine",))
+
+# Copied from the pool's and the availability cache's own counters, see StatsMirror. Gauges add up
+# the workers that are alive
+db_pool_in_use = Gauge("db_pool_connections_in_use", "Pooled connections checked out.", multiprocess_mode="livesum")
+db_pool_idle = Gauge("db_pool_connections_idle", "Pooled connections waiting to be used.", multiprocess_mode="livesum")
+db_pool_waits = Counter("db_pool_waits_total", "Checkouts that had to wait for a free connection.")
+db_pool_wait_seconds = Counter("db_pool_wait_seconds_total", "Time spent waiting for a free connection.")
+db_pool_timeouts = Counter("db_pool_timeouts_total", "Checkouts that gave up waiting, answered with a 503.")
+availability_cache_hits = Counter("availability_cache_hits_total", "Availability served from the cache.")
+availability_cache_misses = Counter("availability_cache_misses_total", "Availability computed on a cache miss.")
+availability_cache_entries = Gauge(
+    "availability_cache_entries", "Barber-days held in the availability cache.", multiprocess_mode="livesum"
+)
+
+
+class StatsMirror:
+    """
+    Copies the counters a component keeps for itself (e.g. the pool's stats()) into the
+    Prometheus metrics: counters grow by the increase since the last copy, gauges take the
+    current value.
+
+    The component's hot paths stay as cheap as they were, the copy is made once per request
+    and on every scrape.
+    """
+
+    def __init__(self, read_stats, counters=None, gauges=None):
+        """
+        Parameters:
+        - read_stats (function): Returns the component's stats dict, or None if it isn't running.
+        - counters (dict): Stats keys mapped to the Counters they feed.
+        - gauges (dict): Stats keys mapped to the Gauges they set.
+        """
+        self.read_stats = read_stats
+        self.counters = counters or {}
+        self.gauges = gauges or {}
+        self._copied = {}
+        self._lock = threading.Lock()
+
+    def sync(self):
+        stats = self.read_stats()
+        if stats is None:
+            return
+        with self._lock:
+            for key, counter in self.counters.items():
+                value = stats[key]
+                # Lower than last time: the component was recreated (e.g. the pool after a fork)
+                increase = value - self._copied.get(key, 0) if value >= self._copied.get(key, 0) else value
+                if increase:
+                    counter.inc(increase)
+                self._copied[key] = value
+            for key, gauge in self.gauges.items():
+                gauge.set(stats[key])
+
+
+_stats_mirrors = []
+
+
+def register_stats_mirror(read_stats, counters=None, gauges=None):
+    """Copy a component's own counters into the metrics after every request, see StatsMirror."""
+    _stats_mirrors.append(StatsMirror(read_stats, counters, gauges))
+
+
+def sync_stats_mirrors():
+    for mirror in _stats_mirrors:
+        try:
+            mirror.sync()
+        except Exception as e:
+            logger.error("Error occurred while copying stats into the metrics: %s", e)
+
+
+class RequestMetrics:
+    """What one request spent its time on, filled in while it runs."""
+
+    __slots__ = (
+        "started", "queries", "db_seconds", "pool_wait_seconds", "serialization_seconds",
+        "slot_seconds", "barber_days", "slots",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.slot_seconds = 0.0
+        self.barber_days = 0
+        self.slots = 0
+
+    def server_timing(self, total_seconds):
+        """
+        Format the request's breakdown as a Server-Timing header value, in milliseconds.
+
+        compute is everything that isn't SQL, waiting for a connection or encoding JSON,
+        slots is the part of compute spent in the slot engines.
+        """
+        compute = max(total_seconds - self.db_seconds - self.pool_wait_seconds - self.serialization_seconds, 0.0)
+        return ", ".join((
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f"pool;dur={self.pool_wait_seconds * 1000:.1f}",
+            f'slots;dur={self.slot_seconds * 1000:.1f};desc="{self.barber_days} barber-days, {self.slots} slots"',
+            f"compute;dur={compute * 1000:.1f}",
+            f"serialize;dur={self.serialization_seconds * 1000:.1f}",
+            f"total;dur={total_seconds * 1000:.1f}",
+        ))
+
+
+_current_request = ContextVar("request_metrics", default=None)
+
+# Seconds spent in SQL and the pool during the slot engine call in progress, left out of its time
+_engine_database_seconds = ContextVar("engine_database_seconds", default=None)
+
+
+def _add_engine_database_seconds(seconds):
+    spent = _engine_database_seconds.get()
+    if spent is not None:
+        spent[0] += seconds
+
+
+def record_query(seconds):
+    """Count one SQL statement that took `seconds`."""
+    db_queries.inc()
+    db_query_seconds.inc(seconds)
+    _add_engine_database_seconds(seconds)
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_seconds += seconds
+
+
+def record_pool_wait(seconds):
+    """Count time spent getting a connection from the pool."""
+    _add_engine_database_seconds(seconds)
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.pool_wait_seconds += seconds
+
+
+def record_slot_engine(engine, barber_days, slots, seconds):
+    """Count one slot engine call and what it produced."""
+    slot_engine_runs.labels(engine).inc()
+    slot_engine_barber_days.labels(engine).inc(barber_days)
+    slot_engine_slots.labels(engine).inc(slots)
+    slot_engine_seconds.labels(engine).inc(seconds)
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.slot_seconds += seconds
+        metrics.barber_days += barber_days
+        metrics.slots += slots
+
+
+def count_calendar(slots_by_barber):
+    """Count the barber-days and slots of a {barber_id: {date: [slots]}} engine result."""
+    if not slots_by_barber:
+        return 0, 0
+    days = [slots for barber_days in slots_by_barber.values() for slots in barber_days.values()]
+    return len(days), sum(len(slots) for slots in days)
+
+
+def count_day(starts):
+    """Count the barber-day and slots of a single day engine result, None when it failed."""
+    return (0, 0) if starts is None else (1, len(starts))
+
+
+def instrument_slot_engine(engine, count=count_calendar):
+    """
+    Decorate a slot engine so every call is timed and its output counted. Time spent in SQL
+    statements and waiting for a connection during the call is not counted as engine time.
+
+    Parameters:
+    - engine (str): The engine label, e.g. "batch".
+    - count (function): Turns the engine's result into (barber_days, slots).
+    """
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            spent = [0.0]
+            token = _engine_database_seconds.set(spent)
+            started = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                _engine_database_seconds.reset(token)
+            barber_days, slots = count(result)
+            record_slot_engine(engine, barber_days, slots, max(time.perf_counter() - started - spent[0], 0.0))
+            return result
+        return wrapper
+    return decorate
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, counting the time spent encoding responses in the request metrics."""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            metrics = _current_request.get()
+            if metrics is not None:
+                metrics.serialization_seconds += time.perf_counter() - started
+
+
+def init_request_metrics(app):
+    """
+    Measure every request of `app`: latency per route, SQL statements and their time, pool
+    wait and JSON encoding. The breakdown is sent back in a Server-Timing header.
+
+    Register it before the other after_request handlers, so it runs last and sees the commit
+    of the unit of work and the final status.
+    """
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_metrics():
+        _current_request.set(RequestMetrics())
+
+    @app.after_request
+    def finish_request_metrics(response):
+        metrics = _current_request.get()
+        if metrics is None:
+            return response
+        total = time.perf_counter() - metrics.started
+        labels = (request.method, request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE)
+
+        requests_total.labels(*labels, str(response.status_code)).inc()
+        request_seconds.labels(*labels).observe(total)
+        request_db_seconds.labels(*labels).observe(metrics.db_seconds)
+        request_queries.labels(*labels).inc(metrics.queries)
+        request_pool_wait.labels(*labels).inc(metrics.pool_wait_seconds)
+        request_serialization.labels(*labels).inc(metrics.serialization_seconds)
+        sync_stats_mirrors()
+
+        response.headers["Server-Timing"] = metrics.server_timing(total)
+        return response
+
+    @app.teardown_request
+    def clear_request_metrics(exc):
+        _current_request.set(None)
+
+
+def render_metrics():
+    """
+    Render every metric in the Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set (gunicorn), the numbers are the sum of every worker, so
+    it doesn't matter which worker answers the scrape.
+
+    Returns:
+    - tuple: (bytes, content type) of the exposition.
+    """
+    sync_stats_mirrors()
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, PROMETHEUS_MULTIPROC_DIR)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from flask import g, request
+
+from srvices.observability.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# File every request is appended to as one JSON line, for benchmarks.load_harness to replay.
+# Empty to record nothing. "{pid}" is replaced by the process ID, one file per gunicorn worker
+REQUEST_LOG_PATH = os.getenv("REQUEST_LOG_PATH", "")
+
+# Requests that are never recorded: credentials, and the load balancer's probes
+UNRECORDED_PATHS = frozenset({"/login", "/signup", "/ready"})
+
+# Body fields holding customer data, recorded as REDACTED so the log can leave the server
+REDACTED_FIELDS = frozenset({"customer_name", "email", "phone", "password"})
+REDACTED = "redacted"
+
+
+def _redact(body):
+    if isinstance(body, dict):
+        return {key: REDACTED if key in REDACTED_FIELDS else _redact(value) for key, value in body.items()}
+    if isinstance(body, list):
+        return [_redact(value) for value in body]
+    return body
+
+
+class RequestLog:
+    """
+    Append-only log of the requests an app served, one JSON object per line:
+    {"ts", "method", "path", "query", "body", "auth", "status", "ms"}.
+
+    Bodies are kept only when they are JSON, with customer data redacted. Tokens are never
+    written, "auth" tells whether the request carried one.
+    """
+
+    def __init__(self, path):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def write(self, entry):
+        line = (json.dumps(entry, default=str) + "\n").encode()
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            # One write per line, so appends of several processes don't interleave
+            os.write(self._fd, line)
+
+
+def init_request_log(app, path=REQUEST_LOG_PATH):
+    """
+    Record every request the app serves, if `path` is set.
+
+    Parameters:
+    - app (Flask): The application.
+    - path (str): The log file, "{pid}" is replaced by the process ID when it is first written.
+    """
+    if not path:
+        return
+
+    log = None
+
+    @app.before_request
+    def start_request_log():
+        g.request_log_started = time.perf_counter()
+
+    @app.after_request
+    def write_request_log(response):
+        nonlocal log
+        if request.path in UNRECORDED_PATHS or "request_log_started" not in g:
+            return response
+        try:
+            # Opened in the process serving the request, after a gunicorn fork
+            if log is None:
+                log = RequestLog(path)
+            body = request.get_json(silent=True) if request.is_json else None
+            log.write({
+                "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "method": request.method,
+                "path": request.path,
+                "query": request.query_string.decode(),
+                "body": _redact(body),
+                "auth": "Authorization" in request.headers,
+                "status": response.status_code,
+                "ms": round((time.perf_counter() - g.request_log_started) * 1000, 2),
+            })
+        except Exception as e:
+            logger.error("Error occurred while recording a request: %s", e)
+        return response
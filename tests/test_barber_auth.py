@@ -0,0 +1,39 @@
+"""
+A barber token only lets its barber write their own data.
+"""
+from flask import Flask, g
+import pytest
+
+from srvices.auth.barber_auth import authorize_barber
+from srvices.cache.catalog import Barber
+
+
+@pytest.fixture
+def barber():
+    app = Flask(__name__)
+    with app.test_request_context():
+        g.barber = Barber(7, "Sam")
+        yield g.barber
+
+
+def test_missing_barber_id_is_the_token_barber(barber):
+    assert authorize_barber(None) == (7, None)
+
+
+@pytest.mark.parametrize("barber_id", [7, "7"])
+def test_own_barber_id_is_allowed(barber, barber_id):
+    assert authorize_barber(barber_id) == (7, None)
+
+
+def test_other_barber_is_forbidden(barber):
+    barber_id, (_, status_code) = authorize_barber(8)
+
+    assert barber_id is None
+    assert status_code == 403
+
+
+def test_invalid_barber_id_is_rejected(barber):
+    barber_id, (_, status_code) = authorize_barber("seven")
+
+    assert barber_id is None
+    assert status_code == 400
@@ -0,0 +1,59 @@
+"""
+fetch_barber_data_from_db() must build the same weekly templates as load_weekly_template().
+"""
+import pytest
+
+from database.get_barber_data import fetch_barber_data_from_db as barber_data_module
+from srvices.bookings.weekly_template import compile_weekly_template
+
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, row):
+        self.row = row
+
+    def cursor(self):
+        return FakeCursor(self.row)
+
+
+@pytest.fixture
+def barber_data(monkeypatch):
+    """Return a function running fetch_barber_data_from_db() on the given blocks of BARBER_DATA_QUERY."""
+    def fetch(schedules=None, weekly_schedules=None, recurring_breaks=None, barber_ids=None):
+        row = (schedules, None, None, None, None, weekly_schedules, recurring_breaks)
+        monkeypatch.setattr(barber_data_module, "get_connection", lambda: FakeConnection(row))
+        monkeypatch.setattr(barber_data_module, "release_connection", lambda conn: None)
+        return barber_data_module.fetch_barber_data_from_db(barber_ids=barber_ids)[0]
+    return fetch
+
+
+@pytest.mark.parametrize("barber_ids", [None, [1, 2]])
+def test_barber_with_only_weekly_hours_gets_a_template(barber_data, barber_ids):
+    schedules = barber_data(
+        schedules=[[1, '09:00', '17:00']],
+        weekly_schedules=[[2, 0, 10 * 60, 14 * 60, False]],
+        barber_ids=barber_ids,
+    )
+
+    assert schedules[1].hours == compile_weekly_template(('09:00', '17:00')).hours
+    assert schedules[2].hours == compile_weekly_template(None, {0: (10 * 60, 14 * 60)}).hours
+    assert schedules[2].hours[0] == (10 * 60, 14 * 60)
+
+
+def test_barber_without_any_schedule_has_no_template(barber_data):
+    schedules = barber_data(schedules=[[1, '09:00', '17:00']], barber_ids=[1, 3])
+
+    assert sorted(schedules) == [1]
@@ -0,0 +1,109 @@
+"""
+The batch slot engine must return exactly what the sequential one returns, for any shop.
+"""
+from datetime import date, datetime, timedelta
+import random
+
+import pytest
+
+from srvices.bookings.barbers_slots_main import generate_barber_specific_slots_with_bookings
+from srvices.bookings.batch_slots import generate_barber_slots_batch
+from srvices.bookings.day_occupancy import minute_label
+from srvices.bookings.weekly_template import DAYS_PER_WEEK, compile_weekly_template
+
+# A Monday far enough ahead that no slot is ever in the past
+START_DATE = date(2031, 1, 6)
+
+# Fractional and timedelta durations, rounded up to whole minutes by both engines
+DURATIONS = (15, 20, 22.5, 30, 37.5, 45, 59.9, timedelta(minutes=52, seconds=30), timedelta(hours=1))
+GAPS = (5, 10, 15, 20, 30)
+
+
+def _hours(rng):
+    start = rng.randrange(6 * 60, 12 * 60)
+    return start, min(start + rng.randrange(3 * 60, 11 * 60), 24 * 60 - 1)
+
+
+def _interval(rng, hours):
+    start = rng.randrange(hours[0], hours[1])
+    return start, min(start + rng.randrange(5, 90), 24 * 60)
+
+
+def random_shop(rng):
+    """Return the keyword arguments of both engines for a random shop."""
+    barber_ids = list(range(1, rng.randint(1, 6) + 1))
+    days = [START_DATE + timedelta(days=offset) for offset in range(rng.randint(1, 21))]
+
+    barber_schedules, existing_bookings, breaks, exceptions = {}, {}, {}, {}
+    for barber_id in barber_ids:
+        default_hours = None if rng.random() < 0.2 else tuple(minute_label(minute) for minute in _hours(rng))
+        weekly_hours = {
+            weekday: None if rng.random() < 0.2 else _hours(rng)
+            for weekday in range(DAYS_PER_WEEK) if rng.random() < 0.5
+        }
+        recurring_breaks = {
+            weekday: [_interval(rng, (8 * 60, 18 * 60)) for _ in range(rng.randint(1, 2))]
+            for weekday in range(DAYS_PER_WEEK) if rng.random() < 0.3
+        }
+        barber_schedules[barber_id] = compile_weekly_template(default_hours, weekly_hours, recurring_breaks)
+
+        existing_bookings[barber_id] = [
+            (
+                datetime.combine(rng.choice(days), datetime.min.time())
+                .replace(hour=rng.randrange(7, 20), minute=rng.randrange(60)).strftime('%Y-%m-%d %H:%M:%S'),
+                rng.choice(DURATIONS),
+            )
+            for _ in range(rng.randint(0, 12 * len(days)))
+        ]
+
+        breaks[barber_id] = {}
+        for day in days:
+            if rng.random() < 0.3:
+                breaks[barber_id][day.strftime('%Y-%m-%d')] = [
+                    _interval(rng, (7 * 60, 20 * 60)) for _ in range(rng.randint(1, 3))
+                ]
+            if rng.random() < 0.1:
+                exceptions.setdefault(day.strftime('%Y-%m-%d'), {})[barber_id] = (
+                    None if rng.random() < 0.5 else tuple(minute_label(minute) for minute in _hours(rng))
+                )
+
+    return {
+        "barber_schedules": barber_schedules,
+        "barber_dates": {barber_id: (days[0], days[-1]) for barber_id in barber_ids},
+        "existing_bookings": existing_bookings,
+        "barber_ids": barber_ids,
+        "gap_minutes": rng.choice(GAPS),
+        "exceptions": exceptions,
+        "service_duration_minutes": rng.choice(DURATIONS),
+        "breaks": breaks,
+    }
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_batch_engine_matches_sequential_engine(seed):
+    arguments = random_shop(random.Random(seed))
+
+    expected = generate_barber_specific_slots_with_bookings(**arguments)
+    actual = generate_barber_slots_batch(**arguments)
+
+    # The sequential engine leaves days off out, the batch one may list them empty
+    assert {barber_id: {day: slots for day, slots in days.items() if slots} for barber_id, days in actual.items()} == \
+        {barber_id: {day: slots for day, slots in days.items() if slots} for barber_id, days in expected.items()}
+
+
+@pytest.mark.parametrize("duration", [22.5, timedelta(minutes=22, seconds=30)])
+def test_fractional_duration_is_rounded_up(duration):
+    arguments = {
+        "barber_schedules": {1: compile_weekly_template(('09:00', '10:00'))},
+        "barber_dates": {1: (START_DATE, START_DATE)},
+        "existing_bookings": {1: []},
+        "gap_minutes": 30,
+        "service_duration_minutes": duration,
+    }
+    expected = [
+        (datetime(2031, 1, 6, 9, 0), datetime(2031, 1, 6, 9, 23)),
+        (datetime(2031, 1, 6, 9, 30), datetime(2031, 1, 6, 9, 53)),
+    ]
+
+    assert generate_barber_specific_slots_with_bookings(**arguments)[1]['2031-01-06'] == expected
+    assert generate_barber_slots_batch(**arguments)[1]['2031-01-06'] == expected
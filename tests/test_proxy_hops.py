@@ -0,0 +1,31 @@
+"""
+Behind PROXY_HOPS trusted proxies the app sees the client's address, which the login throttle
+counts attempts by, and not the proxy's.
+"""
+from flask import request
+
+from main import create_app
+
+OFFLINE = {"WARM_CATALOG": False, "START_INVALIDATION_LISTENER": False, "WARM_START": False, "REQUEST_LOG": ""}
+
+
+def _remote_addr(proxy_hops, forwarded_for):
+    app = create_app({**OFFLINE, "PROXY_HOPS": proxy_hops})
+    app.add_url_rule("/remote_addr", "remote_addr", lambda: request.remote_addr)
+    response = app.test_client().get(
+        "/remote_addr", headers={"X-Forwarded-For": forwarded_for}, environ_base={"REMOTE_ADDR": "10.0.0.1"}
+    )
+    return response.get_data(as_text=True)
+
+
+def test_client_address_comes_from_the_trusted_proxy():
+    assert _remote_addr(1, "198.51.100.7") == "198.51.100.7"
+
+
+def test_only_the_trusted_hops_are_believed():
+    # A client can prepend anything, only the entry the load balancer added counts
+    assert _remote_addr(1, "203.0.113.9, 198.51.100.7") == "198.51.100.7"
+
+
+def test_forwarded_for_is_ignored_without_proxies():
+    assert _remote_addr(0, "198.51.100.7") == "10.0.0.1"
@@ -0,0 +1,126 @@
+"""
+The per-day database functions must run a fixed number of statements, however many bookings,
+extra services and breaks the day holds, and end bookings where the slot engines do.
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from database.barber_schedule.weekly_schedule import WEEKLY_TEMPLATE
+from database.get_appointments_and_breaks import get_appointments_and_breaks as appointments_module
+from database.get_available_free_slots import get_available_free_slots as free_slots_module
+from database.get_available_free_slots.get_available_free_slots import BOOKINGS_WITH_DURATIONS_ON_DATE
+from database.get_existing_breaks_for_barber.get_existing_breaks_for_barber import BREAKS_ON_DATE
+
+DAY = date(2031, 1, 6)  # A Monday
+
+BOOKING_COUNTS = (0, 1, 5, 40)
+
+
+class CountingCursor:
+    """A cursor counting every statement it runs, answered with the rows of `respond(query)`."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        self.connection.queries.append(query)
+        # execute_prepared() sends a PREPARE once per connection, it returns no rows
+        self._rows = [] if query.startswith("PREPARE") else self.connection.respond(query)
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+
+class CountingConnection:
+    def __init__(self, respond):
+        self.respond = respond
+        self.queries = []
+
+    def cursor(self):
+        return CountingCursor(self)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Return a function stubbing out the database of a module with a CountingConnection."""
+    def stub(module, respond):
+        connection = CountingConnection(respond)
+        monkeypatch.setattr(module, "get_connection", lambda: connection)
+        monkeypatch.setattr(module, "release_connection", lambda conn: None)
+        return connection
+    return stub
+
+
+def _appointment(index):
+    # Bookings every 15 minutes from 08:00, each with extra services
+    return datetime.combine(DAY, time(8)) + timedelta(minutes=15 * index)
+
+
+def _free_slots_rows(booking_count):
+    def respond(query):
+        if query.startswith(f"EXECUTE {WEEKLY_TEMPLATE.name}"):
+            return [('default', None, 8 * 60, 20 * 60, False), ('break', 0, 12 * 60, 12 * 60 + 30, False)]
+        if query.startswith(f"EXECUTE {BREAKS_ON_DATE.name}"):
+            return [(15 * 60, 15 * 60 + 30)]
+        if query.startswith(f"EXECUTE {BOOKINGS_WITH_DURATIONS_ON_DATE.name}"):
+            return [
+                (_appointment(index), timedelta(minutes=10), timedelta(minutes=5))
+                for index in range(booking_count)
+            ]
+        raise AssertionError(f"unexpected query: {query}")
+    return respond
+
+
+def _appointments_rows(booking_count):
+    def respond(query):
+        return [
+            (
+                _appointment(index), 1, [3, 6], DAY, time(15), '15:30:00', 'Break', time(8), time(20),
+                None, None, None, None, timedelta(minutes=10), timedelta(minutes=5),
+            )
+            for index in range(booking_count)
+        ]
+    return respond
+
+
+@pytest.mark.parametrize("booking_count", BOOKING_COUNTS)
+def test_free_slots_query_count_is_constant(database, booking_count):
+    connection = database(free_slots_module, _free_slots_rows(booking_count))
+
+    starts = free_slots_module._compute_free_slot_starts(1, DAY)
+
+    assert starts is not None
+    # Weekly template, breaks and bookings, each prepared once on the new connection and executed
+    assert len(connection.queries) == 6
+    assert sum(query.startswith("EXECUTE") for query in connection.queries) == 3
+
+
+@pytest.mark.parametrize("booking_count", BOOKING_COUNTS)
+def test_appointments_and_breaks_query_count_is_constant(database, booking_count):
+    connection = database(appointments_module, _appointments_rows(booking_count))
+
+    days = appointments_module.get_appointments_and_breaks(1, DAY)
+
+    assert len(connection.queries) == 1
+    assert sum(len(day["appointments"]) for day in days) == booking_count
+
+
+def test_appointment_end_is_rounded_up_like_the_engines(database):
+    def respond(query):
+        return [(
+            datetime.combine(DAY, time(9)), 1, [3], DAY, None, None, None, time(8), time(20),
+            None, None, None, None, timedelta(minutes=10, seconds=30), timedelta(minutes=4, seconds=15),
+        )]
+    database(appointments_module, respond)
+
+    days = appointments_module.get_appointments_and_breaks(1, DAY)
+
+    # 11 + 5 minutes, the way the slot engines and the free slots engine count the booking
+    assert days[0]["appointments"][0]["appointment_end_time"] == "09:16:00"
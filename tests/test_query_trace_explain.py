@@ -0,0 +1,59 @@
+"""
+Slow statements are explained only while EXPLAIN is on, and at most so many times a minute.
+"""
+import pytest
+
+from database import query_trace as query_trace_module
+from database.query_trace import QueryTrace
+
+
+class FakeCursor:
+    rowcount = 1
+
+
+@pytest.fixture
+def explained(monkeypatch):
+    """Return the statements explain() was asked for, without a database."""
+    calls = []
+
+    def explain(cursor, query, vars):
+        calls.append(query)
+        return "Seq Scan on bookings"
+
+    monkeypatch.setattr(query_trace_module, "explain", explain)
+    return calls
+
+
+def _record_slow(trace, count):
+    for _ in range(count):
+        trace.record(FakeCursor(), "SELECT * FROM bookings WHERE id = %s", (1,), 1, 1.0, True)
+
+
+def test_nothing_is_explained_while_off(explained):
+    trace = QueryTrace(slow_query_ms=100, explain=False)
+
+    _record_slow(trace, 3)
+
+    assert explained == []
+    assert [entry["plan"] for entry in trace.slow_queries()] == [None, None, None]
+
+
+def test_explains_are_capped_per_minute(explained):
+    trace = QueryTrace(slow_query_ms=100, explain=True, explains_per_minute=2)
+
+    _record_slow(trace, 5)
+
+    assert len(explained) == 2
+    assert trace.stats()["explains_skipped"] == 3
+    assert [entry["plan"] is not None for entry in trace.slow_queries()] == [False, False, False, True, True]
+
+
+def test_explain_can_be_switched_on_at_runtime(explained):
+    trace = QueryTrace(slow_query_ms=100, explain=False, explains_per_minute=2)
+
+    trace.set_explain(True)
+    _record_slow(trace, 1)
+    trace.set_explain(False)
+    _record_slow(trace, 1)
+
+    assert len(explained) == 1
@@ -0,0 +1,38 @@
+"""
+A response read while the data changed is never cached, and unrelated changes don't keep one out.
+"""
+from srvices.cache.invalidation import BOOKINGS, CATALOG, EXCEPTIONS, SCHEDULES
+from srvices.cache.response_cache import ResponseCache
+
+KEY = ("endpoint", ("1",), None, None)
+
+
+def _read_during(cache, kinds, barber_id, *events):
+    """Take a generation, apply `events` as if they came in while reading, then put the body."""
+    generation = cache.generation(kinds, barber_id)
+    for kind, event_barber_id in events:
+        cache.invalidate(kind, event_barber_id)
+    cache.put(KEY, b"{}", "application/json", kinds, barber_id, generation)
+    return cache.get(KEY) is not None
+
+
+def test_unrelated_events_do_not_discard_a_put():
+    cache = ResponseCache()
+
+    assert _read_during(cache, (SCHEDULES,), 1, (BOOKINGS, 1), (SCHEDULES, 2), (CATALOG, None))
+
+
+def test_event_of_the_same_kind_and_barber_discards_a_put():
+    assert not _read_during(ResponseCache(), (SCHEDULES,), 1, (SCHEDULES, 1))
+
+
+def test_event_for_every_barber_discards_a_put():
+    assert not _read_during(ResponseCache(), (EXCEPTIONS,), 1, (EXCEPTIONS, None))
+
+
+def test_any_barber_event_discards_a_put_covering_every_barber():
+    assert not _read_during(ResponseCache(), (SCHEDULES,), None, (SCHEDULES, 2))
+
+
+def test_full_clear_discards_a_put():
+    assert not _read_during(ResponseCache(), (SCHEDULES,), 1, (None, None))
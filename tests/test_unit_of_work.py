@@ -0,0 +1,91 @@
+"""
+A request's unit of work commits once at the end, and never reports success for writes a failed
+statement rolled back.
+"""
+from flask import Flask, jsonify
+from psycopg2 import extensions
+import pytest
+
+from database import database_conn
+from database.database_conn import get_connection, init_unit_of_work, release_connection
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    """A pooled connection remembering whether it was committed or rolled back."""
+
+    closed = False
+    info = FakeInfo()
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(database_conn, "_checkout", lambda: connection)
+    monkeypatch.setattr(database_conn, "connection_pool", None)
+
+    app = Flask(__name__)
+    init_unit_of_work(app)
+
+    @app.route("/write")
+    def write():
+        get_connection().commit()
+        return jsonify({"status": "success"}), 201
+
+    @app.route("/write_then_failed_read")
+    def write_then_failed_read():
+        get_connection().commit()
+        # A later helper catches its own error and rolls back, like every database function does
+        conn = get_connection()
+        conn.rollback()
+        release_connection(conn)
+        return jsonify({"status": "success"}), 201
+
+    @app.route("/conflict")
+    def conflict():
+        get_connection().rollback()
+        return jsonify({"error": "conflict"}), 409
+
+    return app.test_client(), connection
+
+
+def test_successful_request_commits_once(client):
+    client, connection = client
+
+    response = client.get("/write")
+
+    assert response.status_code == 201
+    assert connection.commits == 1
+
+
+def test_rolled_back_unit_is_not_reported_as_success(client):
+    client, connection = client
+
+    response = client.get("/write_then_failed_read")
+
+    assert response.status_code == 500
+    assert connection.commits == 0
+    assert connection.rollbacks >= 1
+
+
+def test_error_response_of_a_rolled_back_unit_is_kept(client):
+    client, connection = client
+
+    response = client.get("/conflict")
+
+    assert response.status_code == 409
+    assert response.get_json() == {"error": "conflict"}
+    assert connection.commits == 0
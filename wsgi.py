@@ -0,0 +1,5 @@
+from main import create_app
+
+# Built once in the gunicorn master (preload_app) and shared by the forked workers.
+# Each worker starts its own invalidation listener and warm-up after the fork, see gunicorn.conf.py
+app = create_app({"START_INVALIDATION_LISTENER": False, "WARM_START": False})